@@ -0,0 +1,78 @@
+"""
+Benchmark of the Spotify client pool against a local stand-in of the Spotify API.
+
+Runs the same sequence of API calls with a new Spotipy client per call (as SpotifyService did
+before the pool) and with the pooled clients, and reports the number of TCP connections opened
+and the elapsed time of each strategy.
+
+Usage:
+    python -m benchmarks.spotify_client_pool [--calls 200]
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from connection.spotify_clients import SpotifyClientPool, SharedSession
+import argparse
+import json
+import threading
+import time
+import spotipy
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers every request with a small JSON document, keeping the connection alive."""
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, Nagle's algorithm would delay the body of kept-alive connections.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        body = json.dumps({"id": "user", "items": [], "total": 0}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(get_client, calls, server, prefix):
+    """Makes `calls` API calls with the clients returned by `get_client`, returns (connections, seconds)."""
+    server.connections = 0
+    started = time.perf_counter()
+    for _ in range(calls):
+        client = get_client()
+        client.prefix = prefix
+        client.me()
+    return server.connections, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="API calls made by each strategy")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.lock, server.connections = threading.Lock(), 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    prefix = f"http://127.0.0.1:{server.server_port}/v1/"
+
+    pool = SpotifyClientPool(session=SharedSession())
+    strategies = {
+        "client per call": lambda: spotipy.Spotify(auth="token"),
+        "pooled clients": lambda: pool.get(1, "token"),
+    }
+    try:
+        for name, get_client in strategies.items():
+            connections, seconds = run(get_client, args.calls, server, prefix)
+            print(f"{name:>16}: {connections:4d} connections for {args.calls} calls, {seconds * 1000 / args.calls:.2f} ms/call")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
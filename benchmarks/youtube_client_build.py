@@ -0,0 +1,61 @@
+"""
+Microbenchmark of the cost of building a YouTube client for every API call.
+
+Compares googleapiclient's build(), which reads and parses the bundled discovery document every
+time, with the build() of connection.google_clients, which reuses the document parsed once per
+process. Each iteration builds a client with new credentials and creates a search request, like
+YouTubeService does for every track of a migration. No request is sent.
+
+Usage:
+    python -m benchmarks.youtube_client_build [--calls 200]
+"""
+from googleapiclient import discovery
+from google.oauth2.credentials import Credentials
+from connection import google_clients
+import argparse
+import time
+import tracemalloc
+
+
+def build_client(build, i):
+    youtube = build("youtube", "v3", credentials=Credentials(f"token{i}"))
+    return youtube.search().list(part="snippet", q="artist title", type="video", maxResults=5)
+
+
+def run(build, calls):
+    """Builds `calls` clients and search requests, returns (ms per call, peak KiB allocated per call)."""
+    started = time.perf_counter()
+    for i in range(calls):
+        build_client(build, i)
+    elapsed = time.perf_counter() - started
+
+    # allocations are traced in a separate pass, tracing slows the calls down.
+    tracemalloc.start()
+    peak = 0
+    for i in range(min(calls, 20)):
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        build_client(build, i)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return elapsed * 1000 / calls, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="clients built by each strategy")
+    args = parser.parse_args()
+
+    # the document is loaded before timing, as it is once per worker process.
+    google_clients.get_discovery_document("youtube", "v3")
+    strategies = {
+        "googleapiclient build": lambda *a, **kw: discovery.build(*a, static_discovery=True, **kw),
+        "cached document": google_clients.build,
+    }
+    for name, build in strategies.items():
+        ms, peak = run(build, args.calls)
+        print(f"{name:>22}: {ms:.3f} ms/call, {peak:,.0f} KiB peak allocation per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,53 @@ class Config:
     # REDIS CONFIG (UPTASH CREDENTIALS)
     REDIS_URL = os.getenv('REDIS_URL')
     REDIS_TOKEN = os.getenv('REDIS_TOKEN')
+    # RATE LIMIT CONFIG (requests per second for each provider)
+    SPOTIFY_RATE_LIMIT = float(os.getenv('SPOTIFY_RATE_LIMIT', 5))
+    SPOTIFY_RATE_LIMIT_BURST = int(os.getenv('SPOTIFY_RATE_LIMIT_BURST', 10))
+    SPOTIFY_RATE_LIMIT_MIN = float(os.getenv('SPOTIFY_RATE_LIMIT_MIN', 0.5))
+    SPOTIFY_RATE_LIMIT_MAX = float(os.getenv('SPOTIFY_RATE_LIMIT_MAX', 20))
+    YOUTUBE_RATE_LIMIT = float(os.getenv('YOUTUBE_RATE_LIMIT', 3))
+    YOUTUBE_RATE_LIMIT_BURST = int(os.getenv('YOUTUBE_RATE_LIMIT_BURST', 5))
+    YOUTUBE_RATE_LIMIT_MIN = float(os.getenv('YOUTUBE_RATE_LIMIT_MIN', 0.2))
+    YOUTUBE_RATE_LIMIT_MAX = float(os.getenv('YOUTUBE_RATE_LIMIT_MAX', 10))
+    # PROVIDER RETRY CONFIG (transient errors: HTTP 429, 5xx, YouTube rateLimitExceeded/backendError)
+    PROVIDER_RETRY_ATTEMPTS = int(os.getenv('PROVIDER_RETRY_ATTEMPTS', 5))  # attempts per call, including the first one
+    PROVIDER_RETRY_BASE_DELAY = float(os.getenv('PROVIDER_RETRY_BASE_DELAY', 0.5))  # seconds
+    PROVIDER_RETRY_MAX_DELAY = float(os.getenv('PROVIDER_RETRY_MAX_DELAY', 30))  # seconds
+    PROVIDER_RETRY_DEADLINE = float(os.getenv('PROVIDER_RETRY_DEADLINE', 120))  # seconds per call, retries included
+    # CIRCUIT BREAKER CONFIG (per provider and endpoint family, shared by the workers through Redis)
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_BREAKER_FAILURE_THRESHOLD', 5))  # failures that open the circuit
+    CIRCUIT_BREAKER_FAILURE_WINDOW = int(os.getenv('CIRCUIT_BREAKER_FAILURE_WINDOW', 30))  # seconds without failures that reset the count
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT = int(os.getenv('CIRCUIT_BREAKER_RECOVERY_TIMEOUT', 30))  # seconds open before a probe
+    CIRCUIT_BREAKER_SYNC_INTERVAL = float(os.getenv('CIRCUIT_BREAKER_SYNC_INTERVAL', 1))  # seconds the shared state is cached
+    # YOUTUBE QUOTA CONFIG (Data API units per day, reset at midnight Pacific Time)
+    YOUTUBE_DAILY_QUOTA = int(os.getenv('YOUTUBE_DAILY_QUOTA', 10000))
+    YOUTUBE_USER_DAILY_QUOTA = int(os.getenv('YOUTUBE_USER_DAILY_QUOTA', 10000))  # lower it to share the quota between users
+    # MIGRATION JOBS CONFIG
+    MIGRATION_WORKERS = int(os.getenv('MIGRATION_WORKERS', 4))
+    MIGRATION_USER_CONCURRENCY = int(os.getenv('MIGRATION_USER_CONCURRENCY', 2))  # running jobs per user
+    MIGRATION_JOB_TTL = int(os.getenv('MIGRATION_JOB_TTL', 24 * 60 * 60))  # seconds
+    MIGRATION_MATCH_CONCURRENCY = int(os.getenv('MIGRATION_MATCH_CONCURRENCY', 8))
+    MIGRATION_CHECKPOINT_TTL = int(os.getenv('MIGRATION_CHECKPOINT_TTL', 7 * 24 * 60 * 60))  # seconds
+    MIGRATION_EVENTS_KEEPALIVE = int(os.getenv('MIGRATION_EVENTS_KEEPALIVE', 15))  # seconds
+    MIGRATION_PLAN_TTL = int(os.getenv('MIGRATION_PLAN_TTL', 24 * 60 * 60))  # seconds a preview can be committed
+    MIGRATION_IDEMPOTENCY_TTL = int(os.getenv('MIGRATION_IDEMPOTENCY_TTL', 10 * 60))  # seconds a repeated request returns the same job
+    # TRACK MATCH CACHE CONFIG
+    MATCH_CACHE_SIZE = int(os.getenv('MATCH_CACHE_SIZE', 10000))  # entries kept in each process
+    MATCH_CACHE_TTL = int(os.getenv('MATCH_CACHE_TTL', 30 * 24 * 60 * 60))  # seconds
+    ISRC_MAPPING_TTL = int(os.getenv('ISRC_MAPPING_TTL', 180 * 24 * 60 * 60))  # seconds an ISRC mapping is kept
+    # SPOTIFY CLIENT POOL CONFIG
+    SPOTIFY_CLIENT_POOL_SIZE = int(os.getenv('SPOTIFY_CLIENT_POOL_SIZE', 256))  # clients kept in each process
+    SPOTIFY_HTTP_POOL_SIZE = int(os.getenv('SPOTIFY_HTTP_POOL_SIZE', 32))  # keep-alive connections to the API per process
+    # SPOTIFY PROFILE CACHE CONFIG
+    SPOTIFY_PROFILE_CACHE_SIZE = int(os.getenv('SPOTIFY_PROFILE_CACHE_SIZE', 1024))  # profiles kept in each process
+    SPOTIFY_PROFILE_CACHE_TTL = int(os.getenv('SPOTIFY_PROFILE_CACHE_TTL', 60 * 60))  # seconds
+    # SPOTIFY PLAYLIST CACHE CONFIG
+    SPOTIFY_PLAYLIST_CACHE_ITEMS = int(os.getenv('SPOTIFY_PLAYLIST_CACHE_ITEMS', 50000))  # playlist items kept in each process
+    SPOTIFY_PLAYLIST_CACHE_TTL = int(os.getenv('SPOTIFY_PLAYLIST_CACHE_TTL', 24 * 60 * 60))  # seconds
+    # TRACK MATCHING CONFIG
+    MATCH_CANDIDATES = int(os.getenv('MATCH_CANDIDATES', 5))  # results scored per search
+    MATCH_MIN_CONFIDENCE = float(os.getenv('MATCH_MIN_CONFIDENCE', 0.65))
 
 
 class DevelopmentConfig(Config):
@@ -0,0 +1,68 @@
+from googleapiclient.discovery import build_from_document, fix_method_name
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import UnknownApiNameOrVersion
+import httplib2
+import json
+import threading
+
+_documents = {}
+_documents_lock = threading.Lock()
+
+
+def _complete_document(document):
+    """
+    Builds every resource of a discovery document once.
+
+    googleapiclient adds the parameters common to all methods to the description of a method the
+    first time it builds it, which would resize dictionaries other threads may be reading. Once the
+    whole tree has been built, the document is only read and can be shared between threads.
+    """
+    def build_resources(resource, description):
+        for name, nested in description.get("resources", {}).items():
+            build_resources(getattr(resource, fix_method_name(name))(), nested)
+
+    build_resources(build_from_document(document, http=httplib2.Http()), document)
+
+
+def get_discovery_document(service_name, version):
+    """
+    Returns the discovery document of a Google API, loaded once per process from the static copy
+    bundled with googleapiclient, so it is neither fetched nor parsed again for every client.
+
+    Parameters:
+    -----------
+    service_name (str): Name of the API, e.g. "youtube".
+    version (str): Version of the API, e.g. "v3".
+
+    Raises:
+    -------
+    UnknownApiNameOrVersion: If googleapiclient does not bundle the document of the API.
+    """
+    key = (service_name, version)
+    with _documents_lock:
+        if key not in _documents:
+            content = get_static_doc(service_name, version)
+            if content is None:
+                raise UnknownApiNameOrVersion(f"name: {service_name}  version: {version}")
+            document = json.loads(content)
+            _complete_document(document)
+            _documents[key] = document
+        return _documents[key]
+
+
+def build(service_name, version, credentials):
+    """
+    Drop-in replacement of googleapiclient.discovery.build, binding the credentials of a user to a
+    client of the cached discovery document.
+
+    Building the client from the parsed document only creates the top-level resource, which is
+    cheap, so every call still gets its own client and HTTP connection: httplib2 connections are
+    not thread-safe and migrations call the API concurrently.
+
+    Parameters:
+    -----------
+    service_name (str): Name of the API, e.g. "youtube".
+    version (str): Version of the API, e.g. "v3".
+    credentials (google.auth.credentials.Credentials): Credentials of the user.
+    """
+    return build_from_document(get_discovery_document(service_name, version), credentials=credentials)
@@ -1,4 +1,4 @@
-from googleapiclient.discovery import build
+from connection.google_clients import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from config import Config
 
@@ -0,0 +1,85 @@
+from requests.adapters import HTTPAdapter
+from cachetools import LRUCache
+from config import Config
+import spotipy
+import requests
+import threading
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class SharedSession(requests.Session):
+    """
+    HTTP session shared by several Spotipy clients. Spotipy closes the session of a client when the
+    client is garbage collected, which would drop the connections still used by the other clients.
+    """
+
+    def close(self):
+        pass
+
+
+def get_http_session():
+    """
+    Returns the HTTP session shared by every Spotify client of the worker process, creating it on
+    first use. Its connection pool keeps the connections to the Spotify API alive between calls.
+
+    The session does not retry, so throttled and failed requests reach the retry policy of the
+    caller with their status code and `Retry-After` header.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = SharedSession()
+            adapter = HTTPAdapter(pool_maxsize=Config.SPOTIFY_HTTP_POOL_SIZE, max_retries=0)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+class SpotifyClientPool:
+    """
+    Bounded pool of Spotipy clients, one per user and access token.
+
+    Clients are reused between the calls of a user instead of being built for every call, and all
+    of them send their requests through the HTTP session of the worker process. When the access
+    token of a user is refreshed, the client built with the previous token is replaced; the least
+    recently used clients are evicted once the pool is full.
+
+    Methods:
+    --------
+    get(user_id: int, token: str) -> spotipy.Spotify:
+        Returns the client of a user for the given access token.
+
+    evict(user_id: int):
+        Removes the client of a user, e.g. when their tokens are revoked.
+    """
+
+    def __init__(self, maxsize=None, session=None):
+        """
+        Parameters:
+        -----------
+        maxsize (int): Number of clients kept in the pool.
+        session (requests.Session): HTTP session of the clients, the one of the process by default.
+        """
+        self.session = session or get_http_session()
+        self._clients = LRUCache(maxsize=maxsize or Config.SPOTIFY_CLIENT_POOL_SIZE)
+        # cachetools caches are not thread-safe and migrations call Spotify concurrently.
+        self._lock = threading.Lock()
+
+    def get(self, user_id, token):
+        """
+        Returns the client of a user for the given access token, building it if needed.
+        """
+        with self._lock:
+            entry = self._clients.get(user_id)
+            if entry is not None and entry[0] == token:
+                return entry[1]
+            client = spotipy.Spotify(auth=token, requests_session=self.session)
+            self._clients[user_id] = (token, client)
+            return client
+
+    def evict(self, user_id):
+        """Removes the client of a user from the pool."""
+        with self._lock:
+            self._clients.pop(user_id, None)
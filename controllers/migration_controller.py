@@ -1,10 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, url_for
 from services.playlist_migration_service import PlaylistMigration
+from services.migration_jobs import MigrationJobManager, SYNC_DIRECTIONS, LIBRARY_DIRECTIONS, PREVIEW_DIRECTIONS, RESUMABLE_STATUSES, derive_idempotency_key
+from services.migration_results import serialize_result
 from services.youtube_service import YouTubeService
 from services.spotify_service import SpotifyService
-from errors.playlist_exceptions import PlaylistNotFoundError, TrackNotFoundError, APIRequestError, AuthenticationError
+from errors.playlist_exceptions import PlaylistNotFoundError, TrackNotFoundError, APIRequestError, AuthenticationError, IdempotencyKeyConflictError
 from decorators.route_protection import token_required
 from decorators.stored_tokens_handler import stored_tokens_handler_errors
+from database.db_connection import db
+from extensions.event_bus import get_event_bus
+from config import Config
+import json
 
 migration_bp = Blueprint('migration_controller', __name__)
 spotify_service = SpotifyService()
@@ -13,17 +19,70 @@ playlist_migration_service = PlaylistMigration(
     spotify_service,
     youtube_service
 )
+migration_jobs = MigrationJobManager(playlist_migration_service)
+
+
+def enqueue_migration(current_user, direction, playlist_id, operation="migrate", options=None):
+    """
+    Enqueues a migration job and builds the 202 response pointing to its status endpoint.
+
+    Requests are idempotent: the key comes from the `Idempotency-Key` header, or is derived from the
+    request itself, so a retried request returns the job it already started instead of creating the
+    target playlist again.
+    """
+    idempotency_key = request.headers.get("Idempotency-Key") or derive_idempotency_key(operation, direction, playlist_id, options)
+    if len(idempotency_key) > 255:
+        return jsonify({"error": "Idempotency-Key must be at most 255 characters long."}), 400
+    try:
+        job = migration_jobs.submit(current_user.id, direction, playlist_id, operation, options, idempotency_key)
+    except IdempotencyKeyConflictError as e:
+        return jsonify({"error": e.message}), 422
+
+    status_url = url_for('migration_controller.get_migration_job', job_id=job["id"])
+    response = jsonify({"job_id": job["id"], "status": job["status"], "status_url": status_url})
+    response.headers["Location"] = status_url
+    if job.get("replayed"):
+        response.headers["Idempotent-Replayed"] = "true"
+    return response, 202
+
+
+def get_result_options():
+    """
+    Reads the result options of a migration request. Results only hold a compact record per track,
+    the full provider payloads are kept when the request has ?include_payloads=true.
+    """
+    if request.args.get("include_payloads", "").lower() == "true":
+        return {"include_payloads": True}
+    return {}
+
+
+def iter_json(data, chunk_size=64 * 1024):
+    """
+    Serializes a JSON document in chunks of about `chunk_size` characters, so large
+    job results are streamed instead of being built as a single string.
+    """
+    encoder = json.JSONEncoder(default=serialize_result)
+    buffer, size = [], 0
+    for chunk in encoder.iterencode(data):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
 
 @migration_bp.route('/spotify-to-youtube/<playlist_id>', methods=['POST'])
 @token_required
 @stored_tokens_handler_errors
 def migrate_spotify_to_youtube(current_user, playlist_id):
     """
-    Endpoint to migrate a Spotify playlist to YouTube.   
-    """      
-    result = playlist_migration_service.migrate_spotify_to_youtube(current_user.id, playlist_id)
-    return jsonify(result), 200
-   
+    Endpoint to enqueue the migration of a Spotify playlist to YouTube.
+    Returns 202 with the job ID to poll on /migrate/jobs/<job_id>.
+    """
+    return enqueue_migration(current_user, "spotify-to-youtube", playlist_id, options=get_result_options())
+
 
 
 @migration_bp.route('/youtube-to-spotify/<playlist_id>', methods=['POST'])
@@ -31,8 +90,181 @@ def migrate_spotify_to_youtube(current_user, playlist_id):
 @stored_tokens_handler_errors
 def migrate_youtube_to_spotify(current_user, playlist_id):
     """
-    Endpoint to migrate a YouTube playlist to Spotify.
-    """    
-    result = playlist_migration_service.migrate_youtube_to_spotify(current_user.id, playlist_id)
-    return jsonify(result), 200
-        
+    Endpoint to enqueue the migration of a YouTube playlist to Spotify.
+    Returns 202 with the job ID to poll on /migrate/jobs/<job_id>.
+    """
+    return enqueue_migration(current_user, "youtube-to-spotify", playlist_id, options=get_result_options())
+
+
+@migration_bp.route('/sync/<direction>/<playlist_id>', methods=['POST'])
+@token_required
+@stored_tokens_handler_errors
+def sync_playlist(current_user, direction, playlist_id):
+    """
+    Endpoint to enqueue the incremental sync of a migrated playlist: only the tracks missing
+    from the target playlist are searched and added.
+    Accepts an optional JSON body with the "target_playlist_id" to sync.
+    Returns 202 with the job ID to poll on /migrate/jobs/<job_id>.
+    """
+    if direction not in SYNC_DIRECTIONS:
+        return jsonify({"error": f"Unsupported sync direction '{direction}'."}), 400
+
+    data = request.get_json(silent=True) or {}
+    options = {"target_playlist_id": data["target_playlist_id"]} if data.get("target_playlist_id") else None
+    return enqueue_migration(current_user, direction, playlist_id, "sync", options)
+
+
+@migration_bp.route('/library/<direction>', methods=['POST'])
+@token_required
+@stored_tokens_handler_errors
+def migrate_library(current_user, direction):
+    """
+    Endpoint to enqueue the migration of several playlists at once.
+    Accepts a JSON body with "playlist_ids": a list of source playlist IDs, or "all" (default)
+    to migrate every playlist of the user. Songs shared by several playlists are only searched once.
+    Returns 202 with the job ID to poll on /migrate/jobs/<job_id>.
+    """
+    if direction not in LIBRARY_DIRECTIONS:
+        return jsonify({"error": f"Unsupported migration direction '{direction}'."}), 400
+
+    data = request.get_json(silent=True) or {}
+    playlist_ids = data.get("playlist_ids", "all")
+    if playlist_ids != "all" and not (isinstance(playlist_ids, list) and playlist_ids and all(isinstance(playlist_id, str) for playlist_id in playlist_ids)):
+        return jsonify({"error": "playlist_ids must be a non-empty list of playlist IDs or \"all\"."}), 400
+
+    return enqueue_migration(current_user, direction, playlist_ids, "library")
+
+
+@migration_bp.route('/preview/<direction>/<playlist_id>', methods=['POST'])
+@token_required
+@stored_tokens_handler_errors
+def preview_migration(current_user, direction, playlist_id):
+    """
+    Endpoint to enqueue the preview of a migration: the tracks are matched, but no playlist is
+    created or written. The result of the job holds the matches and the ID of the plan to commit.
+    Returns 202 with the job ID to poll on /migrate/jobs/<job_id>.
+    """
+    if direction not in PREVIEW_DIRECTIONS:
+        return jsonify({"error": f"Unsupported migration direction '{direction}'."}), 400
+    return enqueue_migration(current_user, direction, playlist_id, "preview", get_result_options())
+
+
+@migration_bp.route('/plans/<plan_id>/commit', methods=['POST'])
+@token_required
+@stored_tokens_handler_errors
+def commit_migration_plan(current_user, plan_id):
+    """
+    Endpoint to enqueue the migration of a previewed playlist. The tracks matched by the preview
+    are written without being searched again.
+    Returns 202 with the job ID to poll on /migrate/jobs/<job_id>.
+    """
+    plan = playlist_migration_service.plan_store.get(plan_id)
+    # plans of other users are reported as missing.
+    if not plan or plan["user_id"] != current_user.id:
+        return jsonify({"error": "Migration plan not found or expired."}), 404
+    return enqueue_migration(current_user, plan["direction"], plan["playlist_id"], "migrate", {"plan_id": plan_id, **get_result_options()})
+
+
+@migration_bp.route('/jobs/<job_id>', methods=['GET'])
+@token_required
+@stored_tokens_handler_errors
+def get_migration_job(current_user, job_id):
+    """
+    Endpoint to retrieve the state, progress counters and final result of a migration job.
+    The job is serialized incrementally, as the result of a large migration holds a record per track.
+    """
+    job = migration_jobs.get_job(job_id)
+    # jobs of other users are reported as missing.
+    if not job or job["user_id"] != current_user.id:
+        return jsonify({"error": "Migration job not found."}), 404
+    return Response(iter_json(job), status=200, mimetype="application/json")
+
+
+def format_sse(event):
+    """
+    Formats an event as a Server-Sent Events message.
+    """
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=serialize_result)}\n\n"
+
+
+# statuses after which a job publishes no more events.
+FINAL_STATUSES = ("completed", "failed", "deferred")
+
+
+def stream_job_events(job, subscription):
+    """
+    Yields the SSE messages of a job until it completes or fails.
+
+    The generator blocks on the subscription queue, sending a comment as keep-alive
+    when no event arrives for MIGRATION_EVENTS_KEEPALIVE seconds. The job is read again
+    on every keep-alive, so the stream also ends when the job runs in another process,
+    whose events are not delivered here.
+    """
+    try:
+        # the current state of the job comes first, so late subscribers know where it stands.
+        yield format_sse({"type": "status", "status": job["status"], "progress": job["progress"]})
+        if job["status"] in FINAL_STATUSES:
+            return
+
+        while True:
+            event = subscription.get(timeout=Config.MIGRATION_EVENTS_KEEPALIVE)
+            if event is None:
+                job = migration_jobs.get_job(job["id"]) or job
+                if job["status"] in FINAL_STATUSES:
+                    yield format_sse({"type": job["status"], "result": job["result"], "error": job["error"]})
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+            if event["type"] in FINAL_STATUSES:
+                return
+    finally:
+        get_event_bus().unsubscribe(subscription)
+
+
+@migration_bp.route('/jobs/<job_id>/events', methods=['GET'])
+@token_required
+@stored_tokens_handler_errors
+def stream_migration_job(current_user, job_id):
+    """
+    Endpoint to follow a migration job with Server-Sent Events.
+
+    Streams the per-track events (matched, not_found, inserted, throttled), the progress
+    counters with the current throughput (tracks per second) and the final status of the job.
+    Events are published in-process: when another process runs the job, the stream only sends
+    keep-alives and the final status of the job.
+    """
+    # subscribe before reading the job, so the final event cannot be missed.
+    subscription = get_event_bus().subscribe(job_id)
+    job = migration_jobs.get_job(job_id)
+    if not job or job["user_id"] != current_user.id:
+        get_event_bus().unsubscribe(subscription)
+        return jsonify({"error": "Migration job not found."}), 404
+
+    # the stream can stay open for a long time, release the database connection first.
+    db.session.remove()
+
+    response = Response(stream_job_events(job, subscription), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@migration_bp.route('/jobs/<job_id>/resume', methods=['POST'])
+@token_required
+@stored_tokens_handler_errors
+def resume_migration_job(current_user, job_id):
+    """
+    Endpoint to resume a failed or deferred migration job (e.g. after the YouTube quota has been reset).
+    The migration continues from its checkpoint without repeating searches or inserts.
+    """
+    job = migration_jobs.get_job(job_id)
+    if not job or job["user_id"] != current_user.id:
+        return jsonify({"error": "Migration job not found."}), 404
+    if job["status"] not in RESUMABLE_STATUSES:
+        return jsonify({"error": f"Only failed or deferred jobs can be resumed, this job is {job['status']}."}), 409
+
+    job = migration_jobs.resume(job)
+    if not job:
+        return jsonify({"error": "This job has already been resumed."}), 409
+    return jsonify({"job_id": job["id"], "status": job["status"], "status_url": url_for('migration_controller.get_migration_job', job_id=job["id"])}), 202
@@ -44,6 +44,8 @@ def callback(current_user):
 
     spotify_tokens.stored_access_token(current_user.id, token_info)
     spotify_tokens.stored_refresh_token(current_user.id, token_info)
+    # the user may have connected another Spotify account.
+    spotify_service.profile_cache.delete(current_user.id)
 
     return jsonify({
         'message': 'Spotify authentication successful', 
@@ -56,6 +58,8 @@ def callback(current_user):
 def logout(current_user): 
     spotify_tokens.revoke_access_token(current_user.id)
     spotify_tokens.revoke_refresh_token(current_user.id)
+    spotify_service.profile_cache.delete(current_user.id)
+    spotify_service.client_pool.evict(current_user.id)
     return jsonify({'message': 'Spotify logout successful' })       
 
 @spotify_bp.route('/user_data', methods=['GET'])
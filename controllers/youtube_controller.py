@@ -87,3 +87,13 @@ def get_playlist(current_user, playlist_id):
 def get_playlist_tracks(current_user, playlist_id):     
     tracks = youtube_service.get_playlist_tracks(current_user.id, playlist_id)
     return jsonify(tracks)
+
+
+@youtube_bp.route('/quota', methods=['GET'])
+@token_required
+def get_quota(current_user):
+    """
+    Returns the YouTube Data API quota units spent today by the application and by the user,
+    with the remaining budget and the seconds until the daily reset.
+    """
+    return jsonify(youtube_service.quota_ledger.get_usage(current_user.id))
@@ -1,6 +1,8 @@
 from functools import wraps
 from flask import jsonify
 from errors.custom_exceptions import NoRefreshTokenError, InvalidTokenError
+from errors.playlist_exceptions import CircuitOpenError
+import math
 
 def stored_tokens_handler_errors(func):
     """
@@ -25,6 +27,8 @@ def stored_tokens_handler_errors(func):
     ---------------
     Custom : {"error": e.message}
         Returns a JSON error message and status code as defined by the raised exceptions.
+    503 : {"error": e.message}
+        When the provider's circuit breaker is open, with a `Retry-After` header.
     500 : {"error": "An unexpected error occurred"}
         For any unexpected errors.
 
@@ -32,6 +36,7 @@ def stored_tokens_handler_errors(func):
     -------------------
     NoRefreshTokenError : Raised when no refresh token is available.
     InvalidTokenError : Raised when a token is malformed or invalid.
+    CircuitOpenError : Raised without calling the provider while it is failing.
 
     Usage:
     ------
@@ -47,6 +52,8 @@ def stored_tokens_handler_errors(func):
             return jsonify({"error": e.message}), e.status_code
         except InvalidTokenError as e:
             return jsonify({"error": e.message}), e.status_code
+        except CircuitOpenError as e:
+            return jsonify({"error": e.message}), 503, {"Retry-After": str(math.ceil(e.retry_after or 1))}
         except Exception as e:
             return jsonify({"error": f"An unexpected error occurred: {e}"}), 500
     return wrapper
@@ -26,6 +26,34 @@ class APIRequestError(Exception):
         super().__init__(self.message)
 
 
+class RateLimitExceededError(APIRequestError):
+    """Raised when the platform's API throttles our requests (HTTP 429)."""
+    def __init__(self, message="API rate limit exceeded. Please try again later.", retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class ProviderUnavailableError(APIRequestError):
+    """Raised when the platform's API fails on its side (HTTP 5xx) and the request can be retried."""
+    def __init__(self, message="API temporarily unavailable. Please try again later.", retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class CircuitOpenError(APIRequestError):
+    """Raised without calling the platform's API while its circuit breaker is open after repeated failures."""
+    def __init__(self, message="API unavailable, requests are paused. Please try again later.", retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class IdempotencyKeyConflictError(Exception):
+    """Raised when an idempotency key is reused for a different migration request."""
+    def __init__(self, message="This idempotency key was already used for a different migration request."):
+        self.message = message
+        super().__init__(self.message)
+
+
 class InvalidPlatformError(Exception):
     """Raised when the source or destination platform is invalid."""
     def __init__(self, message="Invalid source or destination platform."):
@@ -15,6 +15,24 @@ class YouTubeQuotaExceededError(YouTubeAPIError):
     """Raised when YouTube API quota limit is exceeded."""
     pass
 
+class YouTubeQuotaDeferredError(YouTubeQuotaExceededError):
+    """Raised when an operation does not fit the remaining YouTube quota and has to wait for the reset."""
+    def __init__(self, message="Not enough YouTube API quota left today.", retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+class YouTubeRateLimitError(YouTubeAPIError):
+    """Raised when YouTube API throttles requests (rateLimitExceeded)."""
+    def __init__(self, message="YouTube API rate limit exceeded.", retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+class YouTubeBackendError(YouTubeAPIError):
+    """Raised when YouTube API fails on its side (HTTP 5xx, backendError) and the request can be retried."""
+    def __init__(self, message="YouTube API temporarily unavailable.", retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message)
+
 class YouTubeInvalidRequestError(YouTubeAPIError):
     """Raised for invalid requests to YouTube API."""
     pass
@@ -0,0 +1,216 @@
+from database.redis_connection import get_redis_connection
+from errors.playlist_exceptions import CircuitOpenError
+from extensions.retry import classify_provider_error
+from prometheus_client import Counter
+from functools import wraps
+from config import Config
+import requests
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+CIRCUIT_REJECTIONS = Counter(
+    "circuit_breaker_rejections_total", "Provider calls rejected while their circuit breaker was open.", ["breaker"]
+)
+
+# errors raised when the provider could not be reached in time.
+CONNECTION_ERRORS = (TimeoutError, ConnectionError, requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+def is_outage_error(error):
+    """
+    Tells whether an error means that the provider is failing (HTTP 5xx, backendError, timeouts and
+    connection errors), as opposed to a response to a valid call (not found, throttled...).
+    Services wrap unexpected errors, so the error being handled when it was raised is also checked.
+    """
+    if classify_provider_error(error) == "unavailable":
+        return True
+    return any(isinstance(cause, CONNECTION_ERRORS) for cause in (error, error.__cause__, error.__context__))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of a provider endpoint family (e.g. "spotify.search"), shared by every worker.
+
+    After `failure_threshold` outage errors, with less than `failure_window` seconds between them,
+    the circuit opens: calls fail fast with CircuitOpenError for `recovery_timeout` seconds instead
+    of waiting for the provider to time out. Then the circuit is half-open and a single call, across
+    all the workers, probes the provider: its success closes the circuit, its failure opens it again.
+
+    The state is kept in Redis and cached for `sync_interval` seconds, so successful calls do not
+    cost any Redis request. Redis errors never fail a call: the breaker then keeps its last state.
+
+    Parameters:
+    -----------
+    name (str): Name of the breaker, used in the Redis keys and metrics.
+    failure_threshold (int): Outage errors that open the circuit.
+    failure_window (int): Seconds without failures after which the count is reset.
+    recovery_timeout (int): Seconds the circuit stays open before a probe.
+    sync_interval (float): Seconds the state read from Redis is reused.
+    clock (callable): Wall clock, shared by the workers.
+    """
+
+    def __init__(self, name, failure_threshold=None, failure_window=None, recovery_timeout=None,
+                 sync_interval=None, clock=time.time):
+        self.name = name
+        self.failure_threshold = failure_threshold or Config.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        self.failure_window = failure_window or Config.CIRCUIT_BREAKER_FAILURE_WINDOW
+        self.recovery_timeout = recovery_timeout or Config.CIRCUIT_BREAKER_RECOVERY_TIMEOUT
+        self.sync_interval = sync_interval if sync_interval is not None else Config.CIRCUIT_BREAKER_SYNC_INTERVAL
+        self._clock = clock
+        self._opened_until = 0.0
+        self._synced_at = None
+        self._lock = threading.Lock()
+
+    def _key(self, suffix):
+        return f"circuit_breaker:{self.name}:{suffix}"
+
+    def _sync(self, now):
+        """Reads the shared state from Redis, unless it was read less than `sync_interval` ago."""
+        with self._lock:
+            if self._synced_at is not None and now - self._synced_at < self.sync_interval:
+                return self._opened_until
+            try:
+                self._opened_until = float(redis.get(self._key("opened_until")) or 0)
+            except Exception as e:
+                logger.warning(f"Circuit breaker {self.name} could not read its state: {e}")
+            self._synced_at = now
+            return self._opened_until
+
+    def _reject(self, retry_after):
+        CIRCUIT_REJECTIONS.labels(breaker=self.name).inc()
+        raise CircuitOpenError(
+            f"{self.name} is unavailable, requests are paused for {retry_after:.0f}s.", retry_after=retry_after
+        )
+
+    def before_call(self):
+        """
+        Checks whether a call can be made.
+
+        Returns:
+        --------
+        bool: True if the call is the probe of a half-open circuit.
+
+        Raises:
+        -------
+        CircuitOpenError: If the circuit is open, or another call is already probing the provider.
+        """
+        now = self._clock()
+        opened_until = self._sync(now)
+        if not opened_until:
+            return False
+        if now < opened_until:
+            self._reject(opened_until - now)
+        try:
+            # the probe key expires with the recovery timeout, in case the probing worker dies.
+            probe = redis.set(self._key("probe"), "1", nx=True, ex=self.recovery_timeout)
+        except Exception as e:
+            logger.warning(f"Circuit breaker {self.name} could not claim the probe: {e}")
+            probe = True
+        if not probe:
+            self._reject(1)
+        return True
+
+    def record_success(self, probe=False):
+        """Closes the circuit after a successful probe. Other successful calls are not recorded."""
+        if not probe:
+            return
+        try:
+            redis.delete(self._key("opened_until"), self._key("probe"), self._key("failures"))
+        except Exception as e:
+            logger.warning(f"Circuit breaker {self.name} could not close: {e}")
+        with self._lock:
+            self._opened_until, self._synced_at = 0.0, self._clock()
+        logger.info(f"Circuit breaker {self.name} closed.")
+
+    def record_failure(self, probe=False):
+        """Counts an outage error, opening the circuit after too many of them or a failed probe."""
+        if not probe:
+            try:
+                pipeline = redis.pipeline()
+                pipeline.incr(self._key("failures"))
+                pipeline.expire(self._key("failures"), self.failure_window)
+                failures = pipeline.exec()[0]
+            except Exception as e:
+                logger.warning(f"Circuit breaker {self.name} could not count a failure: {e}")
+                return
+            if int(failures) < self.failure_threshold:
+                return
+        self._open()
+
+    def _open(self):
+        now = self._clock()
+        opened_until = now + self.recovery_timeout
+        try:
+            pipeline = redis.pipeline()
+            pipeline.set(self._key("opened_until"), str(opened_until), ex=24 * 60 * 60)
+            # workers with a stale state can only probe once the circuit is half-open again.
+            pipeline.set(self._key("probe"), "1", ex=self.recovery_timeout)
+            pipeline.delete(self._key("failures"))
+            pipeline.exec()
+        except Exception as e:
+            logger.warning(f"Circuit breaker {self.name} could not share its state: {e}")
+        with self._lock:
+            self._opened_until, self._synced_at = opened_until, now
+        logger.warning(f"Circuit breaker {self.name} opened for {self.recovery_timeout}s.")
+
+    def call(self, func, *args, **kwargs):
+        """
+        Calls a function through the breaker.
+
+        Raises:
+        -------
+        CircuitOpenError: If the circuit is open.
+        """
+        probe = self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_outage_error(e):
+                self.record_failure(probe)
+            else:
+                # the provider answered, even if the call failed.
+                self.record_success(probe)
+            raise
+        self.record_success(probe)
+        return result
+
+
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name):
+    """
+    Returns the process-wide circuit breaker of a provider endpoint family, creating it on first use.
+
+    Parameters:
+    -----------
+    name (str): Name of the breaker, e.g. "spotify.search" or "youtube.write".
+    """
+    with _circuit_breakers_lock:
+        if name not in _circuit_breakers:
+            _circuit_breakers[name] = CircuitBreaker(name)
+        return _circuit_breakers[name]
+
+
+def circuit_breaker(name):
+    """
+    Decorator that calls a service method through the circuit breaker of its endpoint family.
+
+    Usage:
+    ------
+    @circuit_breaker("spotify.search")
+    def search_track(self, user_id, track_query):
+        ...
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_circuit_breaker(name).call(func, *args, **kwargs)
+        return wrapper
+    return decorator
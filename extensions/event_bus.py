@@ -0,0 +1,107 @@
+import queue
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Queue of the events published on a channel for one subscriber.
+
+    Parameters:
+    -----------
+    channel (str): Name of the channel.
+    max_events (int): Number of events kept while the subscriber is not reading.
+    """
+
+    def __init__(self, channel, max_events):
+        self.channel = channel
+        self._events = queue.Queue(maxsize=max_events)
+
+    def put(self, event):
+        """
+        Queues an event. If the subscriber is too slow to keep up, its oldest event is dropped
+        instead, so the last events of a channel (e.g. the final status of a job) are always kept.
+        """
+        while True:
+            try:
+                self._events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._events.get_nowait()
+                    logger.debug(f"Subscriber of {self.channel} is lagging, oldest event dropped.")
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """
+        Waits for the next event.
+
+        Returns:
+        --------
+        dict: The event, or None if no event was published before the timeout.
+        """
+        try:
+            return self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """
+    In-process publish/subscribe channel.
+
+    Publishing is cheap when nobody is listening (a dictionary lookup), so it can be
+    called for every track of a migration. Subscribers block on their own queue
+    instead of polling.
+
+    Events are only delivered to subscribers of the same process, so the stream has
+    to be served by the process that runs the publisher.
+
+    Methods:
+    --------
+    subscribe(channel: str) -> Subscription:
+        Starts receiving the events of a channel.
+
+    unsubscribe(subscription: Subscription):
+        Stops receiving events.
+
+    publish(channel: str, event: dict):
+        Delivers an event to every subscriber of the channel.
+    """
+
+    def __init__(self, max_events=1000):
+        self.max_events = max_events
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(channel, self.max_events)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+_event_bus = EventBus()
+
+
+def get_event_bus():
+    """Returns the event bus shared by the whole process."""
+    return _event_bus
@@ -0,0 +1,121 @@
+from collections import deque
+from prometheus_client import Gauge, Histogram
+import itertools
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = Gauge("migration_queue_depth", "Migration jobs waiting to run, per user.", ["user_id"])
+# not labelled by user: histogram series cannot be removed without losing the observations.
+QUEUE_WAIT = Histogram(
+    "migration_queue_wait_seconds", "Seconds a migration job waited before running.",
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 3600)
+)
+
+
+class FairScheduler:
+    """
+    Weighted fair queue of tasks across users, with a cap of running tasks per user.
+
+    Every user has a virtual time: the service attained by their tasks (e.g. tracks processed)
+    divided by their weight, counted since the user became active. The next task comes from the
+    user with the lowest virtual time, so users with small migrations go ahead of a user already
+    served by a large one, without having to know the size of the jobs in advance. Tasks of the
+    same user run in order.
+
+    Parameters:
+    -----------
+    max_per_user (int): Number of tasks of the same user that can run at the same time.
+    clock (callable): Monotonic clock, used to measure the waiting time.
+    """
+
+    def __init__(self, max_per_user, clock=time.monotonic):
+        self.max_per_user = max_per_user
+        self._clock = clock
+        self._queues = {} # user ID -> deque of (sequence, enqueued_at, task).
+        self._running = {}
+        self._virtual_time = {}
+        self._weights = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _is_active(self, user_id):
+        return bool(self._queues.get(user_id)) or self._running.get(user_id, 0) > 0
+
+    def put(self, user_id, task, weight=1.0):
+        """
+        Queues a task of a user.
+
+        Parameters:
+        -----------
+        user_id (int): The user the task belongs to.
+        task: The task to queue.
+        weight (float): Share of the service given to the user relative to the others.
+        """
+        with self._condition:
+            self._virtual_time.setdefault(user_id, 0.0)
+            self._weights[user_id] = weight
+            self._queues.setdefault(user_id, deque()).append((next(self._sequence), self._clock(), task))
+            QUEUE_DEPTH.labels(user_id=str(user_id)).set(len(self._queues[user_id]))
+            self._condition.notify_all()
+
+    def _pick_user(self):
+        """Returns the eligible user with the lowest virtual time, oldest task first on ties."""
+        eligible = [
+            user_id for user_id, queue in self._queues.items()
+            if queue and self._running.get(user_id, 0) < self.max_per_user
+        ]
+        if not eligible:
+            return None
+        return min(eligible, key=lambda user_id: (self._virtual_time[user_id], self._queues[user_id][0][0]))
+
+    def get(self, timeout=None):
+        """
+        Waits for the next task to run and marks it as running.
+
+        Returns:
+        --------
+        tuple: (user_id, task), or None if no task became eligible before the timeout.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._pick_user() is not None, timeout=timeout):
+                return None
+            user_id = self._pick_user()
+            _, enqueued_at, task = self._queues[user_id].popleft()
+            self._running[user_id] = self._running.get(user_id, 0) + 1
+            # every task costs a unit, so many small tasks of a user also advance their time.
+            self._virtual_time[user_id] += 1 / self._weights[user_id]
+
+            QUEUE_WAIT.observe(self._clock() - enqueued_at)
+            if self._queues[user_id]:
+                QUEUE_DEPTH.labels(user_id=str(user_id)).set(len(self._queues[user_id]))
+            else:
+                del self._queues[user_id]
+                # keep the number of exported series bounded by the users with queued tasks.
+                QUEUE_DEPTH.remove(str(user_id))
+            return user_id, task
+
+    def record_service(self, user_id, units):
+        """Advances the virtual time of a user by the service their running tasks received."""
+        with self._condition:
+            if user_id in self._virtual_time:
+                self._virtual_time[user_id] += units / self._weights.get(user_id, 1.0)
+
+    def done(self, user_id):
+        """Marks a task of a user as finished, letting the next one run."""
+        with self._condition:
+            self._running[user_id] -= 1
+            if not self._running[user_id]:
+                del self._running[user_id]
+                if not self._is_active(user_id):
+                    # the attained service is forgotten once the user has nothing left to run.
+                    self._virtual_time.pop(user_id, None)
+                    self._weights.pop(user_id, None)
+            self._condition.notify_all()
+
+    def queue_depth(self, user_id):
+        """Returns the number of queued tasks of a user."""
+        with self._condition:
+            return len(self._queues.get(user_id, ()))
@@ -0,0 +1,129 @@
+import threading
+import time
+import logging
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token-bucket rate limiter whose refill rate adapts to the provider's responses.
+
+    Every provider call consumes one token. Tokens are refilled continuously at the
+    current rate, up to `burst` tokens, so callers only wait when the budget actually
+    runs out. Successful calls raise the rate additively (up to `max_rate`), while a
+    throttled call (HTTP 429 / 403 `rateLimitExceeded`) halves it (down to `min_rate`),
+    empties the bucket and honors the provider's `Retry-After` when present.
+
+    The limiter is thread-safe, so a single instance can be shared by every migration
+    running in the worker process.
+
+    Parameters:
+    -----------
+    name (str): Name of the provider, used in log messages.
+    rate (float): Initial refill rate in requests per second.
+    burst (int): Maximum number of tokens the bucket can hold.
+    min_rate (float): Lower bound for the refill rate.
+    max_rate (float): Upper bound for the refill rate.
+    increase_step (float): Rate added after each successful call.
+    decrease_factor (float): Factor applied to the rate after a throttled call.
+    """
+
+    def __init__(self, name, rate, burst=None, min_rate=None, max_rate=None,
+                 increase_step=0.1, decrease_factor=0.5, clock=time.monotonic, sleep=time.sleep):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.min_rate = min_rate if min_rate is not None else self.rate / 10
+        self.max_rate = max_rate if max_rate is not None else self.rate * 2
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._last_refill = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        """Adds the tokens accumulated since the last refill. Must be called with the lock held."""
+        elapsed = max(0.0, now - self._last_refill)
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """
+        Takes one token from the bucket, waiting only if the bucket is empty
+        or the provider asked us to back off.
+
+        Returns:
+        --------
+        float: Seconds spent waiting for the token.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+    def record_success(self):
+        """Speeds the limiter up after a call that was not throttled."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def record_throttle(self, retry_after=None):
+        """
+        Slows the limiter down after the provider throttled a call.
+
+        Parameters:
+        -----------
+        retry_after (float): Seconds the provider asked us to wait, if any.
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = 0.0
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + float(retry_after))
+        logger.warning(f"{self.name} throttled the request, rate lowered to {self.rate:.2f} req/s.")
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider):
+    """
+    Returns the process-wide rate limiter for a provider, creating it from the
+    configuration on first use.
+
+    Parameters:
+    -----------
+    provider (str): Provider name, either "spotify" or "youtube".
+
+    Returns:
+    --------
+    AdaptiveRateLimiter: The shared limiter for the provider.
+    """
+    with _rate_limiters_lock:
+        if provider not in _rate_limiters:
+            prefix = provider.upper()
+            _rate_limiters[provider] = AdaptiveRateLimiter(
+                provider,
+                rate=getattr(Config, f"{prefix}_RATE_LIMIT"),
+                burst=getattr(Config, f"{prefix}_RATE_LIMIT_BURST"),
+                min_rate=getattr(Config, f"{prefix}_RATE_LIMIT_MIN"),
+                max_rate=getattr(Config, f"{prefix}_RATE_LIMIT_MAX"),
+            )
+        return _rate_limiters[provider]
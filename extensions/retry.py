@@ -0,0 +1,108 @@
+from errors.playlist_exceptions import RateLimitExceededError, ProviderUnavailableError
+from errors.youtube_exceptions import YouTubeRateLimitError, YouTubeBackendError
+from prometheus_client import Counter
+from config import Config
+import random
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_RETRIES = Counter(
+    "provider_retries_total", "Provider calls retried after a transient error.", ["provider", "reason"]
+)
+PROVIDER_RETRY_SLEEP = Counter(
+    "provider_retry_sleep_seconds_total", "Seconds spent waiting before retrying provider calls.", ["provider"]
+)
+
+
+def classify_provider_error(error):
+    """
+    Tells whether a provider error is transient.
+
+    Returns:
+    --------
+    str: "rate_limited" when the provider throttled the request (HTTP 429, YouTube
+        `rateLimitExceeded`), "unavailable" when it failed on its side (HTTP 5xx, YouTube
+        `backendError`), or None when retrying would not help.
+    """
+    if isinstance(error, (RateLimitExceededError, YouTubeRateLimitError)):
+        return "rate_limited"
+    if isinstance(error, (ProviderUnavailableError, YouTubeBackendError)):
+        return "unavailable"
+    return None
+
+
+class RetryPolicy:
+    """
+    Retries provider calls that failed with a transient error, waiting between attempts with
+    exponential backoff and full jitter, so the calls of concurrent migrations do not retry in
+    lockstep. The wait is never shorter than the `Retry-After` sent by the provider.
+
+    A call gives up once `max_attempts` attempts failed, or when waiting for the next attempt
+    would exceed `deadline` seconds since the first one.
+
+    Parameters:
+    -----------
+    max_attempts (int): Number of attempts of a call, including the first one.
+    base_delay (float): Upper bound of the wait before the first retry, doubled on every attempt.
+    max_delay (float): Upper bound of the wait before any retry.
+    deadline (float): Seconds a call can take with all its retries.
+    """
+
+    def __init__(self, max_attempts=None, base_delay=None, max_delay=None, deadline=None,
+                 clock=time.monotonic, sleep=time.sleep, random=random.random):
+        self.max_attempts = max_attempts or Config.PROVIDER_RETRY_ATTEMPTS
+        self.base_delay = base_delay if base_delay is not None else Config.PROVIDER_RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else Config.PROVIDER_RETRY_MAX_DELAY
+        self.deadline = deadline if deadline is not None else Config.PROVIDER_RETRY_DEADLINE
+        self._clock = clock
+        self._sleep = sleep
+        self._random = random
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Returns the seconds to wait before retrying a call.
+
+        Parameters:
+        -----------
+        attempt (int): Number of attempts that already failed (1 for the first retry).
+        retry_after (float): Seconds the provider asked us to wait, if any.
+        """
+        delay = self._random() * min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return max(delay, float(retry_after or 0))
+
+    def call(self, provider, func, *args, classify=classify_provider_error, on_retry=None):
+        """
+        Calls a function, retrying it while it fails with a transient error.
+
+        Parameters:
+        -----------
+        provider (str): Name of the provider, used in the metrics.
+        func (callable): Function to call.
+        args: Arguments passed to the function.
+        classify (callable): Returns the reason an error can be retried for, or None.
+        on_retry (callable): Notified with the error and its reason before every retry.
+
+        Raises:
+        -------
+        The last error, if it is not transient, the attempts are exhausted or the deadline is reached.
+        """
+        started = self._clock()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return func(*args)
+            except Exception as e:
+                reason = classify(e)
+                if reason is None or attempt == self.max_attempts:
+                    raise
+                delay = self.backoff(attempt, getattr(e, "retry_after", None))
+                if self._clock() - started + delay > self.deadline:
+                    logger.warning(f"{provider} call gave up, the retry deadline would be exceeded: {e}")
+                    raise
+                if on_retry:
+                    on_retry(e, reason)
+                logger.warning(f"{provider} call failed ({reason}), retrying in {delay:.2f}s ({attempt}/{self.max_attempts - 1}): {e}")
+                PROVIDER_RETRIES.labels(provider=provider, reason=reason).inc()
+                PROVIDER_RETRY_SLEEP.labels(provider=provider).inc(delay)
+                self._sleep(delay)
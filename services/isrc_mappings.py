@@ -0,0 +1,118 @@
+from database.redis_connection import get_redis_connection
+from config import Config
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+
+def normalize_isrc(isrc):
+    """Returns the ISRC in its canonical form (uppercase, without hyphens), or None."""
+    if not isrc:
+        return None
+    return isrc.replace("-", "").strip().upper() or None
+
+
+class IsrcMappingStore:
+    """
+    Identifier mappings used to resolve tracks without a free-text search.
+
+    ISRCs identify a recording on every platform, so once a recording has been matched its
+    target track is reused by every later migration, for any user. The store also remembers
+    the ISRC of the YouTube videos matched so far, since YouTube does not expose it.
+
+    Every mapping is a Redis key with a TTL, holding only the target ID and the confidence of
+    the match, so the store stays bounded by the recordings migrated recently.
+
+    Methods:
+    --------
+    get_matches(direction: str, isrcs: list) -> dict:
+        Retrieves the known target tracks of several ISRCs in a single request.
+
+    set_match(direction: str, isrc: str, target_id: str, confidence: float):
+        Stores the target track of an ISRC.
+
+    get_video_isrcs(video_ids: list) -> dict:
+        Retrieves the known ISRCs of several YouTube videos in a single request.
+
+    add_video_isrcs(video_isrcs: dict):
+        Stores the ISRCs of YouTube videos.
+    """
+
+    def __init__(self, ttl=None):
+        """
+        Parameters:
+        -----------
+        ttl (int): Seconds a mapping is kept after it was last learned.
+        """
+        self.ttl = ttl or Config.ISRC_MAPPING_TTL
+
+    def _match_key(self, direction, isrc):
+        return f"isrc_match:{direction}:{isrc}"
+
+    def _video_key(self, video_id):
+        return f"video_isrc:{video_id}"
+
+    def get_matches(self, direction, isrcs):
+        """
+        Retrieves the known target tracks of several ISRCs.
+
+        Parameters:
+        -----------
+        direction (str): Either "spotify-to-youtube" or "youtube-to-spotify".
+        isrcs (list): The ISRCs to look up.
+
+        Returns:
+        --------
+        dict: The target ID ("id") and confidence ("confidence") keyed by ISRC, for the ISRCs already matched.
+        """
+        isrcs = sorted({isrc for isrc in isrcs if isrc})
+        if not isrcs:
+            return {}
+        try:
+            values = redis.mget(*(self._match_key(direction, isrc) for isrc in isrcs))
+        except Exception as e:
+            # the mappings must never fail a migration, the tracks are searched instead.
+            logger.warning(f"ISRC mappings unavailable: {e}")
+            return {}
+        return {isrc: json.loads(value) for isrc, value in zip(isrcs, values) if value}
+
+    def set_match(self, direction, isrc, target_id, confidence=None):
+        """Stores the target track ID matched for an ISRC, with the confidence of the match."""
+        try:
+            redis.setex(self._match_key(direction, isrc), self.ttl, json.dumps({"id": target_id, "confidence": confidence}))
+        except Exception as e:
+            logger.warning(f"ISRC mappings unavailable: {e}")
+
+    def get_video_isrcs(self, video_ids):
+        """
+        Retrieves the known ISRCs of several YouTube videos.
+
+        Returns:
+        --------
+        dict: The ISRCs keyed by video ID, for the videos matched so far.
+        """
+        video_ids = sorted({video_id for video_id in video_ids if video_id})
+        if not video_ids:
+            return {}
+        try:
+            values = redis.mget(*(self._video_key(video_id) for video_id in video_ids))
+        except Exception as e:
+            logger.warning(f"ISRC mappings unavailable: {e}")
+            return {}
+        return {video_id: isrc for video_id, isrc in zip(video_ids, values) if isrc}
+
+    def add_video_isrcs(self, video_isrcs):
+        """Stores the ISRCs of YouTube videos, keyed by video ID."""
+        if not video_isrcs:
+            return
+        try:
+            # a single round trip for the whole batch.
+            pipeline = redis.pipeline()
+            for video_id, isrc in video_isrcs.items():
+                pipeline.setex(self._video_key(video_id), self.ttl, isrc)
+            pipeline.exec()
+        except Exception as e:
+            logger.warning(f"ISRC mappings unavailable: {e}")
@@ -0,0 +1,122 @@
+from database.redis_connection import get_redis_connection
+from cachetools import LRUCache
+from prometheus_client import Counter
+from config import Config
+import hashlib
+import json
+import re
+import threading
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+MATCH_CACHE_HITS = Counter(
+    "track_match_cache_hits_total", "Track searches answered by the match cache.", ["tier", "direction"]
+)
+MATCH_CACHE_MISSES = Counter(
+    "track_match_cache_misses_total", "Track searches that had to call the provider.", ["direction"]
+)
+
+
+def normalize_text(text):
+    """
+    Normalizes a title or artist name so that spelling variants share a fingerprint:
+    lowercase, without accents, punctuation or repeated whitespace.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def track_fingerprint(title, artist=""):
+    """
+    Builds the fingerprint of a track from its title and artist.
+
+    Returns:
+    --------
+    str: The fingerprint, or None if the title is empty after normalization.
+    """
+    title = normalize_text(title)
+    if not title:
+        return None
+    return f"{title}|{normalize_text(artist)}"
+
+
+class TrackMatchCache:
+    """
+    Two-tier cache of cross-platform track matches, shared by every user.
+
+    The first tier is a bounded in-process LRU, the second one is Redis with a TTL, so a song
+    searched by any worker is not searched again until the entry expires. Entries are keyed by
+    direction and track fingerprint, and only successful matches are cached.
+
+    Methods:
+    --------
+    get(direction: str, fingerprint: str) -> dict:
+        Retrieves the cached match of a track.
+
+    set(direction: str, fingerprint: str, result: dict):
+        Caches the match of a track in both tiers.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        """
+        Parameters:
+        -----------
+        maxsize (int): Number of matches kept in the in-process LRU.
+        ttl (int): Seconds a match is kept in Redis.
+        """
+        self.ttl = ttl or Config.MATCH_CACHE_TTL
+        self._local = LRUCache(maxsize=maxsize or Config.MATCH_CACHE_SIZE)
+        # cachetools caches are not thread-safe and matches are searched concurrently.
+        self._lock = threading.Lock()
+
+    def _key(self, direction, fingerprint):
+        digest = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+        return f"track_match:{direction}:{digest}"
+
+    def get(self, direction, fingerprint):
+        """
+        Retrieves the cached match of a track, promoting Redis hits to the in-process LRU.
+
+        Returns:
+        --------
+        dict: The cached search result, or None on a miss.
+        """
+        key = self._key(direction, fingerprint)
+        with self._lock:
+            result = self._local.get(key)
+        if result is not None:
+            MATCH_CACHE_HITS.labels(tier="local", direction=direction).inc()
+            return result
+
+        try:
+            data = redis.get(key)
+        except Exception as e:
+            # the cache must never fail a migration.
+            logger.warning(f"Track match cache unavailable: {e}")
+            data = None
+
+        if data is None:
+            MATCH_CACHE_MISSES.labels(direction=direction).inc()
+            return None
+
+        result = json.loads(data)
+        with self._lock:
+            self._local[key] = result
+        MATCH_CACHE_HITS.labels(tier="redis", direction=direction).inc()
+        return result
+
+    def set(self, direction, fingerprint, result):
+        """Caches the match of a track in the in-process LRU and in Redis."""
+        key = self._key(direction, fingerprint)
+        with self._lock:
+            self._local[key] = result
+        try:
+            redis.setex(key, self.ttl, json.dumps(result))
+        except Exception as e:
+            logger.warning(f"Track match cache unavailable: {e}")
@@ -0,0 +1,126 @@
+from database.redis_connection import get_redis_connection
+from config import Config
+import json
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+
+class MigrationCheckpoint:
+    """
+    Progress of a migration, used to resume it without repeating any search or insert.
+
+    Attributes:
+    -----------
+    user_id (int): The unique user identifier.
+    direction (str): Either "spotify-to-youtube" or "youtube-to-spotify".
+    playlist_id (str): The ID of the source playlist.
+    target_playlist (dict): The playlist created on the target platform.
+    last_index (int): Index of the last source track whose processing is complete (-1 if none).
+    matches (dict): Compact matches (target ID, title and confidence) of the tracks searched
+        after `last_index`, keyed by track index (None when the track was not found).
+    migrated (int): Number of tracks added to the target playlist.
+    failed_chunks (list): Reports of the writes that could not be completed.
+    """
+
+    def __init__(self, user_id, direction, playlist_id, target_playlist=None, last_index=-1,
+                 matches=None, migrated=0, failed_chunks=None):
+        self.user_id = user_id
+        self.direction = direction
+        self.playlist_id = playlist_id
+        self.target_playlist = target_playlist
+        self.last_index = last_index
+        self.matches = {int(index): result for index, result in (matches or {}).items()}
+        self.migrated = migrated
+        self.failed_chunks = failed_chunks or []
+        # matches are recorded by the matching threads while the migration thread saves the checkpoint.
+        self._lock = threading.Lock()
+
+    def has_match(self, index):
+        with self._lock:
+            return index in self.matches
+
+    def get_match(self, index):
+        with self._lock:
+            return self.matches.get(index)
+
+    def record_match(self, index, result):
+        """Stores the search result of a track so it is not searched again."""
+        with self._lock:
+            self.matches[index] = result
+
+    def advance(self, index):
+        """Marks every track up to `index` as processed and forgets their search results."""
+        with self._lock:
+            self.last_index = index
+            self.matches = {i: result for i, result in self.matches.items() if i > index}
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "user_id": self.user_id,
+                "direction": self.direction,
+                "playlist_id": self.playlist_id,
+                "target_playlist": self.target_playlist,
+                "last_index": self.last_index,
+                "matches": {str(index): result for index, result in self.matches.items()},
+                "migrated": self.migrated,
+                "failed_chunks": self.failed_chunks,
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class MigrationCheckpointStore:
+    """
+    Stores migration checkpoints in Redis so an interrupted migration can be resumed
+    from any worker, for instance the next day once the YouTube quota has been reset.
+
+    Methods:
+    --------
+    load(user_id: int, direction: str, playlist_id: str) -> MigrationCheckpoint:
+        Retrieves the checkpoint of an unfinished migration.
+
+    save(checkpoint: MigrationCheckpoint):
+        Stores the checkpoint, refreshing its expiration time.
+
+    delete(checkpoint: MigrationCheckpoint):
+        Removes the checkpoint once the migration is complete.
+    """
+
+    def _key(self, user_id, direction, playlist_id):
+        return f"migration_checkpoint:{user_id}:{direction}:{playlist_id}"
+
+    def load(self, user_id, direction, playlist_id):
+        """
+        Retrieves the checkpoint of an unfinished migration.
+
+        Parameters:
+        -----------
+        user_id (int): The unique user identifier.
+        direction (str): Either "spotify-to-youtube" or "youtube-to-spotify".
+        playlist_id (str): The ID of the source playlist.
+
+        Returns:
+        --------
+        MigrationCheckpoint: The checkpoint, or None if there is no unfinished migration.
+        """
+        data = redis.get(self._key(user_id, direction, playlist_id))
+        return MigrationCheckpoint.from_dict(json.loads(data)) if data else None
+
+    def save(self, checkpoint):
+        """Stores the checkpoint in Redis, refreshing its expiration time."""
+        redis.setex(
+            self._key(checkpoint.user_id, checkpoint.direction, checkpoint.playlist_id),
+            Config.MIGRATION_CHECKPOINT_TTL,
+            json.dumps(checkpoint.to_dict())
+        )
+
+    def delete(self, checkpoint):
+        """Removes the checkpoint from Redis."""
+        redis.delete(self._key(checkpoint.user_id, checkpoint.direction, checkpoint.playlist_id))
@@ -0,0 +1,347 @@
+from concurrent.futures import ThreadPoolExecutor
+from database.redis_connection import get_redis_connection
+from extensions.event_bus import get_event_bus
+from extensions.fair_scheduler import FairScheduler
+from errors.playlist_exceptions import InvalidPlatformError, CircuitOpenError, IdempotencyKeyConflictError
+from errors.youtube_exceptions import YouTubeQuotaExceededError
+from services.migration_results import serialize_result
+from services.youtube_quota import seconds_until_quota_reset
+from config import Config
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+# supported migration directions and the PlaylistMigration method that runs each one.
+MIGRATION_DIRECTIONS = {
+    "spotify-to-youtube": "migrate_spotify_to_youtube",
+    "youtube-to-spotify": "migrate_youtube_to_spotify",
+}
+
+# incremental syncs of playlists that were already migrated.
+SYNC_DIRECTIONS = {
+    "spotify-to-youtube": "sync_spotify_to_youtube",
+    "youtube-to-spotify": "sync_youtube_to_spotify",
+}
+
+# migrations of several playlists (or the whole library) with a single matching plan.
+LIBRARY_DIRECTIONS = {
+    "spotify-to-youtube": "migrate_spotify_library_to_youtube",
+    "youtube-to-spotify": "migrate_youtube_library_to_spotify",
+}
+
+# previews that resolve the matches of a playlist without writing anything.
+PREVIEW_DIRECTIONS = {
+    "spotify-to-youtube": "preview_spotify_to_youtube",
+    "youtube-to-spotify": "preview_youtube_to_spotify",
+}
+
+JOB_OPERATIONS = {
+    "migrate": MIGRATION_DIRECTIONS,
+    "sync": SYNC_DIRECTIONS,
+    "library": LIBRARY_DIRECTIONS,
+    "preview": PREVIEW_DIRECTIONS,
+}
+
+def derive_idempotency_key(operation, direction, playlist_id, options=None):
+    """
+    Derives the idempotency key of a migration request that did not send one, from its
+    operation, direction, source playlist and options. Within MIGRATION_IDEMPOTENCY_TTL,
+    the same request of the same user returns the job it started instead of a new one.
+    """
+    request = json.dumps([operation, direction, playlist_id, options or {}], sort_keys=True)
+    return "derived:" + hashlib.sha256(request.encode()).hexdigest()
+
+
+# minimum number of seconds between two progress writes to Redis for the same job.
+PROGRESS_FLUSH_INTERVAL = 1.0
+
+# statuses of the jobs that can be queued again.
+RESUMABLE_STATUSES = ("failed", "deferred")
+
+
+class MigrationJobManager:
+    """
+    Runs playlist migrations in a background worker pool and tracks their state in Redis.
+
+    Jobs are stored in Redis so that any worker process can report their status, while the
+    migration itself runs in a thread of the process that accepted the request.
+
+    Methods:
+    --------
+    submit(user_id: int, direction: str, playlist_id: str, operation: str, options: dict, idempotency_key: str) -> dict:
+        Enqueues a migration (or sync) and returns the new job, or the job already started with the same idempotency key.
+
+    get_job(job_id: str) -> dict:
+        Retrieves the current state of a job.
+
+    resume(job: dict, statuses: tuple) -> dict:
+        Re-runs a failed or deferred job from the checkpoint of its migration, unless it was already resumed.
+
+    Jobs that do not fit the YouTube quota left today, or run out of it, are "deferred" and
+    resumed automatically once the quota is reset.
+
+    Queued jobs are dispatched to the workers by a fair scheduler: the next job comes from the
+    user whose running jobs have processed the fewest tracks, and each user can only run
+    MIGRATION_USER_CONCURRENCY jobs at the same time, so a large library does not hold every
+    worker while other users wait with small playlists.
+
+    While a job runs, its per-track events, its progress (with the current throughput) and its
+    final status are published on the event bus channel named after the job ID.
+    """
+
+    def __init__(self, playlist_migration, max_workers=None, event_bus=None, max_jobs_per_user=None):
+        """
+        Initializes the worker pool that runs the migrations.
+
+        Parameters:
+        -----------
+        playlist_migration (PlaylistMigration): Service used to run the migrations.
+        max_workers (int): Number of migrations that can run at the same time in this process.
+        event_bus (EventBus): Channel used to publish the events of the running jobs.
+        max_jobs_per_user (int): Number of migrations of the same user that can run at the same time.
+        """
+        self.playlist_migration = playlist_migration
+        self.event_bus = event_bus or get_event_bus()
+        self.scheduler = FairScheduler(max_jobs_per_user or Config.MIGRATION_USER_CONCURRENCY)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.MIGRATION_WORKERS,
+            thread_name_prefix="migration-worker"
+        )
+
+    def _job_key(self, job_id):
+        return f"migration_job:{job_id}"
+
+    def _save_job(self, job):
+        """Stores the job in Redis, refreshing its expiration time."""
+        job["updated_at"] = datetime.now(timezone.utc).isoformat()
+        redis.setex(self._job_key(job["id"]), Config.MIGRATION_JOB_TTL, json.dumps(job, default=serialize_result))
+
+    def _idempotency_key(self, user_id, idempotency_key):
+        return f"migration_idempotency:{user_id}:{idempotency_key}"
+
+    def submit(self, user_id, direction, playlist_id, operation="migrate", options=None, idempotency_key=None):
+        """
+        Enqueues a playlist migration to run in the background.
+
+        Parameters:
+        -----------
+        user_id (int): The unique user identifier.
+        direction (str): Either "spotify-to-youtube" or "youtube-to-spotify".
+        playlist_id (str): The ID of the source playlist (for "library" jobs, a list of IDs or "all").
+        operation (str): "migrate" to create a new target playlist, "sync" to only add the missing tracks,
+            "library" to migrate several playlists at once, or "preview" to only resolve the matches.
+        options (dict): Extra keyword arguments of the operation (e.g. target_playlist_id for a sync).
+        idempotency_key (str): Key of the request. A request retried with the same key within
+            MIGRATION_IDEMPOTENCY_TTL seconds gets the job of the first one, queued, running or finished.
+
+        Returns:
+        --------
+        dict: The queued job, including its ID, or the job of the first request with the same
+            idempotency key, marked as "replayed".
+
+        Raises:
+        -------
+        InvalidPlatformError: If the direction is not supported.
+        IdempotencyKeyConflictError: If the idempotency key was used for a different request.
+        """
+        if operation not in JOB_OPERATIONS:
+            raise ValueError(f"Unsupported job operation '{operation}'.")
+        if direction not in JOB_OPERATIONS[operation]:
+            raise InvalidPlatformError(f"Unsupported migration direction '{direction}'.")
+
+        now = datetime.now(timezone.utc).isoformat()
+        job = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "operation": operation,
+            "direction": direction,
+            "playlist_id": playlist_id,
+            "options": options or {},
+            "status": "queued",
+            "progress": {"total": None, "processed": 0, "migrated": 0},
+            "result": None,
+            "error": None,
+            "created_at": now,
+        }
+        self._save_job(job)
+        if idempotency_key:
+            existing = self._claim_idempotency_key(job, idempotency_key)
+            if existing:
+                return existing
+        # the worker gets its own copy, so the returned job keeps its queued state.
+        self._enqueue(dict(job))
+        logger.info(f"Migration job {job['id']} queued ({operation} {direction}, playlist {playlist_id}).")
+        return job
+
+    def _claim_idempotency_key(self, job, idempotency_key):
+        """
+        Registers the job under its idempotency key. The job is stored before the key is claimed,
+        so a concurrent request that loses the claim always finds the job of the winner.
+
+        Returns:
+        --------
+        dict: The job of the first request with this key, or None if the key was claimed by `job`.
+        """
+        key = self._idempotency_key(job["user_id"], idempotency_key)
+        if redis.set(key, job["id"], nx=True, ex=Config.MIGRATION_IDEMPOTENCY_TTL):
+            return None
+
+        existing_id = redis.get(key)
+        existing = self.get_job(existing_id) if existing_id else None
+        if not existing:
+            # the first job expired before its key, this request starts a new one.
+            redis.setex(key, Config.MIGRATION_IDEMPOTENCY_TTL, job["id"])
+            return None
+
+        redis.delete(self._job_key(job["id"]))
+        request = ("operation", "direction", "playlist_id", "options")
+        if any(existing[field] != job[field] for field in request):
+            raise IdempotencyKeyConflictError()
+        logger.info(f"Migration request replayed, returning job {existing['id']}.")
+        existing["replayed"] = True
+        return existing
+
+    def get_job(self, job_id):
+        """
+        Retrieves a job from Redis.
+
+        Parameters:
+        -----------
+        job_id (str): The ID of the job.
+
+        Returns:
+        --------
+        dict: The job, or None if it does not exist or has expired.
+        """
+        job = redis.get(self._job_key(job_id))
+        return json.loads(job) if job else None
+
+    def resume(self, job, statuses=RESUMABLE_STATUSES):
+        """
+        Re-runs a failed or deferred job. The migration continues from its checkpoint, reusing the
+        target playlist and skipping the tracks already searched or inserted.
+
+        The job is read again from Redis and each attempt can only be resumed once, so the timer
+        of a deferred job and a resume request of the user never run the migration twice.
+
+        Parameters:
+        -----------
+        job (dict): The job to resume.
+        statuses (tuple): Statuses the job must still have to be resumed.
+
+        Returns:
+        --------
+        dict: The job, queued again, or None if it is no longer in one of `statuses` or
+            another request already resumed it.
+        """
+        job = self.get_job(job["id"])
+        if not job or job["status"] not in statuses:
+            return None
+        attempt = job.get("attempts", 1)
+        if not redis.set(self._resume_key(job["id"], attempt), "1", nx=True, ex=Config.MIGRATION_JOB_TTL):
+            logger.info(f"Migration job {job['id']} attempt {attempt} was already resumed.")
+            return None
+
+        job["status"] = "queued"
+        job["error"] = None
+        job["attempts"] = attempt + 1
+        self._save_job(job)
+        self._enqueue(dict(job))
+        logger.info(f"Migration job {job['id']} queued for resume (attempt {job['attempts']}).")
+        return job
+
+    def _resume_key(self, job_id, attempt):
+        return f"migration_job_resume:{job_id}:{attempt}"
+
+    def _enqueue(self, job):
+        """
+        Queues a job in the fair scheduler. Every queued job adds one task to the worker pool,
+        and the task runs whichever job the scheduler picks when a worker is free.
+        """
+        self.scheduler.put(job["user_id"], job)
+        self.executor.submit(self._run_next)
+
+    def _run_next(self):
+        """Runs the next job chosen by the fair scheduler."""
+        user_id, job = self.scheduler.get()
+        try:
+            self._run_job(job)
+        finally:
+            self.scheduler.done(user_id)
+
+    def _run_job(self, job):
+        """
+        Runs a queued migration in a worker thread, recording its progress and final result.
+
+        Parameters:
+        -----------
+        job (dict): The job to run.
+        """
+        job["status"] = "running"
+        self._save_job(job)
+        self.event_bus.publish(job["id"], {"type": "running"})
+
+        started = time.monotonic()
+        last_flush = 0.0
+
+        def on_event(event):
+            self.event_bus.publish(job["id"], event)
+
+        def on_progress(progress):
+            nonlocal last_flush
+            # tracks processed since the last update are the service received by the user.
+            self.scheduler.record_service(job["user_id"], max(0, progress["processed"] - job["progress"]["processed"]))
+            job["progress"] = progress
+            now = time.monotonic()
+            # tracks processed per second since the job started.
+            elapsed = now - started
+            throughput = round(progress["processed"] / elapsed, 2) if elapsed > 0 else None
+            self.event_bus.publish(job["id"], {"type": "progress", **progress, "throughput": throughput})
+            # limit the number of Redis writes on large playlists.
+            if now - last_flush >= PROGRESS_FLUSH_INTERVAL:
+                last_flush = now
+                self._save_job(job)
+
+        try:
+            # jobs stored before syncs existed have no operation.
+            methods = JOB_OPERATIONS[job.get("operation", "migrate")]
+            run = getattr(self.playlist_migration, methods[job["direction"]])
+            job["result"] = run(job["user_id"], job["playlist_id"], on_progress=on_progress, on_event=on_event, **job.get("options", {}))
+            job["status"] = "completed"
+            logger.info(f"Migration job {job['id']} completed.")
+        except (YouTubeQuotaExceededError, CircuitOpenError) as e:
+            # the job waits for the quota reset, or for the provider to recover from an outage.
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after is None and isinstance(e, YouTubeQuotaExceededError):
+                # the quota ran out during the job, e.g. spent by other clients of the project.
+                retry_after = seconds_until_quota_reset()
+            job["status"] = "deferred"
+            job["error"] = {"type": e.__class__.__name__, "message": str(e)}
+            job["retry_at"] = (datetime.now(timezone.utc) + timedelta(seconds=retry_after or 0)).isoformat()
+            self._schedule_resume(job, retry_after or 0)
+            logger.info(f"Migration job {job['id']} deferred until {job['retry_at']}.")
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = {"type": e.__class__.__name__, "message": str(e)}
+            logger.error(f"Migration job {job['id']} failed: {e}")
+        self._save_job(job)
+        # the final event closes the progress streams of the job.
+        self.event_bus.publish(job["id"], {"type": job["status"], "result": job["result"], "error": job["error"]})
+
+    def _schedule_resume(self, job, delay):
+        """
+        Resumes a deferred job after `delay` seconds, if it is still deferred by then. The timer
+        lives in this process, so a deferred job can also be resumed through the resume endpoint
+        after a restart.
+        """
+        timer = threading.Timer(delay, self.resume, args=({"id": job["id"]},), kwargs={"statuses": ("deferred",)})
+        timer.daemon = True
+        timer.start()
@@ -0,0 +1,69 @@
+from database.redis_connection import get_redis_connection
+from config import Config
+import json
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+
+class MigrationPlanStore:
+    """
+    Stores the match plans computed by migration previews, so that committing a preview
+    writes the target playlist without searching the tracks again.
+
+    A plan holds the target track matched for every source track of the playlist (None when
+    no match was found), keyed by source track ID. Matches only keep the target ID, title and
+    confidence, not the provider payloads. Plans expire after MIGRATION_PLAN_TTL seconds.
+
+    Methods:
+    --------
+    create(user_id: int, direction: str, playlist_id: str, matches: dict) -> str:
+        Stores a new plan and returns its ID.
+
+    get(plan_id: str) -> dict:
+        Retrieves a plan.
+
+    delete(plan_id: str):
+        Removes a plan once it has been committed.
+    """
+
+    def _key(self, plan_id):
+        return f"migration_plan:{plan_id}"
+
+    def create(self, user_id, direction, playlist_id, matches):
+        """
+        Stores the match plan of a playlist.
+
+        Parameters:
+        -----------
+        user_id (int): The unique user identifier.
+        direction (str): Either "spotify-to-youtube" or "youtube-to-spotify".
+        playlist_id (str): The ID of the source playlist.
+        matches (dict): Compact target matches (or None) keyed by source track ID.
+
+        Returns:
+        --------
+        str: The ID of the plan.
+        """
+        plan_id = uuid.uuid4().hex
+        plan = {"id": plan_id, "user_id": user_id, "direction": direction, "playlist_id": playlist_id, "matches": matches}
+        redis.setex(self._key(plan_id), Config.MIGRATION_PLAN_TTL, json.dumps(plan))
+        return plan_id
+
+    def get(self, plan_id):
+        """
+        Retrieves a plan.
+
+        Returns:
+        --------
+        dict: The plan, or None if it does not exist or has expired.
+        """
+        data = redis.get(self._key(plan_id))
+        return json.loads(data) if data else None
+
+    def delete(self, plan_id):
+        """Removes a plan from Redis."""
+        redis.delete(self._key(plan_id))
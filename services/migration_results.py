@@ -0,0 +1,60 @@
+class TrackResult:
+    """
+    Compact outcome of a migrated track.
+
+    Migrations return one record per track instead of the provider payloads (thumbnails,
+    markets, album art...), which keeps large results small in worker memory and in Redis.
+
+    Attributes:
+    -----------
+    source_id (str): The ID of the source track (None for Spotify local files).
+    target_id (str): The ID of the matched track on the target platform, or None.
+    title (str): The title of the source track.
+    artist (str): The artist of the source track, if known.
+    confidence (float): The confidence of the match, if it was scored.
+    status (str): "migrated", "matched" (previews) or "not_found".
+    payload (dict): The full search result, only kept when requested.
+    """
+
+    __slots__ = ("source_id", "target_id", "title", "artist", "confidence", "status", "payload")
+
+    def __init__(self, source_id, target_id, title, artist=None, confidence=None, status="migrated", payload=None):
+        self.source_id = source_id
+        self.target_id = target_id
+        self.title = title
+        self.artist = artist
+        self.confidence = confidence
+        self.status = status
+        self.payload = payload
+
+    def to_dict(self):
+        data = {
+            "source_id": self.source_id,
+            "target_id": self.target_id,
+            "title": self.title,
+            "artist": self.artist,
+            "confidence": self.confidence,
+            "status": self.status,
+        }
+        if self.payload is not None:
+            data["payload"] = self.payload
+        return data
+
+    def __eq__(self, other):
+        return isinstance(other, TrackResult) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"TrackResult({self.source_id!r} -> {self.target_id!r}, {self.status})"
+
+
+def serialize_result(obj):
+    """
+    `default` hook of json.dumps for the migration results.
+
+    Raises:
+    -------
+    TypeError: If the object is not a migration result record.
+    """
+    if isinstance(obj, TrackResult):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
@@ -1,49 +1,646 @@
-from services.spotify_service import SpotifyService
-from services.youtube_service import YouTubeService
+from services.spotify_service import SpotifyService, SPOTIFY_MAX_ITEMS_PER_REQUEST, MIGRATION_TRACK_FIELDS, MIGRATION_PLAYLIST_FIELDS, TRACK_ID_FIELDS
+from services.youtube_service import YouTubeService, MIGRATION_ITEM_FIELDS, VIDEO_ID_FIELDS
+from services.migration_checkpoints import MigrationCheckpoint, MigrationCheckpointStore
+from services.track_mappings import TrackMappingStore, NOT_FOUND
+from services.match_cache import TrackMatchCache, track_fingerprint
+from services.title_normalizer import parse_playlist_item
+from services.isrc_mappings import IsrcMappingStore, normalize_isrc
+from services.migration_plans import MigrationPlanStore
+from services.migration_results import TrackResult
+from services.youtube_quota import YouTubeQuotaLedger, estimate_migration_cost, TRACK_SEARCH_COST, TRACK_MIGRATION_COST
 from errors.playlist_exceptions import PlaylistNotFoundError,TrackNotFoundError,AuthenticationError,APIRequestError,InvalidPlatformError
+from errors.youtube_exceptions import YouTubeQuotaDeferredError
+from extensions.rate_limiter import get_rate_limiter
+from extensions.retry import RetryPolicy, classify_provider_error
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextlib import closing
+from contextvars import ContextVar
+from collections import deque
+from functools import wraps
+from config import Config
+import threading
 import logging
-import time  
 
 logger = logging.getLogger(__name__)
 
 spotify_service = SpotifyService()
 youtube_service = YouTubeService()
 
+# YouTube quota reserved by the running operation, released when it returns.
+_quota_reservations = ContextVar("quota_reservations", default=None)
+
+
+def releases_youtube_quota(method):
+    """
+    Releases the YouTube quota an operation reserved through `_admit_youtube_quota` and did not
+    spend, once the operation returns or fails.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        reservations = []
+        token = _quota_reservations.set(reservations)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _quota_reservations.reset(token)
+            for reservation in reservations:
+                self.quota_ledger.release(reservation)
+    return wrapper
+
+
+def get_spotify_track_id(item):
+    """Returns the Spotify ID of a playlist item (None for local files)."""
+    return (item.get("track") or {}).get("id")
+
+
+def get_youtube_video_id(item):
+    """Returns the YouTube video ID of a playlist item."""
+    return item.get("snippet", {}).get("resourceId", {}).get("videoId")
+
+
+def get_spotify_track_isrc(item):
+    """Returns the ISRC of a Spotify playlist item or track, if Spotify knows it."""
+    track = item.get("track", item) or {}
+    return normalize_isrc((track.get("external_ids") or {}).get("isrc"))
+
+
+def spotify_track_fingerprint(item):
+    """Returns the match cache fingerprint of a Spotify playlist item searched on YouTube."""
+    track = item.get("track") or {}
+    artists = track.get("artists") or [{}]
+    return track_fingerprint(track.get("name"), artists[0].get("name"))
+
+
+def parsed_title_fingerprint(parsed):
+    """Returns the match cache fingerprint of a YouTube title parsed to be searched on Spotify."""
+    return track_fingerprint(parsed.title, parsed.artist)
+
+
+def track_result(direction, source_track, result, status="migrated", include_payload=False):
+    """
+    Builds the compact result record of a source track.
+
+    Parameters:
+    - direction: Either "spotify-to-youtube" or "youtube-to-spotify"
+    - source_track: Playlist item of the source platform
+    - result: Search result matched on the target platform, or None
+    - status: Status of the track ("migrated", "matched" or "not_found")
+    - include_payload: Whether the full search result is kept in the record
+    """
+    if direction == "spotify-to-youtube":
+        track = source_track.get("track") or {}
+        source_id, title = track.get("id"), track.get("name")
+        artist = (track.get("artists") or [{}])[0].get("name")
+        target_id = result["id"]["videoId"] if result else None
+    else:
+        source_id = get_youtube_video_id(source_track)
+        parsed = parse_playlist_item(source_track)
+        title, artist = parsed if parsed else (source_track.get("snippet", {}).get("title"), None)
+        target_id = result["id"] if result else None
+    confidence = result.get("match_confidence") if result else None
+    return TrackResult(source_id, target_id, title, artist, confidence, status, result if include_payload else None)
+
+
+def compact_match(direction, result):
+    """
+    Reduces a search result to the target ID, title and confidence of the match, keeping the
+    shape of the provider result. Plans and checkpoints store these instead of the payloads.
+
+    Parameters:
+    - direction: Either "spotify-to-youtube" or "youtube-to-spotify"
+    - result: Search result matched on the target platform, or None
+    """
+    if not result:
+        return None
+    if direction == "spotify-to-youtube":
+        return {"id": {"videoId": result["id"]["videoId"]}, "snippet": {"title": (result.get("snippet") or {}).get("title")},
+                "match_confidence": result.get("match_confidence")}
+    return {"id": result["id"], "name": result.get("name"), "match_confidence": result.get("match_confidence")}
+
+
+def isrc_match(direction, target_id, confidence=None):
+    """
+    Builds the search result of a track resolved by its ISRC, in the shape of the provider result.
+
+    Parameters:
+    - direction: Either "spotify-to-youtube" or "youtube-to-spotify"
+    - target_id: ID of the track or video mapped to the ISRC
+    - confidence: Confidence of the match the mapping was learned from
+    """
+    if direction == "spotify-to-youtube":
+        return {"id": {"videoId": target_id}, "match_confidence": confidence}
+    return {"id": target_id, "match_confidence": confidence}
+
+
+# fingerprint of the search query of each migration direction, used by the match cache.
+QUERY_FINGERPRINTS = {
+    "spotify-to-youtube": spotify_track_fingerprint,
+    "youtube-to-spotify": parsed_title_fingerprint,
+}
+
+
+class PlaylistWriteBuffer:
+    """
+    Collects matched tracks and writes them to the target playlist in ordered chunks.
+
+    Parameters:
+    - write_chunk: Callable that adds a list of track IDs to the playlist and returns one report per chunk
+    - chunk_size: Number of tracks written per call
+    """
+    def __init__(self, write_chunk, chunk_size):
+        self.write_chunk = write_chunk
+        self.chunk_size = chunk_size
+        self.pending = []
+        self.written = [] # results of the tracks added to the playlist.
+        self.failed_chunks = [] # reports of the chunks that could not be added.
+
+    def add(self, track_id, result):
+        """Buffers a track, writing the buffer once it holds a full chunk."""
+        self.pending.append((track_id, result))
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered tracks to the playlist."""
+        if not self.pending:
+            return
+        chunk, self.pending = self.pending, []
+
+        for report in self.write_chunk([track_id for track_id, _ in chunk]):
+            chunk_results = chunk[report["offset"]:report["offset"] + len(report["track_ids"])]
+            if report["error"]:
+                self.failed_chunks.append(report)
+            else:
+                self.written.extend(result for _, result in chunk_results)
+
+
 class PlaylistMigration:
-    def __init__(self, spotify_service, youtube_service):
+    def __init__(self, spotify_service, youtube_service, spotify_limiter=None, youtube_limiter=None, match_concurrency=None,
+                 checkpoint_store=None, track_mappings=None, match_cache=None, isrc_mappings=None, plan_store=None, quota_ledger=None,
+                 retry_policy=None):
         self.spotify_service = spotify_service
         self.youtube_service = youtube_service
+        # checkpoints allow interrupted migrations to be resumed.
+        self.checkpoint_store = checkpoint_store or MigrationCheckpointStore()
+        # source -> target track mappings allow playlists to be synced incrementally.
+        self.track_mappings = track_mappings or TrackMappingStore()
+        # matches are shared between users, popular songs are only searched once.
+        self.match_cache = match_cache or TrackMatchCache()
+        # recordings are resolved by ISRC before any free-text search.
+        self.isrc_mappings = isrc_mappings or IsrcMappingStore()
+        # match plans of the previews, committed later without searching again.
+        self.plan_store = plan_store or MigrationPlanStore()
+        # YouTube quota spent today, migrations to YouTube only start if they fit the remaining budget.
+        self.quota_ledger = quota_ledger or YouTubeQuotaLedger()
+        # tracks being resolved by any migration of the process, shared by overlapping migrations.
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        # provider rate limiters are shared by every migration running in the worker process.
+        self.spotify_limiter = spotify_limiter or get_rate_limiter("spotify")
+        self.youtube_limiter = youtube_limiter or get_rate_limiter("youtube")
+        # transient provider errors are retried with jittered exponential backoff.
+        self.retry_policy = retry_policy or RetryPolicy()
+        # number of track searches that can be in flight at the same time for a migration.
+        self.match_concurrency = match_concurrency or Config.MIGRATION_MATCH_CONCURRENCY
+
+    def _emit(self, on_event, event_type, **data):
+        """
+        Sends a migration event (matched, not_found, inserted, throttled...) to the event callback, if any.
+
+        Parameters:
+        - on_event: Callable receiving the event, or None
+        - event_type: Type of the event
+        - data: Fields of the event
+        """
+        if on_event:
+            on_event({"type": event_type, **data})
+
+    def _admit_youtube_quota(self, current_user, units):
+        """
+        Reserves the `units` YouTube quota units an operation is estimated at, if they fit the
+        remaining daily budget of the application and of the user, before anything is searched
+        or created. The operation must be decorated with `releases_youtube_quota`, which releases
+        the unused part of the reservation when it finishes.
+
+        Raises:
+        - YouTubeQuotaDeferredError with the seconds until the quota is reset, if it does not fit
+        """
+        reservation = self.quota_ledger.reserve(current_user, units)
+        if reservation is None:
+            retry_after = self.quota_ledger.seconds_until_reset()
+            logger.warning(f"YouTube operation of user {current_user} deferred: about {units} quota units needed.")
+            raise YouTubeQuotaDeferredError(f"Not enough YouTube API quota left today (about {units} units needed).", retry_after=retry_after)
+        reservations = _quota_reservations.get()
+        if reservations is None:
+            # nothing would release it.
+            self.quota_ledger.release(reservation)
+        else:
+            reservations.append(reservation)
+
+    def _call_provider(self, limiter, func, *args, on_event=None, idempotent=True, **kwargs):
+        """
+        Calls a provider API method under its rate limiter and the retry policy.
+
+        The call only waits when the provider budget is exhausted. If the provider throttles
+        the request, the limiter slows down and the call is retried after the `Retry-After`
+        delay; if the provider fails on its side (HTTP 5xx, backendError), the call is retried
+        with backoff only when it is idempotent, since a failed write may have been applied.
+
+        Parameters:
+        - limiter: AdaptiveRateLimiter of the provider being called
+        - func: Service method to call
+        - args: Arguments passed to the service method
+        - on_event: Optional callable notified when the provider throttles the call
+        - idempotent: Whether the call can be repeated safely after a server error
+        - kwargs: Keyword arguments passed to the service method
+        """
+        def attempt():
+            limiter.acquire()
+            result = func(*args, **kwargs)
+            limiter.record_success()
+            return result
+
+        def classify(error):
+            reason = classify_provider_error(error)
+            return reason if idempotent or reason == "rate_limited" else None
+
+        def on_retry(error, reason):
+            if reason == "rate_limited":
+                limiter.record_throttle(error.retry_after)
+                self._emit(on_event, "throttled", provider=limiter.name, retry_after=error.retry_after, rate=limiter.rate)
+
+        return self.retry_policy.call(limiter.name, attempt, classify=classify, on_retry=on_retry)
+
+    def _provider_caller(self, limiter, on_event=None):
+        """
+        Returns a callable making idempotent provider requests through `_call_provider`, passed to
+        the multi-page reads of the services so every page is rate limited and retried on its own.
+        """
+        return lambda func, *args: self._call_provider(limiter, func, *args, on_event=on_event)
+
+    def _match_in_order(self, limiter, search, current_user, queries, checkpoint, on_event=None, direction=None, isrcs=None, stats=None, planned_matches=None):
+        """
+        Searches for the tracks concurrently and yields the results in the original track order.
+
+        Up to `match_concurrency` searches run at the same time under the provider rate limiter,
+        and only a bounded window of results is kept ahead of the consumer, so the target playlist
+        can be written in order while the following tracks are still being searched.
+
+        Tracks already processed according to the checkpoint are skipped, and tracks searched
+        before the migration was interrupted reuse the result stored in the checkpoint.
+
+        Tracks are resolved by identifier first: a known ISRC reuses the target track matched by any
+        previous migration, or is searched with an exact `isrc:` query on Spotify. Only the remaining
+        tracks go through the match cache and, on a miss, the free-text search.
+
+        Tracks are de-duplicated before matching: each distinct recording (same ISRC or fingerprint)
+        is resolved once and fanned out to every position of the playlist that lists it, and tracks
+        being resolved at the same time by another migration of the process wait for its result.
+
+        Parameters:
+        - limiter: AdaptiveRateLimiter of the provider being searched
+        - search: Service method used to search a track
+        - current_user: User instance containing the user's ID
+        - queries: Iterable of tracks or queries to search (None for the tracks that cannot be searched)
+        - checkpoint: MigrationCheckpoint of the migration, or None to search every track
+        - on_event: Optional callable receiving the throttling events
+        - direction: Direction of the migration, used to look up the match cache (None disables it)
+        - isrcs: Optional list with the ISRC of each query (None when unknown)
+        - stats: Optional dictionary whose "searches_saved" counter is increased for every de-duplicated track
+        - planned_matches: Optional matches of a preview keyed by track index, used instead of searching
+
+        Yields:
+        - (index, result) for each remaining track, result being None if the track was not found
+        """
+        # known ISRC -> target track mappings are loaded at once.
+        known_isrcs = {
+            isrc: isrc_match(direction, match["id"], match.get("confidence"))
+            for isrc, match in (self.isrc_mappings.get_matches(direction, isrcs) if isrcs and direction else {}).items()
+        }
+
+        def dedup_key(index, query):
+            if query is None or not direction:
+                return None
+            isrc = isrcs[index] if isrcs else None
+            if isrc:
+                return (direction, "isrc", isrc)
+            fingerprint = QUERY_FINGERPRINTS[direction](query)
+            return (direction, "fingerprint", fingerprint) if fingerprint else None
+
+        def count_saved_search():
+            if stats is not None:
+                with self._inflight_lock:
+                    stats["searches_saved"] = stats.get("searches_saved", 0) + 1
+
+        def resolve(index, query):
+            isrc = isrcs[index] if isrcs else None
+            result = known_isrcs.get(isrc) if isrc else None
+            if result is None and isrc and direction == "youtube-to-spotify":
+                # an exact identifier search is cheaper and more reliable than a free-text one.
+                try:
+                    result = self._call_provider(limiter, self.spotify_service.search_track_by_isrc, current_user, isrc, on_event=on_event)
+                except TrackNotFoundError:
+                    result = None
+
+            if result is None:
+                fingerprint = QUERY_FINGERPRINTS[direction](query) if direction else None
+                result = self.match_cache.get(direction, fingerprint) if fingerprint else None
+                if result is None:
+                    try:
+                        result = self._call_provider(limiter, search, current_user, query, on_event=on_event)
+                    except TrackNotFoundError:
+                        result = None
+                    if result and fingerprint:
+                        self.match_cache.set(direction, fingerprint, result)
+
+            if result and isrc and isrc not in known_isrcs:
+                self._learn_isrc(direction, isrc, result)
+            return result
 
-    def migrate_spotify_to_youtube(self, current_user, playlist_id):
+        def match(index, query, key):
+            if checkpoint and checkpoint.has_match(index):
+                return checkpoint.get_match(index)
+            # planned matches stay in the plan, the checkpoint only records the tracks searched.
+            if planned_matches and index in planned_matches:
+                return planned_matches[index]
+            if query is None:
+                return None
+
+            result = self._resolve_once(key, lambda: resolve(index, query), count_saved_search) if key else resolve(index, query)
+            if checkpoint:
+                checkpoint.record_match(index, compact_match(direction, result) if direction else result)
+            return result
+
+        executor = ThreadPoolExecutor(max_workers=self.match_concurrency, thread_name_prefix="track-matcher")
+        pending = deque()
+        first_occurrences = {} # dedup key -> future of the first position listing the track.
+        try:
+            for index, query in enumerate(queries):
+                if checkpoint and index <= checkpoint.last_index:
+                    continue
+                key = dedup_key(index, query)
+                if key in first_occurrences:
+                    # the same track appears earlier in the playlist, its result is reused.
+                    future = first_occurrences[key]
+                    count_saved_search()
+                else:
+                    future = executor.submit(match, index, query, key)
+                    if key:
+                        first_occurrences[key] = future
+                pending.append((index, future))
+                if len(pending) >= self.match_concurrency * 2:
+                    index, future = pending.popleft()
+                    yield index, future.result()
+            while pending:
+                index, future = pending.popleft()
+                yield index, future.result()
+        finally:
+            # stop the searches that are no longer needed if the migration fails.
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _resolve_once(self, key, resolve, on_shared):
+        """
+        Runs `resolve` unless another migration of the process is already resolving the same track,
+        in which case its result is awaited instead.
+
+        Parameters:
+        - key: De-duplication key of the track
+        - resolve: Callable resolving the track
+        - on_shared: Callable invoked when the result of another migration is reused
+        """
+        with self._inflight_lock:
+            shared = self._inflight.get(key)
+            if shared is None:
+                self._inflight[key] = owned = Future()
+
+        if shared is not None:
+            try:
+                result = shared.result()
+                on_shared()
+                return result
+            except Exception:
+                # the other migration failed to resolve the track, try on our own.
+                return resolve()
+
+        try:
+            result = resolve()
+            owned.set_result(result)
+            return result
+        except BaseException as e:
+            owned.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _learn_isrc(self, direction, isrc, result):
+        """
+        Stores the target track matched for an ISRC, and the ISRC of the YouTube video matched,
+        so that later migrations in both directions resolve the recording by identifier.
+        """
+        target_id = result["id"]["videoId"] if direction == "spotify-to-youtube" else result["id"]
+        self.isrc_mappings.set_match(direction, isrc, target_id, result.get("match_confidence"))
+        if direction == "spotify-to-youtube":
+            self.isrc_mappings.add_video_isrcs({target_id: isrc})
+
+    def _get_video_isrcs(self, youtube_tracks):
+        """Returns the ISRC of each YouTube playlist item, when a previous migration learned it."""
+        video_isrcs = self.isrc_mappings.get_video_isrcs([get_youtube_video_id(track) for track in youtube_tracks])
+        return [video_isrcs.get(get_youtube_video_id(track)) for track in youtube_tracks]
+
+    def _load_or_create_checkpoint(self, current_user, direction, playlist_id, create_target_playlist):
+        """
+        Retrieves the checkpoint of an unfinished migration, or creates the target playlist
+        and a new checkpoint pointing to it.
+
+        The checkpoint is saved right away so that a retry never creates a second playlist.
+
+        Parameters:
+        - current_user: User instance containing the user's ID
+        - direction: Either "spotify-to-youtube" or "youtube-to-spotify"
+        - playlist_id: ID of the source playlist
+        - create_target_playlist: Callable that creates the playlist on the target platform
+        """
+        checkpoint = self.checkpoint_store.load(current_user, direction, playlist_id)
+        if checkpoint:
+            logger.info(f"Resuming {direction} migration of playlist {playlist_id} after track {checkpoint.last_index}.")
+            return checkpoint
+
+        checkpoint = MigrationCheckpoint(current_user, direction, playlist_id, target_playlist=create_target_playlist())
+        self.checkpoint_store.save(checkpoint)
+        # link both playlists so they can be synced later.
+        self.track_mappings.set_target_playlist(current_user, direction, playlist_id, checkpoint.target_playlist["id"])
+        return checkpoint
+
+    def _get_planned_matches(self, current_user, direction, playlist_id, plan_id, source_ids):
+        """
+        Retrieves the matches of a preview from the plan store, keyed by the index of each track in
+        the current playlist. The plan is read again when an interrupted commit is resumed.
+
+        Matches are looked up by source track ID, so tracks added to the playlist after the preview
+        are searched as usual. Missing, expired or foreign plans are ignored.
+
+        Parameters:
+        - current_user: User instance containing the user's ID
+        - direction: Either "spotify-to-youtube" or "youtube-to-spotify"
+        - playlist_id: ID of the source playlist
+        - plan_id: ID of the plan to commit, or None
+        - source_ids: Source track ID of each track of the playlist
+        """
+        if not plan_id:
+            return None
+        plan = self.plan_store.get(plan_id)
+        if not plan or (plan["user_id"], plan["direction"], plan["playlist_id"]) != (current_user, direction, playlist_id):
+            logger.warning(f"Migration plan {plan_id} not found for playlist {playlist_id}, tracks will be searched again.")
+            return None
+        matches = plan["matches"]
+        return {index: matches[source_id] for index, source_id in enumerate(source_ids) if source_id in matches}
+
+    def has_checkpoint(self, current_user, direction, playlist_id):
+        """
+        Checks whether an interrupted migration can be resumed.
+
+        Parameters:
+        - current_user: User instance containing the user's ID
+        - direction: Either "spotify-to-youtube" or "youtube-to-spotify"
+        - playlist_id: ID of the source playlist
+        """
+        return self.checkpoint_store.load(current_user, direction, playlist_id) is not None
+
+    def _save_mappings(self, current_user, direction, playlist_id, mappings):
+        """
+        Stores the source -> target track mappings of a playlist, ignoring tracks without a source ID.
+
+        Parameters:
+        - current_user: User instance containing the user's ID
+        - direction: Either "spotify-to-youtube" or "youtube-to-spotify"
+        - playlist_id: ID of the source playlist
+        - mappings: Target track IDs (or NOT_FOUND) keyed by source track ID
+        """
+        self.track_mappings.add_mappings(
+            current_user, direction, playlist_id,
+            {source_id: target_id for source_id, target_id in mappings.items() if source_id}
+        )
+
+    def _write_spotify_chunk(self, current_user, playlist_id, track_ids, on_event=None):
+        """
+        Adds tracks to a Spotify playlist under the rate limiter, notifying each written chunk.
+
+        Parameters:
+        - current_user: User instance containing the user's ID
+        - playlist_id: ID of the Spotify playlist
+        - track_ids: Spotify IDs of the tracks to add
+        - on_event: Optional callable receiving the inserted / write_failed events
+        """
+        reports = self._call_provider(self.spotify_limiter, self.spotify_service.add_tracks_to_playlist, current_user, playlist_id, track_ids, on_event=on_event, idempotent=False)
+        for report in reports:
+            if report["error"]:
+                self._emit(on_event, "write_failed", tracks=len(report["track_ids"]), error=report["error"])
+            else:
+                self._emit(on_event, "inserted", tracks=len(report["track_ids"]))
+        return reports
+
+    def _report_progress(self, on_progress, total, processed, migrated):
+        """
+        Sends the current progress counters to the progress callback, if any.
+
+        Parameters:
+        - on_progress: Callable receiving the counters, or None
+        - total: Number of tracks in the source playlist
+        - processed: Number of tracks processed so far
+        - migrated: Number of tracks added to the target playlist so far
+        """
+        if on_progress:
+            on_progress({"total": total, "processed": processed, "migrated": migrated})
+
+    @releases_youtube_quota
+    def migrate_spotify_to_youtube(self, current_user, playlist_id, on_progress=None, on_event=None, plan_id=None, include_payloads=False):
         """
         Migrates a Spotify playlist to YouTube.
 
+        If a previous migration of the playlist was interrupted (e.g. by the YouTube quota),
+        it is resumed from its checkpoint: the existing YouTube playlist is reused and no track
+        is searched or inserted twice.
+
         Parameters:
         - current_user: User instance containing the user's ID
         - playlist_id: ID of the Spotify playlist to migrate
+        - on_progress: Optional callable that receives the progress counters after each track
+        - on_event: Optional callable that receives the per-track events
+        - plan_id: Optional ID of a preview whose matches are written without searching again
+        - include_payloads: Whether the full search results are kept in the track records
         """        
-        tracks_migrated = [] # a list to store the results of the migrated songs.    
+        tracks_migrated = [] # compact records of the migrated songs.    
         try:   
             # Retrieve details of a Spotify playlist and its tracks.            
-            spotify_playlist = self.spotify_service.get_playlist(current_user, playlist_id)            
-            spotify_tracks = self.spotify_service.get_playlist_tracks(current_user, playlist_id)   
+            # the snapshot read with the details saves the snapshot request of a cached playlist.
+            spotify_playlist = self._call_provider(self.spotify_limiter, self.spotify_service.get_playlist, current_user, playlist_id, on_event=on_event, fields=MIGRATION_PLAYLIST_FIELDS)
+            spotify_tracks = self.spotify_service.get_playlist_tracks(current_user, playlist_id, fields=MIGRATION_TRACK_FIELDS, call_provider=self._provider_caller(self.spotify_limiter, on_event),
+                                                                      snapshot_id=spotify_playlist.get("snapshot_id"))
+
+            previous_checkpoint = self.checkpoint_store.load(current_user, "spotify-to-youtube", playlist_id)
+            planned_matches = self._get_planned_matches(
+                current_user, "spotify-to-youtube", playlist_id, plan_id, [get_spotify_track_id(track) for track in spotify_tracks]
+            )
+
+            # only start if the remaining tracks fit the YouTube quota left today; tracks already
+            # matched by a preview or by the interrupted migration are only inserted.
+            known_matches = {**(planned_matches or {}), **(previous_checkpoint.matches if previous_checkpoint else {})}
+            remaining = range(previous_checkpoint.last_index + 1 if previous_checkpoint else 0, len(spotify_tracks))
+            self._admit_youtube_quota(current_user, estimate_migration_cost(
+                sum(1 for i in remaining if i not in known_matches),
+                create_playlist=previous_checkpoint is None,
+                matched_tracks=sum(1 for i in remaining if known_matches.get(i))
+            ))
+
+            # Create playlist on YouTube, unless an interrupted migration already did.
+            checkpoint = self._load_or_create_checkpoint(
+                current_user, "spotify-to-youtube", playlist_id,
+                lambda: self._call_provider(self.youtube_limiter, self.youtube_service.create_playlist, current_user, spotify_playlist["name"], spotify_playlist["description"], on_event=on_event, idempotent=False)
+            )
+            youtube_playlist = checkpoint.target_playlist
+            previously_migrated = checkpoint.migrated
+            stats = {"searches_saved": 0} # searches avoided by de-duplicating the tracks.
+            mappings = {} # source track ID -> YouTube video ID of the tracks processed.
+
+            try:
+                # Search the tracks concurrently, results arrive in the playlist order.
+                with closing(self._match_in_order(self.youtube_limiter, self.youtube_service.search_track, current_user, spotify_tracks, checkpoint, on_event, "spotify-to-youtube",
+                                                 [get_spotify_track_isrc(track) for track in spotify_tracks], stats, planned_matches)) as youtube_results:
+                    for i, youtube_result in youtube_results: 
+
+                        source_id = get_spotify_track_id(spotify_tracks[i])
 
-            # Create playlist on YouTube
-            youtube_playlist = self.youtube_service.create_playlist(current_user, spotify_playlist["name"],spotify_playlist["description"])
+                        if youtube_result:    
+                            self._emit(on_event, "matched", index=i, target_id=youtube_result["id"]["videoId"], confidence=youtube_result.get("match_confidence"))
+                            # Add each song from the Spotify playlist to the new YouTube playlist.                    
+                            self._call_provider(self.youtube_limiter, self.youtube_service.add_track_to_playlist, current_user, youtube_playlist["id"], youtube_result["id"]["videoId"], on_event=on_event, idempotent=False)
+                            self._emit(on_event, "inserted", index=i, target_id=youtube_result["id"]["videoId"])
 
-            for i, track in enumerate(spotify_tracks): 
-                
-                time.sleep(5)
-                youtube_result = self.youtube_service.search_track(current_user, track) 
+                            tracks_migrated.append(track_result("spotify-to-youtube", spotify_tracks[i], youtube_result, include_payload=include_payloads))                                 
+                            mappings[source_id] = youtube_result["id"]["videoId"]
+                            checkpoint.migrated += 1
+                            checkpoint.advance(i)
+                            self.checkpoint_store.save(checkpoint)
+                        else:
+                            self._emit(on_event, "not_found", index=i)
+                            mappings[source_id] = NOT_FOUND
+                            checkpoint.advance(i)
 
-                if youtube_result:    
-                    # Add each song from the Spotify playlist to the new YouTube playlist.                    
-                    self.youtube_service.add_track_to_playlist(current_user, youtube_playlist["id"], youtube_result["id"]["videoId"])
+                        self._report_progress(on_progress, len(spotify_tracks), i + 1, checkpoint.migrated)
+            except Exception:
+                # keep the searches done so far so the migration can be resumed.
+                self.checkpoint_store.save(checkpoint)
+                raise
+            finally:
+                self._save_mappings(current_user, "spotify-to-youtube", playlist_id, mappings)
 
-                    tracks_migrated.append(youtube_result)                                 
+            self.checkpoint_store.delete(checkpoint)
+            if plan_id:
+                self.plan_store.delete(plan_id)
             
             logger.info(f"Playlist '{spotify_playlist['name']}' migrated successfully from Spotify to YouTube.")            
-            return {"playlist_created": youtube_playlist, "tracks_migrated": tracks_migrated}
+            return {"playlist_created": youtube_playlist, "tracks_migrated": tracks_migrated, "previously_migrated": previously_migrated, "searches_saved": stats["searches_saved"]}
 
         except PlaylistNotFoundError as e:
             logger.error(f"Playlist not found on Spotify: {e}")
@@ -55,37 +652,101 @@ class PlaylistMigration:
             logger.error(f"Authentication error with Spotify or YouTube: {e}")
             raise
 
-    def migrate_youtube_to_spotify(self, current_user, playlist_id):
+    def migrate_youtube_to_spotify(self, current_user, playlist_id, on_progress=None, on_event=None, plan_id=None, include_payloads=False):
         """
         Migrates a YouTube playlist to Spotify.
 
+        If a previous migration of the playlist was interrupted, it is resumed from its checkpoint:
+        the existing Spotify playlist is reused and no track is searched or inserted twice.
+
         Parameters:
         - current_user: User instance containing the user's ID
         - playlist_id: ID of the YouTube playlist to migrate
+        - on_progress: Optional callable that receives the progress counters after each track
+        - on_event: Optional callable that receives the per-track events
+        - plan_id: Optional ID of a preview whose matches are written without searching again
+        - include_payloads: Whether the full search results are kept in the track records
         """
 
-        tracks_migrated = [] # a list to store the results of the migrated songs.    
         try:
             
             # Retrieve details of a YouTube playlist and its tracks.            
-            youtube_playlist = self.youtube_service.get_playlist(current_user, playlist_id)                         
-            youtube_tracks = self.youtube_service.get_playlist_tracks(current_user, playlist_id)            
-
-            # Create playlist on Spotify
-            spotify_playlist = self.spotify_service.create_playlist(current_user, youtube_playlist["items"][0]["snippet"]["title"], youtube_playlist["items"][0]["snippet"]["description"])
-
-            for i, track in enumerate(youtube_tracks): 
-                time.sleep(5)                
-                track_query = f'{track["snippet"]["title"]}'
-                spotify_result = self.spotify_service.search_track(current_user, track_query)                
-
-                if spotify_result: 
-                    
-                    # Add each song from the YouTube playlist to the new Spotify playlist.                                          
-                    self.spotify_service.add_track_to_playlist(current_user, spotify_playlist["id"], spotify_result['id'])   
-                    tracks_migrated.append(spotify_result)    
-            
-            return {"playlist_created": spotify_playlist, "tracks_migrated": tracks_migrated}            
+            youtube_playlist = self._call_provider(self.youtube_limiter, self.youtube_service.get_playlist, current_user, playlist_id, on_event=on_event)
+            youtube_tracks = self.youtube_service.get_playlist_tracks(current_user, playlist_id, fields=MIGRATION_ITEM_FIELDS, call_provider=self._provider_caller(self.youtube_limiter, on_event))
+
+            # Create playlist on Spotify, unless an interrupted migration already did.
+            checkpoint = self._load_or_create_checkpoint(
+                current_user, "youtube-to-spotify", playlist_id,
+                lambda: self._call_provider(self.spotify_limiter, self.spotify_service.create_playlist, current_user, youtube_playlist["items"][0]["snippet"]["title"], youtube_playlist["items"][0]["snippet"]["description"], on_event=on_event, idempotent=False)
+            )
+            planned_matches = self._get_planned_matches(current_user, "youtube-to-spotify", playlist_id, plan_id, [get_youtube_video_id(track) for track in youtube_tracks])
+            spotify_playlist = checkpoint.target_playlist
+            previously_migrated = checkpoint.migrated
+            stats = {"searches_saved": 0} # searches avoided by de-duplicating the tracks.
+
+            # deleted and private videos are not searched.
+            track_queries = [parse_playlist_item(track) for track in youtube_tracks]
+            not_found = {} # source video ID -> NOT_FOUND for the tracks without a match.
+
+            # Spotify accepts up to 100 tracks per write, so matched tracks are buffered and added in chunks.
+            write_buffer = PlaylistWriteBuffer(
+                lambda track_ids: self._write_spotify_chunk(current_user, spotify_playlist["id"], track_ids, on_event),
+                SPOTIFY_MAX_ITEMS_PER_REQUEST
+            )
+
+            previous_failed_chunks = checkpoint.failed_chunks
+
+            def save_written_tracks(index):
+                # every track up to `index` has been written or was not found.
+                checkpoint.migrated = previously_migrated + len(write_buffer.written)
+                checkpoint.failed_chunks = previous_failed_chunks + write_buffer.failed_chunks
+                checkpoint.advance(index)
+                self.checkpoint_store.save(checkpoint)
+
+            try:
+                # Search the tracks concurrently, results arrive in the playlist order.
+                with closing(self._match_in_order(self.spotify_limiter, self.spotify_service.search_track, current_user, track_queries, checkpoint, on_event, "youtube-to-spotify",
+                                                 self._get_video_isrcs(youtube_tracks), stats, planned_matches)) as spotify_results:
+                    for i, spotify_result in spotify_results: 
+
+                        source_id = get_youtube_video_id(youtube_tracks[i])
+
+                        if spotify_result: 
+                            self._emit(on_event, "matched", index=i, target_id=spotify_result["id"], confidence=spotify_result.get("match_confidence"))
+                            write_buffer.add(spotify_result['id'], (youtube_tracks[i], spotify_result))
+                            if not write_buffer.pending:
+                                save_written_tracks(i)
+                        else:
+                            self._emit(on_event, "not_found", index=i)
+                            not_found[source_id] = NOT_FOUND
+                            if not write_buffer.pending:
+                                checkpoint.advance(i)
+
+                        self._report_progress(on_progress, len(youtube_tracks), i + 1, previously_migrated + len(write_buffer.written))
+
+                # Add the remaining songs from the YouTube playlist to the new Spotify playlist.
+                write_buffer.flush()
+            except Exception:
+                # keep the searches done so far so the migration can be resumed.
+                self.checkpoint_store.save(checkpoint)
+                raise
+            finally:
+                written = {get_youtube_video_id(track): result["id"] for track, result in write_buffer.written}
+                self._save_mappings(current_user, "youtube-to-spotify", playlist_id, {**not_found, **written})
+                # later migrations of these videos will be resolved by ISRC.
+                self.isrc_mappings.add_video_isrcs({
+                    get_youtube_video_id(track): get_spotify_track_isrc(result) for track, result in write_buffer.written
+                    if get_youtube_video_id(track) and get_spotify_track_isrc(result)
+                })
+
+            self.checkpoint_store.delete(checkpoint)
+            if plan_id:
+                self.plan_store.delete(plan_id)
+            tracks_migrated = [track_result("youtube-to-spotify", track, result, include_payload=include_payloads) for track, result in write_buffer.written]
+            failed_chunks = previous_failed_chunks + write_buffer.failed_chunks
+            self._report_progress(on_progress, len(youtube_tracks), len(youtube_tracks), previously_migrated + len(tracks_migrated))
+
+            return {"playlist_created": spotify_playlist, "tracks_migrated": tracks_migrated, "failed_chunks": failed_chunks, "previously_migrated": previously_migrated, "searches_saved": stats["searches_saved"]}            
 
         except PlaylistNotFoundError as e:
             logger.error(f"Playlist not found on YouTube: {e}")
@@ -95,4 +756,436 @@ class PlaylistMigration:
             raise
         except AuthenticationError as e:
             logger.error(f"Authentication error with YouTube or Spotify: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def preview_spotify_to_youtube(self, current_user, playlist_id, on_progress=None, on_event=None, include_payloads=False):
+        """
+        Resolves the YouTube matches of a Spotify playlist without creating or writing anything.
+        See `_preview`.
+        """
+        return self._preview(current_user, "spotify-to-youtube", playlist_id, on_progress, on_event, include_payloads)
+
+    def preview_youtube_to_spotify(self, current_user, playlist_id, on_progress=None, on_event=None, include_payloads=False):
+        """
+        Resolves the Spotify matches of a YouTube playlist without creating or writing anything.
+        See `_preview`.
+        """
+        return self._preview(current_user, "youtube-to-spotify", playlist_id, on_progress, on_event, include_payloads)
+
+    @releases_youtube_quota
+    def _preview(self, current_user, direction, playlist_id, on_progress=None, on_event=None, include_payloads=False):
+        """
+        Resolves the matches of a playlist and stores them as a plan.
+
+        Nothing is created on the target platform. Passing the returned plan ID to the migration
+        of the same playlist writes the planned matches without searching the tracks again.
+
+        Parameters:
+        - current_user: User instance containing the user's ID
+        - direction: Either "spotify-to-youtube" or "youtube-to-spotify"
+        - playlist_id: ID of the source playlist
+        - on_progress: Optional callable that receives the progress counters after each track
+        - on_event: Optional callable that receives the per-track events
+        - include_payloads: Whether the full search results are kept in the track records
+
+        Returns:
+        - The plan ID with its expiration, and the record of every track
+        """
+        if direction == "spotify-to-youtube":
+            tracks = self.spotify_service.get_playlist_tracks(current_user, playlist_id, fields=MIGRATION_TRACK_FIELDS, call_provider=self._provider_caller(self.spotify_limiter, on_event))
+            queries, isrcs = tracks, [get_spotify_track_isrc(track) for track in tracks]
+            limiter, search = self.youtube_limiter, self.youtube_service.search_track
+            get_source_id, get_target_id = get_spotify_track_id, lambda result: result["id"]["videoId"]
+            self._admit_youtube_quota(current_user, len(tracks) * TRACK_SEARCH_COST)
+        else:
+            tracks = self.youtube_service.get_playlist_tracks(current_user, playlist_id, fields=MIGRATION_ITEM_FIELDS, call_provider=self._provider_caller(self.youtube_limiter, on_event))
+            queries, isrcs = [parse_playlist_item(track) for track in tracks], self._get_video_isrcs(tracks)
+            limiter, search = self.spotify_limiter, self.spotify_service.search_track
+            get_source_id, get_target_id = get_youtube_video_id, lambda result: result["id"]
+
+        stats = {"searches_saved": 0}
+        matches = {} # source track ID -> compact match, stored as the plan.
+        preview = []
+        with closing(self._match_in_order(limiter, search, current_user, queries, None, on_event, direction, isrcs, stats)) as results:
+            for i, result in results:
+                source_id = get_source_id(tracks[i])
+                if source_id:
+                    matches[source_id] = compact_match(direction, result)
+                if result:
+                    self._emit(on_event, "matched", index=i, target_id=get_target_id(result), confidence=result.get("match_confidence"))
+                else:
+                    self._emit(on_event, "not_found", index=i)
+                preview.append(track_result(direction, tracks[i], result, "matched" if result else "not_found", include_payloads))
+                self._report_progress(on_progress, len(tracks), i + 1, 0)
+
+        plan_id = self.plan_store.create(current_user, direction, playlist_id, matches)
+        logger.info(f"Migration plan {plan_id} created for playlist {playlist_id} ({direction}).")
+        return {
+            "plan_id": plan_id,
+            "expires_in": Config.MIGRATION_PLAN_TTL,
+            "tracks": preview,
+            "tracks_found": sum(1 for track in preview if track.target_id),
+            "tracks_not_found": sum(1 for track in preview if not track.target_id),
+            "searches_saved": stats["searches_saved"],
+        }
+
+    def migrate_spotify_library_to_youtube(self, current_user, playlist_ids="all", on_progress=None, on_event=None):
+        """
+        Migrates several Spotify playlists (or all the playlists of the user) to YouTube at once.
+        See `_migrate_library`.
+        """
+        return self._migrate_library(current_user, "spotify-to-youtube", playlist_ids, on_progress, on_event)
+
+    def migrate_youtube_library_to_spotify(self, current_user, playlist_ids="all", on_progress=None, on_event=None):
+        """
+        Migrates several YouTube playlists (or all the playlists of the user) to Spotify at once.
+        See `_migrate_library`.
+        """
+        return self._migrate_library(current_user, "youtube-to-spotify", playlist_ids, on_progress, on_event)
+
+    @releases_youtube_quota
+    def _migrate_library(self, current_user, direction, playlist_ids, on_progress=None, on_event=None):
+        """
+        Migrates several playlists with a single matching plan.
+
+        The tracks of every playlist are matched in one pass under the provider rate limiter, so a
+        song listed by several playlists is only resolved once. The target playlists are written
+        afterwards; a playlist that cannot be written is reported without stopping the others.
+
+        Parameters:
+        - current_user: User instance containing the user's ID
+        - direction: Either "spotify-to-youtube" or "youtube-to-spotify"
+        - playlist_ids: List of source playlist IDs, or "all" for every playlist of the user
+        - on_progress: Optional callable that receives the progress counters
+        - on_event: Optional callable that receives the per-track events
+
+        Returns:
+        - A report per playlist and the totals of the library
+        """
+        if direction == "spotify-to-youtube":
+            source_service, target_service, source_fields = self.spotify_service, self.youtube_service, MIGRATION_TRACK_FIELDS
+            list_playlists = self.spotify_service.get_user_playlists
+            source_limiter, target_limiter = self.spotify_limiter, self.youtube_limiter
+            describe_playlist = lambda playlist: (playlist["name"], playlist["description"])
+            limiter, search = self.youtube_limiter, self.youtube_service.search_track
+            get_source_id, get_target_id = get_spotify_track_id, lambda result: result["id"]["videoId"]
+        else:
+            source_service, target_service, source_fields = self.youtube_service, self.spotify_service, MIGRATION_ITEM_FIELDS
+            list_playlists = self.youtube_service.get_user_playlists_list
+            source_limiter, target_limiter = self.youtube_limiter, self.spotify_limiter
+            describe_playlist = lambda playlist: (playlist["items"][0]["snippet"]["title"], playlist["items"][0]["snippet"]["description"])
+            limiter, search = self.spotify_limiter, self.spotify_service.search_track
+            get_source_id, get_target_id = get_youtube_video_id, lambda result: result["id"]
+
+        if playlist_ids == "all":
+            playlist_ids = [playlist["id"] for playlist in self._call_provider(source_limiter, list_playlists, current_user, on_event=on_event)]
+
+        # build the matching plan of the whole library.
+        playlists, queries, isrcs, positions = [], [], [], []
+        for playlist_id in playlist_ids:
+            details = self._call_provider(source_limiter, source_service.get_playlist, current_user, playlist_id, on_event=on_event)
+            # the snapshot of the Spotify details saves the snapshot request of a cached playlist.
+            read_options = {"snapshot_id": details.get("snapshot_id")} if direction == "spotify-to-youtube" else {}
+            tracks = source_service.get_playlist_tracks(current_user, playlist_id, fields=source_fields, call_provider=self._provider_caller(source_limiter, on_event), **read_options)
+            playlists.append({"id": playlist_id, "details": details, "tracks": tracks, "results": [None] * len(tracks)})
+            if direction == "spotify-to-youtube":
+                queries.extend(tracks)
+                isrcs.extend(get_spotify_track_isrc(track) for track in tracks)
+            else:
+                queries.extend(parse_playlist_item(track) for track in tracks)
+                isrcs.extend(self._get_video_isrcs(tracks))
+            positions.extend((len(playlists) - 1, index) for index in range(len(tracks)))
+
+        if direction == "spotify-to-youtube":
+            self._admit_youtube_quota(current_user, len(queries) * TRACK_MIGRATION_COST + estimate_migration_cost(0) * len(playlists))
+
+        stats = {"searches_saved": 0}
+        migrated = 0
+        with closing(self._match_in_order(limiter, search, current_user, queries, None, on_event, direction, isrcs, stats)) as results:
+            for i, result in results:
+                playlist_position, index = positions[i]
+                playlist = playlists[playlist_position]
+                playlist["results"][index] = result
+                if result:
+                    self._emit(on_event, "matched", playlist_id=playlist["id"], index=index, target_id=get_target_id(result), confidence=result.get("match_confidence"))
+                else:
+                    self._emit(on_event, "not_found", playlist_id=playlist["id"], index=index)
+                self._report_progress(on_progress, len(queries), i + 1, migrated)
+
+        # write every target playlist.
+        reports = []
+        for playlist in playlists:
+            report = {"playlist_id": playlist["id"], "playlist_created": None, "tracks_total": len(playlist["tracks"]),
+                      "tracks_migrated": 0, "tracks_not_found": playlist["results"].count(None), "failed_chunks": [], "error": None}
+            mappings = {}
+            try:
+                name, description = describe_playlist(playlist["details"])
+                target_playlist = self._call_provider(target_limiter, target_service.create_playlist, current_user, name, description, on_event=on_event, idempotent=False)
+                report["playlist_created"] = target_playlist
+                self.track_mappings.set_target_playlist(current_user, direction, playlist["id"], target_playlist["id"])
+
+                matched = [(get_source_id(track), result) for track, result in zip(playlist["tracks"], playlist["results"]) if result]
+                mappings.update({get_source_id(track): NOT_FOUND for track, result in zip(playlist["tracks"], playlist["results"]) if not result})
+
+                if direction == "spotify-to-youtube":
+                    for source_id, result in matched:
+                        self._call_provider(self.youtube_limiter, self.youtube_service.add_track_to_playlist, current_user, target_playlist["id"], get_target_id(result), on_event=on_event, idempotent=False)
+                        self._emit(on_event, "inserted", playlist_id=playlist["id"], target_id=get_target_id(result))
+                        mappings[source_id] = get_target_id(result)
+                        report["tracks_migrated"] += 1
+                        migrated += 1
+                        self._report_progress(on_progress, len(queries), len(queries), migrated)
+                else:
+                    write_buffer = PlaylistWriteBuffer(
+                        lambda track_ids: self._write_spotify_chunk(current_user, target_playlist["id"], track_ids, on_event),
+                        SPOTIFY_MAX_ITEMS_PER_REQUEST
+                    )
+                    try:
+                        for source_id, result in matched:
+                            write_buffer.add(get_target_id(result), (source_id, result))
+                        write_buffer.flush()
+                    finally:
+                        mappings.update({source_id: get_target_id(result) for source_id, result in write_buffer.written})
+                        self.isrc_mappings.add_video_isrcs({
+                            source_id: get_spotify_track_isrc(result) for source_id, result in write_buffer.written
+                            if source_id and get_spotify_track_isrc(result)
+                        })
+                        report["tracks_migrated"] = len(write_buffer.written)
+                        report["failed_chunks"] = write_buffer.failed_chunks
+                        migrated += len(write_buffer.written)
+                        self._report_progress(on_progress, len(queries), len(queries), migrated)
+            except Exception as e:
+                logger.error(f"Playlist {playlist['id']} could not be written during the library migration: {e}")
+                report["error"] = {"type": e.__class__.__name__, "message": str(e)}
+            finally:
+                self._save_mappings(current_user, direction, playlist["id"], mappings)
+            reports.append(report)
+
+        totals = {
+            "playlists": len(reports),
+            "failed_playlists": sum(1 for report in reports if report["error"]),
+            "tracks": len(queries),
+            "tracks_migrated": migrated,
+            "tracks_not_found": sum(report["tracks_not_found"] for report in reports),
+            "searches_saved": stats["searches_saved"],
+        }
+        logger.info(f"Library migrated ({direction}): {totals['tracks_migrated']}/{totals['tracks']} tracks in {totals['playlists']} playlists.")
+        return {"playlists": reports, "totals": totals}
+
+    def _get_sync_target(self, current_user, direction, playlist_id, target_playlist_id):
+        """
+        Resolves the target playlist of a sync, linking it to the source playlist when it is given explicitly.
+
+        Raises:
+        - PlaylistNotFoundError: If no target playlist is given and the source playlist was never migrated
+        """
+        if target_playlist_id:
+            self.track_mappings.set_target_playlist(current_user, direction, playlist_id, target_playlist_id)
+            return target_playlist_id
+
+        target_playlist_id = self.track_mappings.get_target_playlist(current_user, direction, playlist_id)
+        if not target_playlist_id:
+            raise PlaylistNotFoundError(f"Playlist {playlist_id} has not been migrated yet, there is nothing to sync.")
+        return target_playlist_id
+
+    def _find_missing_tracks(self, limiter, search, current_user, source_tracks, queries, get_source_id, get_target_id, mappings, target_ids, on_event=None, direction=None, isrcs=None, stats=None):
+        """
+        Compares a source playlist with its target playlist and yields the source tracks missing from the target, in the playlist order.
+
+        Tracks mapped by a previous migration or sync are not searched again: they are skipped when
+        their target track is already in the target playlist (or had no match), and re-added directly
+        otherwise. Only the tracks added to the source playlist since then are searched.
+
+        Parameters:
+        - limiter: AdaptiveRateLimiter of the provider being searched
+        - search: Service method used to search a track
+        - current_user: User instance containing the user's ID
+        - source_tracks: Tracks of the source playlist
+        - queries: Search query of each source track
+        - get_source_id: Callable returning the source ID of a track
+        - get_target_id: Callable returning the target ID of a search result
+        - mappings: Target track IDs (or NOT_FOUND) keyed by source track ID
+        - target_ids: IDs of the tracks currently in the target playlist
+        - on_event: Optional callable receiving the matched / not_found events of the searched tracks
+        - direction: Direction of the sync, used to look up the match cache
+        - isrcs: Optional list with the ISRC of each source track (None when unknown)
+        - stats: Optional dictionary counting the searches saved by de-duplication
+
+        Yields:
+        - (index, source_id, target_id, searched) for each missing track, target_id being None if the track was not found
+        """
+        missing = []
+        for index, track in enumerate(source_tracks):
+            source_id = get_source_id(track)
+            target_id = mappings.get(source_id) if source_id else None
+            if target_id == NOT_FOUND or target_id in target_ids:
+                continue
+            missing.append((index, source_id, target_id))
+
+        # only the unmapped tracks are searched, results arrive in the same order as `missing`.
+        indexes_to_search = [index for index, _, target_id in missing if target_id is None]
+        queries_to_search = [queries[index] for index in indexes_to_search]
+        isrcs_to_search = [isrcs[index] for index in indexes_to_search] if isrcs else None
+        with closing(self._match_in_order(limiter, search, current_user, queries_to_search, None, on_event, direction, isrcs_to_search, stats)) as results:
+            for index, source_id, target_id in missing:
+                searched = target_id is None
+                if searched:
+                    _, result = next(results)
+                    target_id = get_target_id(result) if result else None
+                    if target_id:
+                        self._emit(on_event, "matched", index=index, target_id=target_id, confidence=result.get("match_confidence"))
+                    else:
+                        self._emit(on_event, "not_found", index=index)
+                yield index, source_id, target_id, searched
+
+    @releases_youtube_quota
+    def sync_spotify_to_youtube(self, current_user, playlist_id, target_playlist_id=None, on_progress=None, on_event=None):
+        """
+        Adds to the YouTube playlist of a migrated Spotify playlist the tracks it is missing.
+
+        Parameters:
+        - current_user: User instance containing the user's ID
+        - playlist_id: ID of the Spotify playlist to sync
+        - target_playlist_id: ID of the YouTube playlist to sync, defaults to the playlist created by the migration
+        - on_progress: Optional callable that receives the progress counters after each missing track
+        - on_event: Optional callable that receives the per-track events
+        """
+        direction = "spotify-to-youtube"
+
+        try:
+            target_playlist_id = self._get_sync_target(current_user, direction, playlist_id, target_playlist_id)
+
+            spotify_tracks = self.spotify_service.get_playlist_tracks(current_user, playlist_id, fields=MIGRATION_TRACK_FIELDS, call_provider=self._provider_caller(self.spotify_limiter, on_event))
+            target_tracks = self.youtube_service.get_playlist_tracks(current_user, target_playlist_id, fields=VIDEO_ID_FIELDS, call_provider=self._provider_caller(self.youtube_limiter, on_event))
+            target_ids = {get_youtube_video_id(item) for item in target_tracks}
+            mappings = self.track_mappings.get_mappings(current_user, direction, playlist_id)
+            # the tracks never mapped are searched and inserted.
+            self._admit_youtube_quota(current_user, estimate_migration_cost(
+                sum(1 for track in spotify_tracks if get_spotify_track_id(track) not in mappings), create_playlist=False
+            ))
+
+            new_mappings = {}
+            tracks_added = tracks_searched = tracks_not_found = 0
+            stats = {"searches_saved": 0}
+
+            try:
+                missing_tracks = self._find_missing_tracks(
+                    self.youtube_limiter, self.youtube_service.search_track, current_user, spotify_tracks, spotify_tracks,
+                    get_spotify_track_id, lambda result: result["id"]["videoId"], mappings, target_ids, on_event, direction,
+                    [get_spotify_track_isrc(track) for track in spotify_tracks], stats
+                )
+                with closing(missing_tracks):
+                    for index, source_id, video_id, searched in missing_tracks:
+                        tracks_searched += searched
+
+                        if video_id is None:
+                            tracks_not_found += 1
+                            new_mappings[source_id] = NOT_FOUND
+                        else:
+                            # a search may return a video that is already in the playlist.
+                            if video_id not in target_ids:
+                                self._call_provider(self.youtube_limiter, self.youtube_service.add_track_to_playlist, current_user, target_playlist_id, video_id, on_event=on_event, idempotent=False)
+                                self._emit(on_event, "inserted", index=index, target_id=video_id)
+                                target_ids.add(video_id)
+                                tracks_added += 1
+                            new_mappings[source_id] = video_id
+
+                        self._report_progress(on_progress, len(spotify_tracks), index + 1, tracks_added)
+            finally:
+                self._save_mappings(current_user, direction, playlist_id, new_mappings)
+
+            logger.info(f"Playlist {playlist_id} synced to YouTube: {tracks_added} tracks added, {tracks_searched} searched.")
+            return {"playlist_synced": target_playlist_id, "tracks_added": tracks_added, "tracks_searched": tracks_searched, "tracks_not_found": tracks_not_found, "searches_saved": stats["searches_saved"]}
+
+        except PlaylistNotFoundError as e:
+            logger.error(f"Playlist not found during sync: {e}")
+            raise
+        except APIRequestError as e:
+            logger.error(f"API request error during sync: {e}")
+            raise
+        except AuthenticationError as e:
+            logger.error(f"Authentication error with YouTube or Spotify: {e}")
+            raise
+
+    def sync_youtube_to_spotify(self, current_user, playlist_id, target_playlist_id=None, on_progress=None, on_event=None):
+        """
+        Adds to the Spotify playlist of a migrated YouTube playlist the tracks it is missing.
+
+        Parameters:
+        - current_user: User instance containing the user's ID
+        - playlist_id: ID of the YouTube playlist to sync
+        - target_playlist_id: ID of the Spotify playlist to sync, defaults to the playlist created by the migration
+        - on_progress: Optional callable that receives the progress counters after each missing track
+        - on_event: Optional callable that receives the per-track events
+        """
+        direction = "youtube-to-spotify"
+
+        try:
+            target_playlist_id = self._get_sync_target(current_user, direction, playlist_id, target_playlist_id)
+
+            youtube_tracks = self.youtube_service.get_playlist_tracks(current_user, playlist_id, fields=MIGRATION_ITEM_FIELDS, call_provider=self._provider_caller(self.youtube_limiter, on_event))
+            target_tracks = self.spotify_service.get_playlist_tracks(current_user, target_playlist_id, fields=TRACK_ID_FIELDS, call_provider=self._provider_caller(self.spotify_limiter, on_event))
+            target_ids = {get_spotify_track_id(item) for item in target_tracks}
+            present_ids = set(target_ids)
+            mappings = self.track_mappings.get_mappings(current_user, direction, playlist_id)
+            # deleted and private videos are not searched.
+            track_queries = [parse_playlist_item(track) for track in youtube_tracks]
+
+            not_found = {}
+            already_present = {}
+            tracks_searched = 0
+            stats = {"searches_saved": 0}
+
+            write_buffer = PlaylistWriteBuffer(
+                lambda track_ids: self._write_spotify_chunk(current_user, target_playlist_id, track_ids, on_event),
+                SPOTIFY_MAX_ITEMS_PER_REQUEST
+            )
+
+            try:
+                missing_tracks = self._find_missing_tracks(
+                    self.spotify_limiter, self.spotify_service.search_track, current_user, youtube_tracks, track_queries,
+                    get_youtube_video_id, lambda result: result["id"], mappings, target_ids, on_event, direction,
+                    self._get_video_isrcs(youtube_tracks), stats
+                )
+                with closing(missing_tracks):
+                    for index, source_id, track_id, searched in missing_tracks:
+                        tracks_searched += searched
+
+                        if track_id is None:
+                            not_found[source_id] = NOT_FOUND
+                        elif track_id not in target_ids:
+                            write_buffer.add(track_id, (source_id, track_id))
+                            target_ids.add(track_id)
+                        else:
+                            # a search may return a track that is already in the playlist.
+                            already_present[source_id] = track_id
+
+                        self._report_progress(on_progress, len(youtube_tracks), index + 1, len(write_buffer.written))
+
+                write_buffer.flush()
+            finally:
+                # tracks of failed chunks are left unmapped, so the next sync adds them again.
+                written = dict(write_buffer.written)
+                added_ids = present_ids | set(written.values())
+                already_present = {source_id: track_id for source_id, track_id in already_present.items() if track_id in added_ids}
+                self._save_mappings(current_user, direction, playlist_id, {**not_found, **already_present, **written})
+
+            logger.info(f"Playlist {playlist_id} synced to Spotify: {len(written)} tracks added, {tracks_searched} searched.")
+            return {
+                "playlist_synced": target_playlist_id,
+                "tracks_added": len(written),
+                "tracks_searched": tracks_searched,
+                "tracks_not_found": len(not_found),
+                "failed_chunks": write_buffer.failed_chunks,
+                "searches_saved": stats["searches_saved"]
+            }
+
+        except PlaylistNotFoundError as e:
+            logger.error(f"Playlist not found during sync: {e}")
+            raise
+        except APIRequestError as e:
+            logger.error(f"API request error during sync: {e}")
+            raise
+        except AuthenticationError as e:
+            logger.error(f"Authentication error with YouTube or Spotify: {e}")
+            raise
@@ -0,0 +1,95 @@
+from database.redis_connection import get_redis_connection
+from cachetools import LRUCache
+from config import Config
+import base64
+import hashlib
+import json
+import threading
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+
+class SpotifyPlaylistCache:
+    """
+    Two-tier cache of the items of Spotify playlists, keyed by playlist, `snapshot_id` and projection.
+
+    Spotify gives a playlist a new `snapshot_id` every time it changes, so an entry never has to
+    be invalidated: once the playlist changes, its new snapshot simply misses the cache. Items are
+    kept in a bounded in-process LRU, sized in items, and in Redis as compressed JSON shared by the
+    workers. The returned lists are shared between callers and must not be modified.
+
+    Methods:
+    --------
+    get(playlist_id: str, snapshot_id: str, fields: str) -> list:
+        Retrieves the cached items of a playlist snapshot.
+
+    set(playlist_id: str, snapshot_id: str, fields: str, items: list):
+        Caches the items of a playlist snapshot in both tiers.
+    """
+
+    def __init__(self, max_items=None, ttl=None):
+        """
+        Parameters:
+        -----------
+        max_items (int): Number of playlist items kept in the in-process cache.
+        ttl (int): Seconds the items of a snapshot are kept in Redis.
+        """
+        self.ttl = ttl or Config.SPOTIFY_PLAYLIST_CACHE_TTL
+        self._local = LRUCache(maxsize=max_items or Config.SPOTIFY_PLAYLIST_CACHE_ITEMS, getsizeof=lambda items: max(len(items), 1))
+        # cachetools caches are not thread-safe.
+        self._lock = threading.Lock()
+
+    def _key(self, playlist_id, snapshot_id, fields):
+        # the same snapshot is read with several projections, e.g. migrations only read a few fields.
+        projection = hashlib.sha1((fields or "").encode()).hexdigest()[:12]
+        return f"spotify_playlist:{playlist_id}:{snapshot_id}:{projection}"
+
+    def get(self, playlist_id, snapshot_id, fields=None):
+        """
+        Retrieves the cached items of a playlist snapshot, promoting Redis hits to the in-process cache.
+
+        Returns:
+        --------
+        list: The items, or None on a miss.
+        """
+        key = self._key(playlist_id, snapshot_id, fields)
+        with self._lock:
+            items = self._local.get(key)
+        if items is not None:
+            return items
+
+        try:
+            data = redis.get(key)
+        except Exception as e:
+            # the cache must never fail a request.
+            logger.warning(f"Spotify playlist cache unavailable: {e}")
+            return None
+        if data is None:
+            return None
+
+        items = json.loads(zlib.decompress(base64.b64decode(data)))
+        self._store_local(key, items)
+        return items
+
+    def set(self, playlist_id, snapshot_id, fields, items):
+        """Caches the items of a playlist snapshot in the in-process cache and in Redis."""
+        key = self._key(playlist_id, snapshot_id, fields)
+        self._store_local(key, items)
+        # Upstash stores strings, the compressed payload is sent in base64.
+        data = base64.b64encode(zlib.compress(json.dumps(items, separators=(",", ":")).encode())).decode()
+        try:
+            redis.setex(key, self.ttl, data)
+        except Exception as e:
+            logger.warning(f"Spotify playlist cache unavailable: {e}")
+
+    def _store_local(self, key, items):
+        with self._lock:
+            try:
+                self._local[key] = items
+            except ValueError:
+                # playlists larger than the whole cache are only kept in Redis.
+                pass
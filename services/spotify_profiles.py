@@ -0,0 +1,95 @@
+from database.redis_connection import get_redis_connection
+from cachetools import TTLCache
+from config import Config
+import json
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+
+class SpotifyProfileCache:
+    """
+    Two-tier cache of the Spotify profile (`/me`) of each user.
+
+    The profile is needed to tell the playlists owned by the user and to create playlists, so it
+    is kept in a bounded in-process TTL cache and in Redis, instead of being requested every time.
+    Entries are keyed by the ID of the user in the application.
+
+    Methods:
+    --------
+    get(user_id: int) -> dict:
+        Retrieves the cached profile of a user.
+
+    set(user_id: int, profile: dict):
+        Caches the profile of a user in both tiers.
+
+    delete(user_id: int):
+        Forgets the profile of a user, e.g. when they connect another Spotify account.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        """
+        Parameters:
+        -----------
+        maxsize (int): Number of profiles kept in the in-process cache.
+        ttl (int): Seconds a profile is kept in Redis.
+        """
+        self.ttl = ttl or Config.SPOTIFY_PROFILE_CACHE_TTL
+        # a profile forgotten by another worker is only kept for a few minutes in this process.
+        self._local = TTLCache(maxsize=maxsize or Config.SPOTIFY_PROFILE_CACHE_SIZE, ttl=min(self.ttl, 5 * 60))
+        # cachetools caches are not thread-safe.
+        self._lock = threading.Lock()
+
+    def _key(self, user_id):
+        return f"spotify_profile:{user_id}"
+
+    def get(self, user_id):
+        """
+        Retrieves the cached profile of a user, promoting Redis hits to the in-process cache.
+
+        Returns:
+        --------
+        dict: The profile, or None on a miss.
+        """
+        key = self._key(user_id)
+        with self._lock:
+            profile = self._local.get(key)
+        if profile is not None:
+            return profile
+
+        try:
+            data = redis.get(key)
+        except Exception as e:
+            # the cache must never fail a request.
+            logger.warning(f"Spotify profile cache unavailable: {e}")
+            return None
+        if data is None:
+            return None
+
+        profile = json.loads(data)
+        with self._lock:
+            self._local[key] = profile
+        return profile
+
+    def set(self, user_id, profile):
+        """Caches the profile of a user in the in-process cache and in Redis."""
+        key = self._key(user_id)
+        with self._lock:
+            self._local[key] = profile
+        try:
+            redis.setex(key, self.ttl, json.dumps(profile))
+        except Exception as e:
+            logger.warning(f"Spotify profile cache unavailable: {e}")
+
+    def delete(self, user_id):
+        """Removes the profile of a user from both tiers."""
+        key = self._key(user_id)
+        with self._lock:
+            self._local.pop(key, None)
+        try:
+            redis.delete(key)
+        except Exception as e:
+            logger.warning(f"Spotify profile cache unavailable: {e}")
@@ -1,17 +1,41 @@
-import spotipy
 from connection.spotify_connection import SpotifyAuth
+from connection.spotify_clients import SpotifyClientPool
 from token_handler.spotify_tokens import SpotifyTokenHandler
 from flask import jsonify
-from errors.playlist_exceptions import PlaylistNotFoundError, TrackNotFoundError, APIRequestError, InvalidPlaylistIDError
+from errors.playlist_exceptions import PlaylistNotFoundError, TrackNotFoundError, APIRequestError, InvalidPlaylistIDError, RateLimitExceededError, ProviderUnavailableError, CircuitOpenError
 from errors.custom_exceptions import NoRefreshTokenError
-from concurrent.futures import ThreadPoolExecutor
 from spotipy.exceptions import SpotifyException
+from services.track_matcher import TrackMatcher
+from extensions.circuit_breaker import circuit_breaker
+from services.title_normalizer import ParsedTitle, build_spotify_query
+from services.spotify_profiles import SpotifyProfileCache
+from services.spotify_playlists import SpotifyPlaylistCache
+from config import Config
 import logging
 
 logger = logging.getLogger(__name__)
 
 spotify_tokens= SpotifyTokenHandler()      
 
+# maximum number of items Spotify accepts in a single "add items to playlist" request.
+SPOTIFY_MAX_ITEMS_PER_REQUEST = 100
+# maximum number of playlists Spotify returns in a single page of the user's playlists.
+SPOTIFY_PLAYLISTS_PAGE_SIZE = 50
+# maximum number of items Spotify returns in a single page of a playlist.
+SPOTIFY_TRACKS_PAGE_SIZE = 100
+# fields of the playlist items read by migrations, the rest of the payload (album, markets,
+# images...) is not downloaded.
+MIGRATION_TRACK_FIELDS = "items(track(id,uri,name,duration_ms,artists(name),external_ids(isrc)))"
+# fields of the playlist items read to know which tracks a playlist already has.
+TRACK_ID_FIELDS = "items(track(id))"
+# fields of the playlist details read by migrations, the snapshot is used to read the tracks from the cache.
+MIGRATION_PLAYLIST_FIELDS = "name,description,snapshot_id"
+
+
+def _call_directly(func, *args):
+    return func(*args)
+
+
 class SpotifyService:
     """
     Provides services for interacting with Spotify's API using Spotipy.
@@ -21,8 +45,11 @@ class SpotifyService:
     get_user_playlists(user_id: str) -> list:
         Retrieves the playlists of the specified user.
     
-    get_playlist_tracks(user_id: str, playlist_id: str) -> list:
-        Retrieves the tracks of a specific playlist.
+    get_playlist_tracks(user_id: str, playlist_id: str, fields: str) -> list:
+        Retrieves the tracks of a specific playlist, from the cache while the playlist is unchanged.
+
+    iter_playlist_tracks(user_id: str, playlist_id: str, fields: str) -> iterator:
+        Yields the tracks of a specific playlist, page by page.
     """
 
     def __init__(self):
@@ -30,6 +57,10 @@ class SpotifyService:
         Initializes the SpotifyAuth object and sets up access to Spotify API via Spotipy.
         """
         self.spotify_auth = SpotifyAuth()
+        self.track_matcher = TrackMatcher()
+        self.profile_cache = SpotifyProfileCache()
+        self.playlist_cache = SpotifyPlaylistCache()
+        self.client_pool = SpotifyClientPool()
 
     def _get_spotify_client(self, user_id):
         """
@@ -46,8 +77,60 @@ class SpotifyService:
         token = spotify_tokens.get_access_token(user_id)
         if not token:
             raise NoRefreshTokenError()
-        return spotipy.Spotify(auth=token)
+        # clients are reused, and share the keep-alive connections of the worker process.
+        return self.client_pool.get(user_id, token)
+
+    def _raise_if_rate_limited(self, error):
+        """
+        Internal method that raises RateLimitExceededError when Spotify throttled the request (HTTP 429),
+        keeping the `Retry-After` header so callers can back off accordingly.
+
+        Parameters:
+        -----------
+        error (SpotifyException): The exception raised by Spotipy.
+        """
+        if error.http_status == 429:
+            retry_after = (error.headers or {}).get("Retry-After")
+            raise RateLimitExceededError(
+                f"Spotify rate limit exceeded: {error}",
+                retry_after=float(retry_after) if retry_after else None
+            )
+
+    def _raise_if_transient(self, error):
+        """
+        Internal method that raises RateLimitExceededError when Spotify throttled the request (HTTP 429),
+        or ProviderUnavailableError when Spotify failed to serve it (HTTP 5xx), so that read requests
+        can be retried.
+
+        Parameters:
+        -----------
+        error (SpotifyException): The exception raised by Spotipy.
+        """
+        self._raise_if_rate_limited(error)
+        if error.http_status and error.http_status >= 500:
+            retry_after = (error.headers or {}).get("Retry-After")
+            raise ProviderUnavailableError(
+                f"Spotify API unavailable: {error}",
+                retry_after=float(retry_after) if retry_after else None
+            )
+
+    def _get_profile(self, user_id, sp):
+        """
+        Internal method that returns the Spotify profile of the user, requesting it only when it is
+        not cached.
 
+        Parameters:
+        -----------
+        user_id (str): The unique user identifier.
+        sp (spotipy.Spotify): The client of the user, used on a cache miss.
+        """
+        profile = self.profile_cache.get(user_id)
+        if profile is None:
+            profile = sp.me()
+            self.profile_cache.set(user_id, profile)
+        return profile
+
+    @circuit_breaker("spotify.read")
     def get_user_info(self, user_id):
         """
         Retrieves details of the user account.
@@ -62,13 +145,18 @@ class SpotifyService:
         """
         sp = self._get_spotify_client(user_id)
         try:
-            return sp.me()
+            return self._get_profile(user_id, sp)
         except SpotifyException as e:
+            self._raise_if_transient(e)
             raise APIRequestError(f"Error retrieving details of the user account: {e}")
 
+    @circuit_breaker("spotify.read")
     def get_user_playlists(self, user_id):
         """
         Retrieves the playlists of the specified user by making a request to Spotify’s API.
+
+        Every page of the user's playlists is read, SPOTIFY_PLAYLISTS_PAGE_SIZE playlists per request,
+        and the user's profile comes from the profile cache.
         
         Parameters:
         -----------
@@ -80,18 +168,25 @@ class SpotifyService:
         """
         sp = self._get_spotify_client(user_id)
         try:
-            playlists = sp.current_user_playlists()            
+            owner_id = self._get_profile(user_id, sp)['id']
+            page = sp.current_user_playlists(limit=SPOTIFY_PLAYLISTS_PAGE_SIZE)
+            playlists = list(page['items'])
+            while page.get('next'):
+                page = sp.next(page)
+                playlists.extend(page['items'])
 
             # Filter the playlists that belong to the user.
             user_playlists = [
-                playlist for playlist in playlists['items'] if playlist != None and playlist['owner']['id'] == sp.me()['id']
+                playlist for playlist in playlists if playlist != None and playlist['owner']['id'] == owner_id
             ]
             return user_playlists
 
         except SpotifyException as e:
+            self._raise_if_transient(e)
             raise APIRequestError(f"Error retrieving playlists: {e}")
 
-    def get_playlist(self, user_id, playlist_id):
+    @circuit_breaker("spotify.read")
+    def get_playlist(self, user_id, playlist_id, fields=None):
         """
         Retrieves details of a specific playlist by its ID.
 
@@ -99,6 +194,7 @@ class SpotifyService:
         -----------
         user_id (str): The unique user identifier.
         playlist_id (str): The ID of the playlist to retrieve.
+        fields (str): Projection of the details (e.g. MIGRATION_PLAYLIST_FIELDS), None for the full playlist.
 
         Returns:
         -----------
@@ -111,9 +207,10 @@ class SpotifyService:
         sp = self._get_spotify_client(user_id)
         
         try:
-            playlist = sp.playlist(playlist_id)
+            playlist = sp.playlist(playlist_id, fields=fields)
             return playlist
         except SpotifyException as e:
+            self._raise_if_transient(e)
             if e.http_status == 404:
                 raise PlaylistNotFoundError(f"Playlist with ID '{playlist_id}' not found on Spotify.")
             elif e.http_status == 400:
@@ -121,29 +218,119 @@ class SpotifyService:
             else:
                 raise APIRequestError(f"Failed to retrieve playlist: {str(e)}")   
 
-    def get_playlist_tracks(self, user_id, playlist_id):
+    @circuit_breaker("spotify.read")
+    def _get_playlist_tracks_page(self, sp, playlist_id, offset, fields=None):
         """
-        Retrieves the tracks of the specified playlist from Spotify’s API.
-        
+        Internal method that retrieves a page of up to SPOTIFY_TRACKS_PAGE_SIZE items of a playlist.
+
+        Parameters:
+        -----------
+        sp (spotipy.Spotify): The client of the user.
+        playlist_id (str): The ID of the playlist to retrieve tracks from.
+        offset (int): Position of the first item of the page.
+        fields (str): Spotify `fields` filter of the response, None for the full items.
+        """
+        try:
+            return sp.playlist_tracks(playlist_id, fields=fields, limit=SPOTIFY_TRACKS_PAGE_SIZE, offset=offset, additional_types=("track",))
+        except SpotifyException as e:
+            self._raise_if_transient(e)
+            if e.http_status == 404:
+                raise PlaylistNotFoundError(f"Playlist with ID '{playlist_id}' not found on Spotify.")
+            else:
+                raise APIRequestError(f"Error retrieving playlist tracks: {e}")
+
+    def iter_playlist_tracks(self, user_id, playlist_id, fields=None, call_provider=None):
+        """
+        Reads every page of a playlist, yielding its items as each page arrives, so callers can
+        process the first tracks while the following pages are being requested.
+
         Parameters:
         -----------
         user_id (str): The unique user identifier.
         playlist_id (str): The ID of the playlist to retrieve tracks from.
+        fields (str): Projection of the items (e.g. MIGRATION_TRACK_FIELDS), None for the full items.
+        call_provider (callable): Makes each page request, called with the request method and its
+            arguments (e.g. under a rate limiter and retry policy). Pages are requested directly by default.
 
-        Returns: 
+        Yields:
         -----------
-        A list of tracks in the playlist.
+        dict: The items of the playlist, in order.
         """
-        sp = self._get_spotify_client(user_id)
-        try:            
-            tracks = sp.playlist_tracks(playlist_id)
-            return tracks["items"]
+        return self._iter_playlist_pages(self._get_spotify_client(user_id), playlist_id, fields, call_provider)
+
+    def _iter_playlist_pages(self, sp, playlist_id, fields=None, call_provider=None):
+        """
+        Internal method that yields the items of a playlist with the client of the user, page by page.
+        Each page is requested through `call_provider`, so a failed page is retried on its own.
+        """
+        call_provider = call_provider or _call_directly
+        # the total is needed to know when to stop, whatever the projection.
+        page_fields = f"{fields},total" if fields else None
+        offset = 0
+        while True:
+            page = call_provider(self._get_playlist_tracks_page, sp, playlist_id, offset, page_fields)
+            yield from page["items"]
+            offset += len(page["items"])
+            if not page["items"] or offset >= (page.get("total") or 0):
+                return
+
+    @circuit_breaker("spotify.read")
+    def _get_snapshot_id(self, sp, playlist_id):
+        """
+        Internal method that retrieves the current `snapshot_id` of a playlist, without its tracks.
+
+        Parameters:
+        -----------
+        sp (spotipy.Spotify): The client of the user.
+        playlist_id (str): The ID of the playlist.
+        """
+        try:
+            return sp.playlist(playlist_id, fields="snapshot_id").get("snapshot_id")
         except SpotifyException as e:
+            self._raise_if_transient(e)
             if e.http_status == 404:
                 raise PlaylistNotFoundError(f"Playlist with ID '{playlist_id}' not found on Spotify.")
+            elif e.http_status == 400:
+                raise InvalidPlaylistIDError(f"The playlist ID '{playlist_id}' is invalid.")
             else:
-                raise APIRequestError(f"Error retrieving playlist tracks: {e}")
+                raise APIRequestError(f"Failed to retrieve playlist: {str(e)}")
+
+    def get_playlist_tracks(self, user_id, playlist_id, fields=None, call_provider=None, snapshot_id=None):
+        """
+        Retrieves the tracks of the specified playlist from Spotify’s API.
 
+        The current `snapshot_id` of the playlist is requested first, unless the caller already read
+        it: while the playlist is unchanged its tracks are served from the cache instead of being read
+        page by page again. The snapshot request also checks that the user can still read the playlist.
+        
+        Parameters:
+        -----------
+        user_id (str): The unique user identifier.
+        playlist_id (str): The ID of the playlist to retrieve tracks from.
+        fields (str): Projection of the items (e.g. MIGRATION_TRACK_FIELDS), None for the full items.
+        call_provider (callable): Makes each API request of the read, see `iter_playlist_tracks`.
+        snapshot_id (str): Current snapshot of the playlist, e.g. read with `get_playlist` just before.
+
+        Returns: 
+        -----------
+        A list of all the tracks in the playlist. It may be shared with other callers and must not be modified.
+        """
+        sp = self._get_spotify_client(user_id)
+        if snapshot_id is None:
+            snapshot_id = (call_provider or _call_directly)(self._get_snapshot_id, sp, playlist_id)
+        if snapshot_id:
+            tracks = self.playlist_cache.get(playlist_id, snapshot_id, fields)
+            if tracks is not None:
+                return tracks
+
+        tracks = list(self._iter_playlist_pages(sp, playlist_id, fields, call_provider))
+        # if the playlist changed while it was read, the tracks are cached under the previous snapshot,
+        # which no read started after the change will ask for.
+        if snapshot_id:
+            self.playlist_cache.set(playlist_id, snapshot_id, fields, tracks)
+        return tracks
+
+    @circuit_breaker("spotify.write")
     def create_playlist(self, user_id, name, description, public=True):
         """
         Creates a new playlist for the specified user on Spotify.
@@ -161,12 +348,15 @@ class SpotifyService:
         """
         sp = self._get_spotify_client(user_id)
         try:
-            current_user_id = sp.me()['id']
+            current_user_id = self._get_profile(user_id, sp)['id']
             playlist = sp.user_playlist_create(user=current_user_id, name=name, description=description, public=public)            
             return playlist
         except SpotifyException as e:
+            # outages are raised as such for the circuit breaker, callers do not retry them.
+            self._raise_if_transient(e)
             raise APIRequestError(f"Error creating playlist: {e}")        
 
+    @circuit_breaker("spotify.write")
     def add_track_to_playlist(self, user_id, playlist_id, track_id):
         """
         Adds a track to the specified playlist by searching for the track on Spotify.
@@ -186,21 +376,139 @@ class SpotifyService:
         try:
             sp.playlist_add_items(playlist_id, [track_id])
         except SpotifyException as e:
+            self._raise_if_transient(e)
             if e.http_status == 404:
                 raise TrackNotFoundError(f"Track with ID '{track_id}' not found on Spotify.")
             else:
                 raise APIRequestError(f"Error adding track to playlist: {e}")  
 
+    @circuit_breaker("spotify.write")
+    def _add_playlist_items(self, sp, playlist_id, chunk):
+        """
+        Internal method that adds a chunk of up to SPOTIFY_MAX_ITEMS_PER_REQUEST tracks to a playlist.
+        Each chunk goes through the circuit breaker, so the outages of a chunked write are counted.
+
+        Parameters:
+        -----------
+        sp (spotipy.Spotify): The client of the user.
+        playlist_id (str): The ID of the playlist to add the tracks to.
+        chunk (list): The IDs or URIs of the tracks to add.
+        """
+        try:
+            return sp.playlist_add_items(playlist_id, chunk)
+        except SpotifyException as e:
+            self._raise_if_transient(e)
+            raise APIRequestError(f"Error adding tracks to playlist: {e}")
+
+    def add_tracks_to_playlist(self, user_id, playlist_id, track_ids):
+        """
+        Adds several tracks to the specified playlist, keeping their order and sending them
+        in chunks of up to SPOTIFY_MAX_ITEMS_PER_REQUEST items per request.
+
+        Parameters:
+        -----------
+        user_id (str): The unique user identifier.
+        playlist_id (str): The ID of the playlist to add the tracks to.
+        track_ids (list): The IDs or URIs of the tracks to add, in playlist order.
+
+        Returns:
+        -----------
+        list: One report per chunk, with the chunk offset, its track IDs, the playlist snapshot ID
+        after the write and an error message if the chunk could not be added.
+
+        Raises:
+        -----------
+        RateLimitExceededError: If Spotify throttled a request, so the caller can back off and retry.
+        CircuitOpenError: If Spotify writes are paused after an outage.
+        """
+        sp = self._get_spotify_client(user_id)
+        reports = []
+
+        for offset in range(0, len(track_ids), SPOTIFY_MAX_ITEMS_PER_REQUEST):
+            chunk = track_ids[offset:offset + SPOTIFY_MAX_ITEMS_PER_REQUEST]
+            try:
+                response = self._add_playlist_items(sp, playlist_id, chunk)
+                reports.append({"offset": offset, "track_ids": chunk, "snapshot_id": response.get("snapshot_id"), "error": None})
+            except (RateLimitExceededError, CircuitOpenError):
+                raise
+            except APIRequestError as e:
+                # a failed chunk does not prevent the following chunks from being added.
+                logger.error(f"Error adding tracks {offset}-{offset + len(chunk) - 1} to playlist {playlist_id}: {e}")
+                reports.append({"offset": offset, "track_ids": chunk, "snapshot_id": None, "error": str(e)})
+
+        return reports
+
+    @circuit_breaker("spotify.search")
     def search_track(self, user_id, track_query):                
         """
-        Search for a specific song by its title and return the first result.
+        Search for a song and return the result that best matches it.
+
+        A single search returns up to MATCH_CANDIDATES tracks, which are scored against the query;
+        the best one is returned with its "match_confidence".
+
+        Parameters:
+        -----------
+        user_id (str): The unique user identifier.
+        track_query (str | ParsedTitle): Free-text query, or the title and artist parsed from a
+            YouTube video, searched with a fielded query.
         """
+        if isinstance(track_query, ParsedTitle):
+            query = build_spotify_query(track_query)
+            source = {"title": track_query.title, "artist": track_query.artist, "duration": None}
+        else:
+            query = track_query
+            source = {"title": track_query, "artist": None, "duration": None}
+
         sp = self._get_spotify_client(user_id)
         try:
-            result = sp.search(track_query, limit=1, type="track")            
-            if result['tracks']['items']:
-                return result['tracks']['items'][0]
-            else:
-                raise TrackNotFoundError(f"No results found for '{track_query}'.")
+            result = sp.search(query, limit=Config.MATCH_CANDIDATES, type="track")            
+            candidates = result['tracks']['items']
+            if not candidates:
+                raise TrackNotFoundError(f"No results found for '{query}'.")
+
+            index, confidence = self.track_matcher.best_match(source, [
+                {
+                    "title": item["name"],
+                    "artist": " ".join(artist["name"] for artist in item.get("artists", [])),
+                    "duration": item.get("duration_ms", 0) / 1000 or None,
+                }
+                for item in candidates
+            ])
+            if index is None:
+                raise TrackNotFoundError(f"No confident match found for '{query}' (best confidence {confidence}).")
+
+            candidates[index]["match_confidence"] = confidence
+            return candidates[index]
+        except SpotifyException as e:
+            self._raise_if_transient(e)
+            raise APIRequestError(f"Error searching for track: {e}")
+
+    @circuit_breaker("spotify.search")
+    def search_track_by_isrc(self, user_id, isrc):
+        """
+        Search for the recording identified by an ISRC.
+
+        Parameters:
+        -----------
+        user_id (str): The unique user identifier.
+        isrc (str): The International Standard Recording Code of the track.
+
+        Returns:
+        --------
+        dict: The Spotify track, with a "match_confidence" of 1.0.
+
+        Raises:
+        -------
+        TrackNotFoundError: If no Spotify track has this ISRC.
+        """
+        sp = self._get_spotify_client(user_id)
+        try:
+            result = sp.search(f"isrc:{isrc}", limit=1, type="track")
+            if not result['tracks']['items']:
+                raise TrackNotFoundError(f"No track found for ISRC '{isrc}'.")
+            track = result['tracks']['items'][0]
+            track["match_confidence"] = 1.0
+            return track
         except SpotifyException as e:
+            self._raise_if_transient(e)
             raise APIRequestError(f"Error searching for track: {e}")       
\ No newline at end of file
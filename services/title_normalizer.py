@@ -0,0 +1,107 @@
+from collections import namedtuple
+from functools import lru_cache
+import re
+
+# title and artist of a song, parsed from a YouTube video title (artist is None when unknown).
+ParsedTitle = namedtuple("ParsedTitle", ["title", "artist"])
+
+# titles YouTube gives to the playlist items whose video is no longer available.
+UNAVAILABLE_TITLES = {"Deleted video", "Private video"}
+
+DECORATION_KEYWORDS = (
+    r"official|video|audio|lyrics?|letra|visuali[sz]er|hd|hq|4k|8k|1080p|720p|mv|m/v|clip|"
+    r"remaster(?:ed)?|explicit|clean|color coded|full album"
+)
+
+# bracketed decorations such as "(Official Music Video)" or "[4K]".
+BRACKETED_DECORATION = re.compile(
+    rf"\s*[\(\[【][^\)\]】]*\b(?:{DECORATION_KEYWORDS})\b[^\)\]】]*[\)\]】]", re.IGNORECASE
+)
+# trailing decorations without brackets such as "- Official Video" or "| Lyrics".
+TRAILING_DECORATION = re.compile(
+    r"\s*[-|–—]\s*(?:official\s+)?(?:music\s+)?(?:video|audio|lyrics?(?:\s+video)?|visuali[sz]er)\s*$", re.IGNORECASE
+)
+# featured artists, which Spotify does not always keep in the track name.
+FEATURING = re.compile(r"\s*[\(\[]?\b(?:feat|ft|featuring)\b\.?\s+[^\)\]\-–—|]*[\)\]]?", re.IGNORECASE)
+# separator between the artist and the song title ("Artist - Song").
+ARTIST_SEPARATOR = re.compile(r"\s+[-–—~|]\s+")
+QUOTES = re.compile(r"[\"“”«»]")
+TOPIC_CHANNEL = re.compile(r"\s*-\s*Topic$")
+VEVO_CHANNEL = re.compile(r"VEVO$")
+# characters with a meaning in the Spotify search syntax.
+QUERY_SPECIAL_CHARACTERS = re.compile(r"[:\"]")
+
+
+def clean_channel_title(channel_title):
+    """
+    Removes the suffixes YouTube adds to artist channels ("Artist - Topic", "ArtistVEVO").
+    """
+    channel_title = TOPIC_CHANNEL.sub("", channel_title or "")
+    return VEVO_CHANNEL.sub("", channel_title).strip()
+
+
+def _clean(text):
+    """Removes the decorations, featured artists and quotes of a title."""
+    text = BRACKETED_DECORATION.sub("", text)
+    text = TRAILING_DECORATION.sub("", text)
+    text = FEATURING.sub(" ", text)
+    text = QUOTES.sub("", text)
+    return " ".join(text.split())
+
+
+@lru_cache(maxsize=4096)
+def parse_youtube_title(title, channel_title=None):
+    """
+    Extracts the song title and artist from a YouTube video title.
+
+    "Artist - Song (Official Music Video) [4K]" becomes ParsedTitle("Song", "Artist"). Videos of
+    "Artist - Topic" channels (auto-generated by YouTube Music) are titled with the song only, so
+    the channel gives the artist. Results are memoized, as the same titles appear in many playlists.
+
+    Parameters:
+    -----------
+    title (str): The title of the video.
+    channel_title (str): The channel that uploaded the video (videoOwnerChannelTitle), if known.
+
+    Returns:
+    --------
+    ParsedTitle: The song title and artist (None when the title does not include it).
+    """
+    if channel_title and TOPIC_CHANNEL.search(channel_title):
+        return ParsedTitle(_clean(title), clean_channel_title(channel_title))
+
+    cleaned = _clean(title)
+    parts = ARTIST_SEPARATOR.split(cleaned, maxsplit=1)
+    if len(parts) == 2 and parts[0] and parts[1]:
+        return ParsedTitle(parts[1].strip(), parts[0].strip())
+
+    # VEVO channels belong to the artist even when the title is the song only.
+    if channel_title and VEVO_CHANNEL.search(channel_title):
+        return ParsedTitle(cleaned, clean_channel_title(channel_title))
+    return ParsedTitle(cleaned, None)
+
+
+def parse_playlist_item(item):
+    """
+    Parses a YouTube playlist item.
+
+    Returns:
+    --------
+    ParsedTitle: The song title and artist, or None if the video was deleted or made private.
+    """
+    snippet = item.get("snippet", {})
+    title = snippet.get("title")
+    if not title or title in UNAVAILABLE_TITLES:
+        return None
+    return parse_youtube_title(title, snippet.get("videoOwnerChannelTitle"))
+
+
+def build_spotify_query(parsed):
+    """
+    Builds a fielded Spotify search query ("track:Song artist:Artist") from a parsed title.
+    """
+    title = QUERY_SPECIAL_CHARACTERS.sub(" ", parsed.title)
+    if not parsed.artist:
+        return f"track:{title}"
+    artist = QUERY_SPECIAL_CHARACTERS.sub(" ", parsed.artist)
+    return f"track:{title} artist:{artist}"
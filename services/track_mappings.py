@@ -0,0 +1,80 @@
+from database.redis_connection import get_redis_connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+# mapping value of the source tracks that had no match on the target platform.
+NOT_FOUND = ""
+
+
+class TrackMappingStore:
+    """
+    Stores, for every migrated playlist, the playlist created on the target platform and the
+    mapping between source track IDs and target track IDs.
+
+    The mappings are kept without expiration so later syncs only search the tracks that were
+    added to the source playlist since the last migration.
+
+    Methods:
+    --------
+    get_target_playlist(user_id: int, direction: str, playlist_id: str) -> str:
+        Retrieves the ID of the target playlist linked to a source playlist.
+
+    set_target_playlist(user_id: int, direction: str, playlist_id: str, target_playlist_id: str):
+        Links a source playlist to its target playlist.
+
+    get_mappings(user_id: int, direction: str, playlist_id: str) -> dict:
+        Retrieves the source track ID -> target track ID mapping of a playlist.
+
+    add_mappings(user_id: int, direction: str, playlist_id: str, mappings: dict):
+        Adds track mappings to a playlist.
+    """
+
+    def _link_key(self, user_id, direction, playlist_id):
+        return f"sync_link:{user_id}:{direction}:{playlist_id}"
+
+    def _mappings_key(self, user_id, direction, playlist_id):
+        return f"track_mapping:{user_id}:{direction}:{playlist_id}"
+
+    def get_target_playlist(self, user_id, direction, playlist_id):
+        """
+        Retrieves the ID of the target playlist linked to a source playlist.
+
+        Parameters:
+        -----------
+        user_id (int): The unique user identifier.
+        direction (str): Either "spotify-to-youtube" or "youtube-to-spotify".
+        playlist_id (str): The ID of the source playlist.
+
+        Returns:
+        --------
+        str: The ID of the target playlist, or None if the playlist was never migrated.
+        """
+        return redis.get(self._link_key(user_id, direction, playlist_id))
+
+    def set_target_playlist(self, user_id, direction, playlist_id, target_playlist_id):
+        """Links a source playlist to the playlist created for it on the target platform."""
+        redis.set(self._link_key(user_id, direction, playlist_id), target_playlist_id)
+
+    def get_mappings(self, user_id, direction, playlist_id):
+        """
+        Retrieves the track mappings of a playlist.
+
+        Returns:
+        --------
+        dict: Target track IDs (or NOT_FOUND) keyed by source track ID.
+        """
+        return redis.hgetall(self._mappings_key(user_id, direction, playlist_id)) or {}
+
+    def add_mappings(self, user_id, direction, playlist_id, mappings):
+        """
+        Adds track mappings to a playlist.
+
+        Parameters:
+        -----------
+        mappings (dict): Target track IDs (or NOT_FOUND) keyed by source track ID.
+        """
+        if mappings:
+            redis.hset(self._mappings_key(user_id, direction, playlist_id), values=mappings)
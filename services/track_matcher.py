@@ -0,0 +1,100 @@
+from fuzzywuzzy import fuzz
+from services.match_cache import normalize_text
+from config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# weight of each similarity in the confidence of a match.
+MATCH_WEIGHTS = {"title": 0.6, "artist": 0.25, "duration": 0.15}
+
+# difference in seconds from which two durations are considered unrelated.
+DURATION_TOLERANCE = 30
+
+
+class TrackMatcher:
+    """
+    Scores the candidates returned by a track search against the source track and picks the best one.
+
+    Tracks are described as dictionaries with a "title", an "artist" and a "duration" in seconds;
+    any of the last two can be None when the platform does not provide it, in which case its weight
+    is spread over the other similarities.
+
+    Methods:
+    --------
+    score(source: dict, candidates: list) -> list:
+        Computes the confidence (0 to 1) of every candidate.
+
+    best_match(source: dict, candidates: list) -> tuple:
+        Returns the index and confidence of the best candidate above the threshold.
+    """
+
+    def __init__(self, min_confidence=None):
+        """
+        Parameters:
+        -----------
+        min_confidence (float): Confidence below which no candidate is accepted.
+        """
+        self.min_confidence = Config.MATCH_MIN_CONFIDENCE if min_confidence is None else min_confidence
+
+    def score(self, source, candidates):
+        """
+        Computes the confidence of every candidate in a single pass, normalizing the source track once.
+
+        Parameters:
+        -----------
+        source (dict): The track being migrated.
+        candidates (list): The tracks returned by the search.
+
+        Returns:
+        --------
+        list: The confidence of each candidate, between 0 and 1.
+        """
+        title = normalize_text(source.get("title"))
+        artist = normalize_text(source.get("artist"))
+        duration = source.get("duration")
+
+        scores = []
+        for candidate in candidates:
+            candidate_title = normalize_text(candidate.get("title"))
+            candidate_artist = normalize_text(candidate.get("artist"))
+            similarities = {}
+
+            if artist:
+                similarities["title"] = fuzz.token_set_ratio(title, candidate_title)
+                # video titles often carry the artist name ("Artist - Song") while the channel does not.
+                similarities["artist"] = max(
+                    fuzz.token_set_ratio(artist, candidate_artist),
+                    fuzz.partial_ratio(artist, candidate_title)
+                )
+            else:
+                # the source title is free text (e.g. a video title) that may include the artist.
+                similarities["title"] = fuzz.token_set_ratio(title, f"{candidate_artist} {candidate_title}")
+
+            if duration and candidate.get("duration"):
+                difference = abs(duration - candidate["duration"])
+                similarities["duration"] = max(0, 100 - difference * 100 / DURATION_TOLERANCE)
+
+            total_weight = sum(MATCH_WEIGHTS[name] for name in similarities)
+            weighted = sum(MATCH_WEIGHTS[name] * value for name, value in similarities.items())
+            scores.append(round(weighted / total_weight / 100, 3))
+        return scores
+
+    def best_match(self, source, candidates):
+        """
+        Picks the candidate with the highest confidence.
+
+        Returns:
+        --------
+        tuple: (index, confidence) of the best candidate, index being None if no candidate
+            reaches the minimum confidence.
+        """
+        if not candidates:
+            return None, 0.0
+
+        scores = self.score(source, candidates)
+        best = max(range(len(scores)), key=scores.__getitem__)
+        if scores[best] < self.min_confidence:
+            logger.info(f"No confident match for '{source.get('title')}' (best confidence {scores[best]}).")
+            return None, scores[best]
+        return best, scores[best]
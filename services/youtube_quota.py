@@ -0,0 +1,247 @@
+from database.redis_connection import get_redis_connection
+from config import Config
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+# quota units charged by the YouTube Data API for each method used by the application.
+QUOTA_COSTS = {
+    "channels.list": 1,
+    "playlists.list": 1,
+    "playlists.insert": 50,
+    "playlistItems.list": 1,
+    "playlistItems.insert": 50,
+    "search.list": 100,
+    "videos.list": 1,
+}
+
+# searching a track also reads the duration of its candidates (videos.list).
+TRACK_SEARCH_COST = QUOTA_COSTS["search.list"] + QUOTA_COSTS["videos.list"]
+TRACK_MIGRATION_COST = TRACK_SEARCH_COST + QUOTA_COSTS["playlistItems.insert"]
+
+# the daily quota is reset at midnight Pacific Time.
+try:
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+except ZoneInfoNotFoundError:
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+# reservations of the operations running in this process, per user. The calls of a user are
+# charged to their reservation as they are recorded, so they are not counted twice.
+_reservations = {}
+_reservations_lock = threading.Lock()
+
+
+def estimate_migration_cost(tracks, create_playlist=True, matched_tracks=0):
+    """
+    Estimates the quota units needed to migrate tracks to YouTube: a search and an insert per
+    track, an insert per track already matched (e.g. by a preview), plus the creation of the
+    playlist. Tracks resolved by the match cache or by ISRC are not searched, so the actual
+    cost is usually lower.
+    """
+    return (tracks * TRACK_MIGRATION_COST + matched_tracks * QUOTA_COSTS["playlistItems.insert"]
+            + (QUOTA_COSTS["playlists.insert"] if create_playlist else 0))
+
+
+def seconds_until_quota_reset(now=None):
+    """Returns the seconds until the next midnight Pacific Time, when the daily quota is reset."""
+    now = now or datetime.now(QUOTA_TIMEZONE)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+class YouTubeQuotaReservation:
+    """
+    Quota units reserved by an operation for the day it was admitted. `remaining` is the part of
+    the reservation the calls of the operation have not been charged to yet.
+    """
+
+    def __init__(self, key, user_id, units):
+        self.key = key
+        self.user_id = str(user_id)
+        self.remaining = units
+
+
+class YouTubeQuotaLedger:
+    """
+    Records the quota units spent on the YouTube Data API, with daily totals for the whole
+    application and for every user, so migrations can be admitted against the remaining budget.
+
+    Totals are kept in one Redis hash per quota day, which expires once the day is over. Operations
+    reserve their estimated cost before starting ("reserved:" fields), so concurrent operations
+    cannot all be admitted against the same remaining budget.
+
+    Methods:
+    --------
+    record(user_id: int, method: str):
+        Records the cost of an API call.
+
+    get_usage(user_id: int) -> dict:
+        Retrieves the units spent today and the remaining budget.
+
+    reserve(user_id: int, units: int) -> YouTubeQuotaReservation:
+        Reserves the estimated cost of an operation if it fits the remaining budget.
+
+    release(reservation: YouTubeQuotaReservation):
+        Releases the units of a reservation the operation did not use.
+
+    seconds_until_reset() -> int:
+        Seconds until the daily quota is reset.
+    """
+
+    def __init__(self, daily_quota=None, user_daily_quota=None, clock=None):
+        """
+        Parameters:
+        -----------
+        daily_quota (int): Units available per day for the whole application.
+        user_daily_quota (int): Units available per day for each user.
+        """
+        self.daily_quota = daily_quota or Config.YOUTUBE_DAILY_QUOTA
+        self.user_daily_quota = user_daily_quota or Config.YOUTUBE_USER_DAILY_QUOTA
+        self._clock = clock or (lambda: datetime.now(QUOTA_TIMEZONE))
+
+    def _key(self):
+        return f"youtube_quota:{self._clock().date().isoformat()}"
+
+    def record(self, user_id, method):
+        """
+        Records the cost of an API call. YouTube also charges failed requests, so calls are
+        recorded before being executed.
+
+        Parameters:
+        -----------
+        user_id (int): The unique user identifier.
+        method (str): The API method called (e.g. "search.list").
+        """
+        units = QUOTA_COSTS.get(method, 1)
+        key = self._key()
+        reservation, charged = self._charge_reservation(user_id, units)
+        try:
+            # a single round trip per call.
+            pipeline = redis.pipeline()
+            pipeline.hincrby(key, "app", units)
+            pipeline.hincrby(key, f"user:{user_id}", units)
+            if charged:
+                # the units move from the reservation to the usage.
+                pipeline.hincrby(reservation.key, "reserved:app", -charged)
+                pipeline.hincrby(reservation.key, f"reserved:user:{user_id}", -charged)
+            pipeline.expire(key, 2 * 24 * 60 * 60)
+            pipeline.exec()
+        except Exception as e:
+            # the ledger must never fail an API call.
+            logger.warning(f"YouTube quota ledger unavailable: {e}")
+
+    def get_usage(self, user_id):
+        """
+        Retrieves the units spent and reserved today.
+
+        Returns:
+        --------
+        dict: Units used, reserved, limit and remaining budget of the application ("app") and of
+            the user ("user"), and the seconds until the quota is reset.
+        """
+        try:
+            values = redis.hmget(self._key(), "app", f"user:{user_id}", "reserved:app", f"reserved:user:{user_id}")
+        except Exception as e:
+            logger.warning(f"YouTube quota ledger unavailable: {e}")
+            values = [None] * 4
+        app_used, user_used, app_reserved, user_reserved = (int(value or 0) for value in values)
+        return {
+            "app": self._scope_usage(app_used, app_reserved, self.daily_quota),
+            "user": self._scope_usage(user_used, user_reserved, self.user_daily_quota),
+            "resets_in": self.seconds_until_reset(),
+        }
+
+    def _scope_usage(self, used, reserved, limit):
+        return {"used": used, "reserved": reserved, "limit": limit, "remaining": max(0, limit - used - reserved)}
+
+    def reserve(self, user_id, units):
+        """
+        Reserves the estimated cost of an operation if it fits the remaining budget of the
+        application and of the user, once the reservations of the other operations are deducted.
+
+        The reservation is added before the budget is checked, with a single round trip, so two
+        operations admitted at the same time always see each other. An operation that does not
+        fit in a whole day of quota is admitted with a full budget, and continues from its
+        checkpoint on the following days. The calls of the user are charged to the reservation
+        as they are recorded; the operation must `release` it when it finishes.
+
+        Parameters:
+        -----------
+        user_id (int): The unique user identifier.
+        units (int): The estimated cost of the operation.
+
+        Returns:
+        --------
+        YouTubeQuotaReservation: The reservation, or None if the operation does not fit.
+        """
+        key = self._key()
+        units = min(units, self.daily_quota, self.user_daily_quota)
+        try:
+            pipeline = redis.pipeline()
+            pipeline.hincrby(key, "reserved:app", units)
+            pipeline.hincrby(key, f"reserved:user:{user_id}", units)
+            pipeline.hmget(key, "app", f"user:{user_id}")
+            pipeline.expire(key, 2 * 24 * 60 * 60)
+            app_reserved, user_reserved, (app_used, user_used), _ = pipeline.exec()
+        except Exception as e:
+            # without the ledger, operations are admitted without a reservation.
+            logger.warning(f"YouTube quota ledger unavailable: {e}")
+            return YouTubeQuotaReservation(None, user_id, 0)
+
+        reservation = YouTubeQuotaReservation(key, user_id, units)
+        if (int(app_used or 0) + int(app_reserved) > self.daily_quota
+                or int(user_used or 0) + int(user_reserved) > self.user_daily_quota):
+            self._release_units(reservation)
+            return None
+        with _reservations_lock:
+            _reservations.setdefault(reservation.user_id, []).append(reservation)
+        return reservation
+
+    def release(self, reservation):
+        """
+        Releases the units of a reservation that were not charged to the calls of the operation.
+
+        Parameters:
+        -----------
+        reservation (YouTubeQuotaReservation): The reservation returned by `reserve`.
+        """
+        with _reservations_lock:
+            held = _reservations.get(reservation.user_id, [])
+            if reservation in held:
+                held.remove(reservation)
+            if not held:
+                _reservations.pop(reservation.user_id, None)
+        self._release_units(reservation)
+
+    def _release_units(self, reservation):
+        with _reservations_lock:
+            units, reservation.remaining = reservation.remaining, 0
+        if not units:
+            return
+        try:
+            pipeline = redis.pipeline()
+            pipeline.hincrby(reservation.key, "reserved:app", -units)
+            pipeline.hincrby(reservation.key, f"reserved:user:{reservation.user_id}", -units)
+            pipeline.exec()
+        except Exception as e:
+            # the reservation expires with the quota day.
+            logger.warning(f"YouTube quota ledger unavailable: {e}")
+
+    def _charge_reservation(self, user_id, units):
+        """Takes up to `units` from the first reservation of the user with units left."""
+        with _reservations_lock:
+            for reservation in _reservations.get(str(user_id), []):
+                if reservation.remaining:
+                    charged = min(units, reservation.remaining)
+                    reservation.remaining -= charged
+                    return reservation, charged
+        return None, 0
+
+    def seconds_until_reset(self):
+        """Returns the seconds until the next midnight Pacific Time."""
+        return seconds_until_quota_reset(self._clock())
@@ -1,13 +1,42 @@
-from googleapiclient.discovery import build
+from connection.google_clients import build
 from googleapiclient.errors import HttpError
 from token_handler.youtube_tokens import YouTubeTokenHandler
 from errors.youtube_exceptions import *
-from concurrent.futures import ThreadPoolExecutor
+from services.track_matcher import TrackMatcher
+from extensions.circuit_breaker import circuit_breaker
+from services.title_normalizer import clean_channel_title
+from services.youtube_quota import YouTubeQuotaLedger
+from config import Config
+import re
 import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+# maximum number of items YouTube returns in a single page of a playlist or of the user's playlists.
+YOUTUBE_MAX_RESULTS = 50
+# fields of the playlist items read by migrations: the title, the uploader and the video ID.
+MIGRATION_ITEM_FIELDS = "items(snippet(title,videoOwnerChannelTitle,resourceId/videoId))"
+# fields of the playlist items read to know which videos a playlist already has.
+VIDEO_ID_FIELDS = "items(snippet(resourceId/videoId))"
+
+
+def parse_duration(value):
+    """
+    Converts an ISO 8601 video duration (e.g. "PT3M25S") to seconds.
+    """
+    match = re.fullmatch(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?", value or "")
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def _call_directly(func, *args):
+    return func(*args)
+
+
 class YouTubeService:
     """
     Service layer for interacting with the YouTube API.   
@@ -16,6 +45,21 @@ class YouTubeService:
         self.api_service_name = "youtube"
         self.api_version = "v3"
         self.youtube_tokens = YouTubeTokenHandler()
+        self.track_matcher = TrackMatcher()
+        self.quota_ledger = YouTubeQuotaLedger()
+
+    def _execute(self, user_id, method, request):
+        """
+        Executes an API request, recording its quota cost in the ledger.
+
+        Parameters:
+        -----------
+        user_id (str): The unique user identifier.
+        method (str): The API method of the request (e.g. "search.list").
+        request: The request built by the API client.
+        """
+        self.quota_ledger.record(user_id, method)
+        return request.execute()
 
     def get_auth_url(self):
         """
@@ -39,6 +83,7 @@ class YouTubeService:
         """
         self.youtube_tokens.revoke_tokens(user_id)
 
+    @circuit_breaker("youtube.read")
     def get_user_account_info(self, user_id):
         """
         Retrieves account details of the authenticated YouTube user.
@@ -64,7 +109,7 @@ class YouTubeService:
                 part="snippet,statistics",
                 mine=True
             )
-            response = request.execute()            
+            response = self._execute(user_id, "channels.list", request)            
             return response["items"][0]
         except HttpError as e:
             logger.error(f"HTTP Error occurred while retrieving account info: {e}")
@@ -73,10 +118,12 @@ class YouTubeService:
             logger.error(f"An unexpected error occurred while retrieving account info: {e}")
             raise    
 
+    @circuit_breaker("youtube.read")
     def get_user_playlists_list(self, user_id):       
         """
         get_user_playlists(user_id):
-        Retrieves a list of YouTube playlists for the authenticated user.
+        Retrieves a list of YouTube playlists for the authenticated user, reading every page
+        of YOUTUBE_MAX_RESULTS playlists (1 quota unit each).
         Returns:
             list: A list of playlists .
         Raises:
@@ -87,15 +134,21 @@ class YouTubeService:
             token = self.youtube_tokens.get_valid_access_token(user_id)
                         
             youtube = build(self.api_service_name, self.api_version, credentials=token)
-            request = youtube.playlists().list(part="snippet", mine=True)
-            response = request.execute()
-            return response['items']
+            playlists, page_token = [], None
+            while True:
+                request = youtube.playlists().list(part="snippet", mine=True, maxResults=YOUTUBE_MAX_RESULTS, pageToken=page_token)
+                response = self._execute(user_id, "playlists.list", request)
+                playlists.extend(response.get('items', []))
+                page_token = response.get("nextPageToken")
+                if not page_token:
+                    return playlists
         except HttpError as e:
             self.handle_http_error(e)
         except Exception as e:
             logger.error(f"An unexpected error occurred getting playlists: {e}")
             raise YouTubeUnexpectedError(f"An unexpected error occurred: {str(e)}")                    
 
+    @circuit_breaker("youtube.read")
     def get_playlist(self, user_id, playlist_id):
         """
         Retrieves details of a specific YouTube playlist by its ID.
@@ -119,7 +172,7 @@ class YouTubeService:
             youtube = build(self.api_service_name, self.api_version, credentials=token)               
 
             request = youtube.playlists().list(part="snippet", id=playlist_id)
-            response = request.execute()
+            response = self._execute(user_id, "playlists.list", request)
 
             return response
 
@@ -134,21 +187,24 @@ class YouTubeService:
             logger.error(f"HTTP Error occurred: {e}")
             raise           
                 
-    def get_playlist_tracks(self, user_id, playlist_id):   
+    @circuit_breaker("youtube.read")
+    def _get_playlist_items_page(self, youtube, user_id, playlist_id, page_token=None, fields=None):
         """
-        get_playlist_tracks(user_id, playlist_id):
-        Retrieves the tracks from a specific YouTube playlist.
+        Retrieves a page of up to YOUTUBE_MAX_RESULTS items of a playlist (1 quota unit per page).
+
         Parameters:
         -----------
+        youtube: The API client of the user.
+        user_id (str): The unique user identifier.
         playlist_id (str): The ID of the playlist.
-        """   
+        page_token (str): Token of the page, None for the first one.
+        fields (str): Projection of the response, None for the full items.
+        """
         try:
-            token = self.youtube_tokens.get_valid_access_token(user_id)
-            
-            youtube = build(self.api_service_name, self.api_version, credentials=token)
-            request = youtube.playlistItems().list(part="snippet", playlistId=playlist_id)
-            response = request.execute()
-            return response['items']
+            request = youtube.playlistItems().list(
+                part="snippet", playlistId=playlist_id, maxResults=YOUTUBE_MAX_RESULTS, pageToken=page_token, fields=fields
+            )
+            return self._execute(user_id, "playlistItems.list", request)
 
         except HttpError as e:
             self.handle_http_error(e)
@@ -157,6 +213,46 @@ class YouTubeService:
             logger.error(f"An unexpected error occurred getting playlist tracks: {e}")
             raise YouTubeUnexpectedError(f"An unexpected error occurred: {str(e)}")
 
+    def iter_playlist_tracks(self, user_id, playlist_id, fields=None, call_provider=None):
+        """
+        Reads every page of a playlist, yielding its items as each page arrives, so callers can
+        process the first tracks while the following pages are being requested.
+
+        Parameters:
+        -----------
+        user_id (str): The unique user identifier.
+        playlist_id (str): The ID of the playlist.
+        fields (str): Projection of the items (e.g. MIGRATION_ITEM_FIELDS), None for the full items.
+        call_provider (callable): Makes each page request, called with the request method and its
+            arguments (e.g. under a rate limiter and retry policy), so a failed page is retried on its
+            own without spending quota on the pages already read. Pages are requested directly by default.
+        """
+        call_provider = call_provider or _call_directly
+        token = self.youtube_tokens.get_valid_access_token(user_id)
+        youtube = build(self.api_service_name, self.api_version, credentials=token)
+        # the page token is needed to read the next page, whatever the projection.
+        page_fields = f"nextPageToken,{fields}" if fields else None
+        page_token = None
+        while True:
+            response = call_provider(self._get_playlist_items_page, youtube, user_id, playlist_id, page_token, page_fields)
+            yield from response.get("items", [])
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return
+
+    def get_playlist_tracks(self, user_id, playlist_id, fields=None, call_provider=None):
+        """
+        get_playlist_tracks(user_id, playlist_id):
+        Retrieves all the tracks from a specific YouTube playlist.
+        Parameters:
+        -----------
+        playlist_id (str): The ID of the playlist.
+        fields (str): Projection of the items (e.g. MIGRATION_ITEM_FIELDS), None for the full items.
+        call_provider (callable): Makes each page request, see `iter_playlist_tracks`.
+        """
+        return list(self.iter_playlist_tracks(user_id, playlist_id, fields, call_provider))
+
+    @circuit_breaker("youtube.write")
     def create_playlist(self, user_id, title, description, privacy_status="public"):        
         """
         Creates a new YouTube playlist.
@@ -194,7 +290,7 @@ class YouTubeService:
                     }
                 }
             )
-            response = request.execute()            
+            response = self._execute(user_id, "playlists.insert", request)            
             return response        
         except HttpError as e:
             self.handle_http_error(e)
@@ -202,6 +298,7 @@ class YouTubeService:
             logger.error(f"An unexpected error occurred creating playlist: {e}")
             raise YouTubeUnexpectedError(f"An unexpected error occurred: {str(e)}")
 
+    @circuit_breaker("youtube.write")
     def add_track_to_playlist(self, user_id, playlist_id, video_id):
         """
         Adds a video to a specified YouTube playlist.
@@ -236,7 +333,7 @@ class YouTubeService:
                     }
                 }
             )
-            response = request.execute()
+            response = self._execute(user_id, "playlistItems.insert", request)
             return response
         except HttpError as e:
             self.handle_http_error(e)
@@ -245,18 +342,23 @@ class YouTubeService:
             raise YouTubeUnexpectedError(f"An unexpected error occurred: {str(e)}")            
 
 
+    @circuit_breaker("youtube.search")
     def search_track(self, user_id, track):
         """
-        Search on YouTube with specific filters to get audio-only videos or music tracks.
+        Search on YouTube for a Spotify track and return the video that best matches it.
+
+        A single search returns up to MATCH_CANDIDATES videos, which are scored against the track
+        title, artist and duration (read in one batched videos().list call, 1 quota unit).
 
         Parameters:
         -----------
         user_id (str): The unique identifier of the user.
-        query (str): The search query, which includes the song name and artist.
+        track (dict): The Spotify playlist item to search, including the song name and artist.
 
         Returns:
         --------
-        dict: YouTube search results.
+        dict: The best YouTube search result, with its "match_confidence", or None if no video
+            matched the track with enough confidence.
         """
         try:
             token = self.youtube_tokens.get_valid_access_token(user_id)
@@ -270,18 +372,58 @@ class YouTubeService:
                 part="snippet",
                 q=f"{query}",
                 type="video",
-                maxResults=1,
+                maxResults=Config.MATCH_CANDIDATES,
                 order="relevance",            
             )
-            response = request.execute()           
+            response = self._execute(user_id, "search.list", request)           
+
+            # no video matched the query.
+            if not response["items"]:
+                return None
 
-            return response["items"][0]     
+            candidates = response["items"]
+            durations = self.get_video_durations(youtube, [item["id"]["videoId"] for item in candidates], user_id)
+
+            source = {"title": track_name, "artist": artist, "duration": (track["track"].get("duration_ms") or 0) / 1000 or None}
+            index, confidence = self.track_matcher.best_match(source, [
+                {
+                    "title": item["snippet"]["title"],
+                    "artist": clean_channel_title(item["snippet"].get("channelTitle")),
+                    "duration": durations.get(item["id"]["videoId"]),
+                }
+                for item in candidates
+            ])
+            if index is None:
+                return None
+
+            candidates[index]["match_confidence"] = confidence
+            return candidates[index]
 
         except HttpError as e:
             self.handle_http_error(e)
         except Exception as e:
             logger.error(f"An unexpected error occurred searching track: {e}")
             raise YouTubeUnexpectedError(f"An unexpected error occurred: {str(e)}")        
+
+    def get_video_durations(self, youtube, video_ids, user_id=None):
+        """
+        Retrieves the duration of several videos in a single request.
+
+        Parameters:
+        -----------
+        youtube: The YouTube API client.
+        video_ids (list): IDs of the videos (up to 50).
+        user_id (str): The user the request is made for, charged in the quota ledger.
+
+        Returns:
+        --------
+        dict: Duration in seconds keyed by video ID.
+        """
+        response = self._execute(user_id, "videos.list", youtube.videos().list(part="contentDetails", id=",".join(video_ids)))
+        return {
+            item["id"]: parse_duration(item["contentDetails"]["duration"])
+            for item in response.get("items", [])
+        }
  
     def handle_http_error(self, error):
         """Handles HTTP errors from YouTube API and raises specific exceptions."""
@@ -291,13 +433,32 @@ class YouTubeService:
         elif error.resp.status == 404:
             logger.error(f"Resource not found: {error}")
             raise YouTubeNotFoundError("Requested YouTube resource not found.")
+        elif error.resp.status == 429 or (error.resp.status == 403 and self._is_rate_limit_error(error)):
+            logger.warning(f"Rate limit exceeded: {error}")
+            retry_after = error.resp.get("retry-after")
+            raise YouTubeRateLimitError("YouTube API rate limit exceeded.", retry_after=float(retry_after) if retry_after else None)
         elif error.resp.status == 403 and 'quota' in str(error):
             logger.error(f"Quota exceeded: {error}")
             raise YouTubeQuotaExceededError("YouTube API quota exceeded.")
         elif error.resp.status == 400:
             logger.error(f"Invalid request: {error}")
             raise YouTubeInvalidRequestError("Invalid request to YouTube API.")
+        elif error.resp.status >= 500 or "backendError" in self._error_reasons(error):
+            logger.warning(f"YouTube API unavailable: {error}")
+            retry_after = error.resp.get("retry-after")
+            raise YouTubeBackendError("YouTube API temporarily unavailable.", retry_after=float(retry_after) if retry_after else None)
         else:
             logger.error(f"Unexpected HTTP error: {error}")
             raise YouTubeAPIError(f"Unexpected YouTube API error: {error}")
-          
+
+    def _error_reasons(self, error):
+        """Returns the reasons (rateLimitExceeded, backendError...) given by YouTube for an error."""
+        details = error.error_details if isinstance(error.error_details, list) else []
+        return {detail.get("reason") for detail in details if isinstance(detail, dict)}
+
+    def _is_rate_limit_error(self, error):
+        """Checks whether a 403 error was caused by throttling rather than by the daily quota."""
+        reasons = self._error_reasons(error)
+        if reasons:
+            return bool(reasons & {"rateLimitExceeded", "userRateLimitExceeded"})
+        return "rateLimitExceeded" in str(error)
@@ -0,0 +1,106 @@
+import threading
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the Upstash Redis client used in tests.
+
+    Only implements the commands used by the application. Expiration times are
+    recorded but never enforced.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self.data.get(key)
+
+    def mget(self, *keys):
+        with self._lock:
+            return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, nx=None, ex=None):
+        with self._lock:
+            if nx and key in self.data:
+                return None
+            self.data[key] = value
+            if ex:
+                self.ttls[key] = ex
+            return True
+
+    def setex(self, key, seconds, value):
+        return self.set(key, value, ex=seconds)
+
+    def delete(self, *keys):
+        with self._lock:
+            deleted = 0
+            for key in keys:
+                if self.data.pop(key, None) is not None:
+                    deleted += 1
+                self.ttls.pop(key, None)
+            return deleted
+
+    def incr(self, key):
+        with self._lock:
+            self.data[key] = int(self.data.get(key, 0)) + 1
+            return self.data[key]
+
+    def expire(self, key, seconds):
+        with self._lock:
+            self.ttls[key] = seconds
+            return key in self.data
+
+    def hset(self, key, field=None, value=None, values=None):
+        with self._lock:
+            fields = dict(values or {})
+            if field is not None:
+                fields[field] = value
+            hash_ = self.data.setdefault(key, {})
+            added = len(set(fields) - set(hash_))
+            hash_.update(fields)
+            return added
+
+    def hget(self, key, field):
+        with self._lock:
+            return self.data.get(key, {}).get(field)
+
+    def hgetall(self, key):
+        with self._lock:
+            return dict(self.data.get(key, {}))
+
+    def hmget(self, key, *fields):
+        with self._lock:
+            hash_ = self.data.get(key, {})
+            return [hash_.get(field) for field in fields]
+
+    def hincrby(self, key, field, increment):
+        with self._lock:
+            hash_ = self.data.setdefault(key, {})
+            hash_[field] = int(hash_.get(field, 0)) + increment
+            return hash_[field]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them on exec(), like the Upstash pipeline."""
+
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self._redis, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def exec(self):
+        commands, self._commands = self._commands, []
+        return [command(*args, **kwargs) for command, args, kwargs in commands]
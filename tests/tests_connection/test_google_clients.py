@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import patch
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import UnknownApiNameOrVersion
+from connection import google_clients
+from connection.google_clients import build, get_discovery_document
+
+class TestGoogleClients(unittest.TestCase):
+    def setUp(self):
+        # every test loads the documents again.
+        patcher = patch.dict(google_clients._documents, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_document_is_loaded_once(self):
+        """The bundled document is read and parsed once, whatever the number of clients."""
+        with patch('connection.google_clients.get_static_doc', wraps=google_clients.get_static_doc) as mock_get_static_doc:
+            build("youtube", "v3", credentials=Credentials("token"))
+            build("youtube", "v3", credentials=Credentials("other_token"))
+            self.assertIs(get_discovery_document("youtube", "v3"), get_discovery_document("youtube", "v3"))
+        mock_get_static_doc.assert_called_once_with("youtube", "v3")
+
+    def test_clients_are_bound_to_their_credentials(self):
+        """Every call gets its own client, authorized with the credentials of its user."""
+        first = build("youtube", "v3", credentials=Credentials("token"))
+        second = build("youtube", "v3", credentials=Credentials("other_token"))
+        self.assertIsNot(first._http, second._http)
+        self.assertEqual(first._http.credentials.token, "token")
+        self.assertEqual(second._http.credentials.token, "other_token")
+
+        request = first.search().list(part="snippet", q="song", maxResults=5)
+        self.assertTrue(request.uri.startswith("https://youtube.googleapis.com/youtube/v3/search?"))
+        self.assertIn("q=song", request.uri)
+
+    def test_document_is_completed_before_being_shared(self):
+        """The common parameters are added to every method when the document is loaded."""
+        document = get_discovery_document("youtube", "v3")
+        self.assertIn("fields", document["resources"]["playlistItems"]["methods"]["list"]["parameters"])
+        self.assertIn("body", document["resources"]["playlists"]["methods"]["insert"]["parameters"])
+
+    def test_unknown_api(self):
+        with self.assertRaises(UnknownApiNameOrVersion):
+            build("unknown", "v1", credentials=Credentials("token"))
+
+if __name__ == '__main__':
+    unittest.main()
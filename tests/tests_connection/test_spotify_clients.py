@@ -0,0 +1,41 @@
+import gc
+import unittest
+from unittest.mock import patch
+from connection.spotify_clients import SpotifyClientPool, get_http_session
+
+class TestSpotifyClientPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = SpotifyClientPool(maxsize=2)
+
+    def test_clients_are_reused_and_share_the_session(self):
+        """The same user and token get the same client, and every client shares the process session."""
+        client = self.pool.get(1, "token")
+        self.assertIs(self.pool.get(1, "token"), client)
+        self.assertIs(client._session, get_http_session())
+        self.assertIs(self.pool.get(2, "other_token")._session, client._session)
+
+    def test_rotated_token_replaces_the_client(self):
+        client = self.pool.get(1, "token")
+        refreshed = self.pool.get(1, "refreshed_token")
+        self.assertIsNot(refreshed, client)
+        self.assertEqual(refreshed._auth, "refreshed_token")
+        self.assertIs(self.pool.get(1, "refreshed_token"), refreshed)
+
+    def test_pool_is_bounded(self):
+        """The least recently used client is evicted once the pool is full."""
+        first = self.pool.get(1, "token")
+        self.pool.get(2, "token")
+        self.pool.get(3, "token")
+        self.assertIsNot(self.pool.get(1, "token"), first)
+
+    def test_released_clients_do_not_close_the_shared_session(self):
+        session = get_http_session()
+        with patch('requests.Session.close') as close:
+            self.pool.get(1, "token")
+            self.pool.evict(1)
+            gc.collect()
+        close.assert_not_called()
+        self.assertIs(get_http_session(), session)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from unittest.mock import patch
+from controllers.migration_controller import stream_job_events
+from extensions.event_bus import get_event_bus
+
+class TestStreamJobEvents(unittest.TestCase):
+    def setUp(self):
+        self.job = {"id": "job1", "status": "running", "progress": {"total": 2, "processed": 0, "migrated": 0}}
+
+    @patch('controllers.migration_controller.Config.MIGRATION_EVENTS_KEEPALIVE', 0)
+    @patch('controllers.migration_controller.migration_jobs.get_job')
+    def test_stream_ends_when_job_finishes_in_another_process(self, mock_get_job):
+        """Without events, the stream reads the job on every keep-alive and closes on its final status."""
+        mock_get_job.side_effect = [
+            dict(self.job),
+            {**self.job, "status": "completed", "result": {"tracks_migrated": []}, "error": None},
+        ]
+
+        messages = list(stream_job_events(self.job, get_event_bus().subscribe("job1")))
+
+        self.assertEqual(messages[1], ": keep-alive\n\n")
+        self.assertTrue(messages[2].startswith("event: completed\n"))
+        self.assertEqual(len(messages), 3)
+        mock_get_job.assert_called_with("job1")
+
+    @patch('controllers.migration_controller.migration_jobs.get_job')
+    def test_stream_ends_on_final_event(self, mock_get_job):
+        subscription = get_event_bus().subscribe("job1")
+        get_event_bus().publish("job1", {"type": "failed", "result": None, "error": {"type": "Error"}})
+
+        messages = list(stream_job_events(self.job, subscription))
+
+        self.assertTrue(messages[-1].startswith("event: failed\n"))
+        mock_get_job.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
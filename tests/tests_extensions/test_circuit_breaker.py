@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import patch
+from extensions.circuit_breaker import CircuitBreaker, is_outage_error
+from errors.playlist_exceptions import CircuitOpenError, ProviderUnavailableError, PlaylistNotFoundError
+from errors.youtube_exceptions import YouTubeUnexpectedError
+from tests.fake_redis import FakeRedis
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+def fail(error):
+    def func():
+        raise error
+    return func
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch('extensions.circuit_breaker.redis', self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.clock = FakeClock()
+        self.breaker = self.create_breaker()
+
+    def create_breaker(self):
+        """Creates a breaker of another worker sharing the same Redis."""
+        return CircuitBreaker(
+            "spotify.search", failure_threshold=3, failure_window=30, recovery_timeout=10,
+            sync_interval=0, clock=self.clock.time
+        )
+
+    def trip(self, breaker):
+        for _ in range(3):
+            with self.assertRaises(ProviderUnavailableError):
+                breaker.call(fail(ProviderUnavailableError()))
+
+    def test_outage_errors_open_the_circuit_for_every_worker(self):
+        """Calls fail fast once the threshold is reached, also in the other workers."""
+        self.trip(self.breaker)
+        calls = []
+
+        with self.assertRaises(CircuitOpenError) as context:
+            self.breaker.call(calls.append, "search")
+        self.assertEqual(context.exception.retry_after, 10)
+        with self.assertRaises(CircuitOpenError):
+            self.create_breaker().call(calls.append, "search")
+        self.assertEqual(calls, [])
+
+    def test_other_errors_do_not_open_the_circuit(self):
+        """Errors returned by a provider that answered are not outages."""
+        for _ in range(5):
+            with self.assertRaises(PlaylistNotFoundError):
+                self.breaker.call(fail(PlaylistNotFoundError()))
+        self.assertEqual(self.breaker.call(lambda: "ok"), "ok")
+
+    def test_single_probe_closes_the_circuit(self):
+        """Once half-open, one call probes the provider while the others keep failing fast."""
+        self.trip(self.breaker)
+        self.clock.now += 10
+        self.redis.delete("circuit_breaker:spotify.search:probe") # the probe key has expired.
+        other_worker = self.create_breaker()
+
+        def probe():
+            with self.assertRaises(CircuitOpenError):
+                other_worker.call(lambda: "ok")
+            return "ok"
+
+        self.assertEqual(self.breaker.call(probe), "ok")
+        self.assertEqual(other_worker.call(lambda: "ok"), "ok")
+
+    def test_failed_probe_opens_the_circuit_again(self):
+        self.trip(self.breaker)
+        self.clock.now += 10
+        self.redis.delete("circuit_breaker:spotify.search:probe")
+
+        with self.assertRaises(ProviderUnavailableError):
+            self.breaker.call(fail(ProviderUnavailableError()))
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(lambda: "ok")
+
+    def test_timeouts_wrapped_by_the_services_are_outages(self):
+        try:
+            try:
+                raise TimeoutError("timed out")
+            except Exception as e:
+                raise YouTubeUnexpectedError(f"An unexpected error occurred: {e}")
+        except YouTubeUnexpectedError as e:
+            self.assertTrue(is_outage_error(e))
+        self.assertFalse(is_outage_error(YouTubeUnexpectedError("KeyError")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from extensions.event_bus import EventBus
+
+class TestEventBus(unittest.TestCase):
+    def setUp(self):
+        self.bus = EventBus(max_events=2)
+
+    def test_subscribers_receive_events_of_their_channel(self):
+        """Events are delivered to the subscribers of the channel only."""
+        subscription = self.bus.subscribe("job1")
+        other = self.bus.subscribe("job2")
+        self.bus.publish("job1", {"type": "matched"})
+        self.assertEqual(subscription.get(timeout=0), {"type": "matched"})
+        self.assertIsNone(other.get(timeout=0))
+
+    def test_slow_subscriber_drops_oldest_events(self):
+        """A full subscriber queue drops its oldest events instead of blocking the publisher."""
+        subscription = self.bus.subscribe("job1")
+        for i in range(3):
+            self.bus.publish("job1", {"type": "progress", "processed": i})
+        self.bus.publish("job1", {"type": "completed"})
+        self.assertEqual(subscription.get(timeout=0)["processed"], 2)
+        # the final event of a job is never the one dropped.
+        self.assertEqual(subscription.get(timeout=0), {"type": "completed"})
+        self.assertIsNone(subscription.get(timeout=0))
+
+    def test_unsubscribe_stops_delivery(self):
+        """Unsubscribed queues no longer receive events."""
+        subscription = self.bus.subscribe("job1")
+        self.bus.unsubscribe(subscription)
+        self.bus.publish("job1", {"type": "matched"})
+        self.assertIsNone(subscription.get(timeout=0))
+
+if __name__ == '__main__':
+    unittest.main()
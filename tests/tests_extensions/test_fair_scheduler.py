@@ -0,0 +1,56 @@
+import unittest
+from prometheus_client import REGISTRY
+from extensions.fair_scheduler import FairScheduler
+
+class TestFairScheduler(unittest.TestCase):
+    def setUp(self):
+        """Set up a scheduler that runs one task per user at a time."""
+        self.scheduler = FairScheduler(max_per_user=1)
+
+    def test_least_served_user_goes_first(self):
+        """A user with a small job goes ahead of a user already served by a large one."""
+        self.scheduler.put(1, "library")
+        self.scheduler.put(1, "playlist-a")
+        self.assertEqual(self.scheduler.get(timeout=0), (1, "library"))
+        self.scheduler.record_service(1, 2000)
+        self.scheduler.put(2, "playlist-b")
+        self.scheduler.done(1)
+
+        self.assertEqual(self.scheduler.get(timeout=0), (2, "playlist-b"))
+        self.assertEqual(self.scheduler.get(timeout=0), (1, "playlist-a"))
+
+    def test_running_tasks_are_capped_per_user(self):
+        """The next task of a user waits until one of their running tasks is done."""
+        self.scheduler.put(1, "first")
+        self.scheduler.put(1, "second")
+        self.assertEqual(self.scheduler.get(timeout=0), (1, "first"))
+        self.assertIsNone(self.scheduler.get(timeout=0))
+        self.assertEqual(self.scheduler.queue_depth(1), 1)
+
+        self.scheduler.done(1)
+        self.assertEqual(self.scheduler.get(timeout=0), (1, "second"))
+
+    def test_users_with_equal_service_alternate(self):
+        """Queued tasks of different users are interleaved instead of run in arrival order."""
+        self.scheduler = FairScheduler(max_per_user=10)
+        for task in ("a1", "a2"):
+            self.scheduler.put(1, task)
+        for task in ("b1", "b2"):
+            self.scheduler.put(2, task)
+
+        order = [self.scheduler.get(timeout=0)[1] for _ in range(4)]
+        self.assertEqual(order, ["a1", "b1", "a2", "b2"])
+
+    def test_metrics_keep_no_series_of_idle_users(self):
+        """Once the queue of a user is empty, no metric series of the user is left."""
+        before = REGISTRY.get_sample_value("migration_queue_wait_seconds_count") or 0
+        self.scheduler.put(42, "task")
+        self.assertEqual(REGISTRY.get_sample_value("migration_queue_depth", {"user_id": "42"}), 1)
+
+        self.scheduler.get(timeout=0)
+        self.assertIsNone(REGISTRY.get_sample_value("migration_queue_depth", {"user_id": "42"}))
+        self.assertEqual(REGISTRY.get_sample_value("migration_queue_wait_seconds_count"), before + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
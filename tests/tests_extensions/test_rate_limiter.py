@@ -0,0 +1,58 @@
+import unittest
+from extensions.rate_limiter import AdaptiveRateLimiter
+
+class FakeClock:
+    """Deterministic clock whose sleep advances the current time."""
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = AdaptiveRateLimiter(
+            "test", rate=2, burst=2, min_rate=0.5, max_rate=4,
+            increase_step=0.5, clock=self.clock.time, sleep=self.clock.sleep
+        )
+
+    def test_acquire_does_not_wait_while_budget_available(self):
+        """Calls within the burst budget never sleep."""
+        self.assertEqual(self.limiter.acquire(), 0.0)
+        self.assertEqual(self.limiter.acquire(), 0.0)
+        self.assertEqual(self.clock.slept, [])
+
+    def test_acquire_waits_when_budget_runs_out(self):
+        """Once the bucket is empty, callers wait for one token at the current rate."""
+        self.limiter.acquire()
+        self.limiter.acquire()
+        waited = self.limiter.acquire()
+        self.assertAlmostEqual(waited, 0.5)
+
+    def test_success_increases_rate_up_to_max(self):
+        """Successful calls raise the rate additively without exceeding max_rate."""
+        for _ in range(10):
+            self.limiter.record_success()
+        self.assertEqual(self.limiter.rate, 4)
+
+    def test_throttle_decreases_rate_and_honors_retry_after(self):
+        """A throttled call halves the rate, empties the bucket and blocks for Retry-After."""
+        self.limiter.record_throttle(retry_after=3)
+        self.assertEqual(self.limiter.rate, 1)
+        waited = self.limiter.acquire()
+        self.assertGreaterEqual(waited, 3)
+
+    def test_throttle_does_not_go_below_min_rate(self):
+        """The rate never drops below min_rate."""
+        for _ in range(10):
+            self.limiter.record_throttle()
+        self.assertEqual(self.limiter.rate, 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
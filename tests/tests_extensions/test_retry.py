@@ -0,0 +1,75 @@
+import unittest
+from extensions.retry import RetryPolicy, classify_provider_error
+from errors.playlist_exceptions import RateLimitExceededError, ProviderUnavailableError, TrackNotFoundError
+from errors.youtube_exceptions import YouTubeBackendError
+
+class FakeClock:
+    """Deterministic clock whose sleep advances the current time."""
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def failing(*errors, result="ok"):
+    """Returns a function raising the given errors on its first calls, then returning `result`."""
+    errors = list(errors)
+    def func():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return func
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.policy = RetryPolicy(
+            max_attempts=4, base_delay=1, max_delay=3, deadline=60,
+            clock=self.clock.time, sleep=self.clock.sleep, random=lambda: 1.0
+        )
+
+    def test_transient_errors_are_retried_with_exponential_backoff(self):
+        """Waits double on every attempt, up to the maximum delay."""
+        func = failing(ProviderUnavailableError(), YouTubeBackendError(), ProviderUnavailableError())
+        self.assertEqual(self.policy.call("spotify", func), "ok")
+        self.assertEqual(self.clock.slept, [1, 2, 3])
+
+    def test_retry_after_is_honored(self):
+        """The provider's Retry-After is the minimum wait, whatever the jitter."""
+        policy = RetryPolicy(max_attempts=2, base_delay=1, max_delay=3, deadline=60,
+                             clock=self.clock.time, sleep=self.clock.sleep, random=lambda: 0.0)
+        retries = []
+        func = failing(RateLimitExceededError(retry_after=7))
+        self.assertEqual(policy.call("spotify", func, on_retry=lambda e, reason: retries.append(reason)), "ok")
+        self.assertEqual(self.clock.slept, [7])
+        self.assertEqual(retries, ["rate_limited"])
+
+    def test_permanent_errors_and_exhausted_attempts_are_raised(self):
+        """Errors that are not transient are raised at once, transient ones after the last attempt."""
+        with self.assertRaises(TrackNotFoundError):
+            self.policy.call("spotify", failing(TrackNotFoundError()))
+        self.assertEqual(self.clock.slept, [])
+
+        with self.assertRaises(ProviderUnavailableError):
+            self.policy.call("spotify", failing(*[ProviderUnavailableError() for _ in range(4)]))
+        self.assertEqual(len(self.clock.slept), 3)
+
+    def test_deadline_stops_the_retries(self):
+        """A retry that would end after the deadline is not attempted."""
+        func = failing(RateLimitExceededError(retry_after=30), RateLimitExceededError(retry_after=40))
+        with self.assertRaises(RateLimitExceededError):
+            self.policy.call("spotify", func)
+        self.assertEqual(self.clock.slept, [30])
+
+    def test_classify_provider_error(self):
+        self.assertEqual(classify_provider_error(RateLimitExceededError()), "rate_limited")
+        self.assertEqual(classify_provider_error(YouTubeBackendError()), "unavailable")
+        self.assertIsNone(classify_provider_error(TrackNotFoundError()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from unittest.mock import patch
+from services.match_cache import TrackMatchCache, track_fingerprint
+from tests.fake_redis import FakeRedis
+
+class TestTrackMatchCache(unittest.TestCase):
+    def setUp(self):
+        """Set up a cache backed by an in-memory Redis."""
+        self.redis = FakeRedis()
+        patcher = patch('services.match_cache.redis', self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = TrackMatchCache(maxsize=2, ttl=60)
+
+    def test_fingerprint_ignores_case_accents_and_punctuation(self):
+        """Spelling variants of the same song share a fingerprint."""
+        self.assertEqual(track_fingerprint("Café  del Mar!", "Energy 52"), track_fingerprint("cafe del mar", "ENERGY 52"))
+        self.assertIsNone(track_fingerprint("!!!", "Artist"))
+
+    def test_miss_returns_none(self):
+        """Unknown tracks are reported as a miss."""
+        self.assertIsNone(self.cache.get("spotify-to-youtube", "song|artist"))
+
+    def test_matches_are_shared_through_redis(self):
+        """A match cached by one process is found by another one through Redis."""
+        self.cache.set("spotify-to-youtube", "song|artist", {"id": "match"})
+        other_process = TrackMatchCache(maxsize=2, ttl=60)
+        self.assertEqual(other_process.get("spotify-to-youtube", "song|artist"), {"id": "match"})
+        self.assertIsNone(other_process.get("youtube-to-spotify", "song|artist"))
+
+    def test_local_tier_answers_without_redis(self):
+        """Entries of the in-process LRU do not need Redis."""
+        self.cache.set("spotify-to-youtube", "song|artist", {"id": "match"})
+        self.redis.delete(self.cache._key("spotify-to-youtube", "song|artist"))
+        self.assertEqual(self.cache.get("spotify-to-youtube", "song|artist"), {"id": "match"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+import unittest
+import threading
+from unittest.mock import patch, MagicMock
+from services.migration_jobs import MigrationJobManager, derive_idempotency_key
+from services.playlist_migration_service import PlaylistMigration
+from services.migration_results import TrackResult
+from errors.playlist_exceptions import InvalidPlatformError, IdempotencyKeyConflictError, APIRequestError
+from errors.youtube_exceptions import YouTubeQuotaExceededError, YouTubeQuotaDeferredError
+from extensions.event_bus import EventBus
+from tests.fake_redis import FakeRedis
+
+class TestMigrationJobManager(unittest.TestCase):
+    def setUp(self):
+        """Set up a job manager backed by an in-memory Redis."""
+        self.redis = FakeRedis()
+        patcher = patch('services.migration_jobs.redis', self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.playlist_migration = MagicMock(spec=PlaylistMigration)
+        self.event_bus = EventBus()
+        self.manager = MigrationJobManager(self.playlist_migration, max_workers=1, event_bus=self.event_bus)
+        self.user_id = 1
+
+    def wait_for_jobs(self):
+        self.manager.executor.shutdown(wait=True)
+
+    def test_submit_runs_migration_in_background(self):
+        """A submitted job is queued, then completed with the migration result."""
+        def migrate(user_id, playlist_id, on_progress=None, on_event=None):
+            on_progress({"total": 1, "processed": 1, "migrated": 1})
+            return {"tracks_migrated": ["track"]}
+        self.playlist_migration.migrate_spotify_to_youtube.side_effect = migrate
+
+        job = self.manager.submit(self.user_id, "spotify-to-youtube", "playlist_id")
+        self.assertEqual(job["status"], "queued")
+        self.wait_for_jobs()
+
+        stored = self.manager.get_job(job["id"])
+        self.assertEqual(stored["status"], "completed")
+        self.assertEqual(stored["progress"], {"total": 1, "processed": 1, "migrated": 1})
+        self.assertEqual(stored["result"], {"tracks_migrated": ["track"]})
+        self.playlist_migration.migrate_spotify_to_youtube.assert_called_once()
+
+    def test_failed_migration_is_recorded(self):
+        """Exceptions raised by the migration mark the job as failed."""
+        self.playlist_migration.migrate_youtube_to_spotify.side_effect = APIRequestError("error")
+
+        job = self.manager.submit(self.user_id, "youtube-to-spotify", "playlist_id")
+        self.wait_for_jobs()
+
+        stored = self.manager.get_job(job["id"])
+        self.assertEqual(stored["status"], "failed")
+        self.assertEqual(stored["error"]["type"], "APIRequestError")
+
+    def test_resume_failed_job(self):
+        """A failed job can be queued again and completes on the next attempt."""
+        self.playlist_migration.migrate_spotify_to_youtube.side_effect = [
+            APIRequestError("error"),
+            {"tracks_migrated": []}
+        ]
+        job = self.manager.submit(self.user_id, "spotify-to-youtube", "playlist_id")
+        self.manager.executor.submit(lambda: None).result()
+
+        resumed = self.manager.resume(self.manager.get_job(job["id"]))
+        self.assertEqual(resumed["status"], "queued")
+        self.assertEqual(resumed["attempts"], 2)
+        self.wait_for_jobs()
+
+        stored = self.manager.get_job(job["id"])
+        self.assertEqual(stored["status"], "completed")
+        self.assertIsNone(stored["error"])
+
+    def test_deferred_job_is_resumed_after_the_quota_reset(self):
+        """Jobs that do not fit the YouTube quota are deferred and scheduled for the reset."""
+        self.playlist_migration.migrate_spotify_to_youtube.side_effect = YouTubeQuotaDeferredError(retry_after=3600)
+
+        with patch('services.migration_jobs.threading.Timer') as timer:
+            job = self.manager.submit(self.user_id, "spotify-to-youtube", "playlist_id")
+            self.wait_for_jobs()
+
+        stored = self.manager.get_job(job["id"])
+        self.assertEqual(stored["status"], "deferred")
+        self.assertEqual(stored["error"]["type"], "YouTubeQuotaDeferredError")
+        self.assertIn("retry_at", stored)
+        self.assertEqual(timer.call_args.args[0], 3600)
+        self.assertEqual(timer.call_args.args[1], self.manager.resume)
+        timer.return_value.start.assert_called_once()
+
+    @patch('services.migration_jobs.seconds_until_quota_reset', return_value=7200)
+    def test_job_running_out_of_quota_is_deferred(self, _):
+        """A job that runs out of YouTube quota while running waits for the reset instead of failing."""
+        self.playlist_migration.migrate_spotify_to_youtube.side_effect = YouTubeQuotaExceededError("quota")
+
+        with patch('services.migration_jobs.threading.Timer') as timer:
+            job = self.manager.submit(self.user_id, "spotify-to-youtube", "playlist_id")
+            self.wait_for_jobs()
+
+        stored = self.manager.get_job(job["id"])
+        self.assertEqual(stored["status"], "deferred")
+        self.assertEqual(stored["error"]["type"], "YouTubeQuotaExceededError")
+        self.assertEqual(timer.call_args.args[0], 7200)
+
+    def test_deferred_job_is_resumed_once(self):
+        """A deferred job resumed by the user is not resumed again by its timer."""
+        self.playlist_migration.migrate_spotify_to_youtube.side_effect = [YouTubeQuotaDeferredError(retry_after=3600), {"tracks_migrated": []}]
+
+        with patch('services.migration_jobs.threading.Timer') as timer:
+            job = self.manager.submit(self.user_id, "spotify-to-youtube", "playlist_id")
+            self.manager.executor.submit(lambda: None).result()
+        stale = self.manager.get_job(job["id"])
+
+        self.assertEqual(self.manager.resume(stale)["attempts"], 2)
+        # a concurrent request with the same copy of the job loses the claim of the attempt.
+        self.assertIsNone(self.manager.resume(stale))
+        self.wait_for_jobs()
+        self.assertEqual(self.manager.get_job(job["id"])["status"], "completed")
+
+        # the timer only resumes jobs that are still deferred.
+        self.assertIsNone(timer.call_args.args[1](*timer.call_args.kwargs["args"], **timer.call_args.kwargs["kwargs"]))
+        self.assertEqual(self.playlist_migration.migrate_spotify_to_youtube.call_count, 2)
+        self.assertEqual(self.manager.get_job(job["id"])["attempts"], 2)
+
+    def test_small_jobs_of_other_users_go_first(self):
+        """While a large migration runs, a new user's job is dispatched before the next job of the first user."""
+        started, release = threading.Event(), threading.Event()
+        order = []
+
+        def migrate(user_id, playlist_id, on_progress=None, on_event=None):
+            order.append(playlist_id)
+            if playlist_id == "library":
+                started.set()
+                on_progress({"total": 2000, "processed": 2000, "migrated": 2000})
+                release.wait(1)
+            return {}
+        self.playlist_migration.migrate_spotify_to_youtube.side_effect = migrate
+
+        self.manager.submit(1, "spotify-to-youtube", "library")
+        started.wait(1)
+        self.manager.submit(1, "spotify-to-youtube", "next")
+        self.manager.submit(2, "spotify-to-youtube", "small")
+        release.set()
+        self.wait_for_jobs()
+
+        self.assertEqual(order, ["library", "small", "next"])
+
+    def test_submit_sync_job(self):
+        """A sync job runs the sync method of the direction with its options."""
+        self.playlist_migration.sync_youtube_to_spotify.return_value = {"tracks_added": 2}
+
+        job = self.manager.submit(self.user_id, "youtube-to-spotify", "playlist_id", "sync", {"target_playlist_id": "target_id"})
+        self.wait_for_jobs()
+
+        stored = self.manager.get_job(job["id"])
+        self.assertEqual(stored["status"], "completed")
+        self.assertEqual(stored["result"], {"tracks_added": 2})
+        self.playlist_migration.sync_youtube_to_spotify.assert_called_once()
+        self.assertEqual(self.playlist_migration.sync_youtube_to_spotify.call_args.kwargs["target_playlist_id"], "target_id")
+        self.playlist_migration.migrate_youtube_to_spotify.assert_not_called()
+
+    def test_submit_library_job(self):
+        """A library job receives the list of playlists to migrate."""
+        self.playlist_migration.migrate_spotify_library_to_youtube.return_value = {"totals": {"playlists": 2}}
+
+        job = self.manager.submit(self.user_id, "spotify-to-youtube", ["pl1", "pl2"], "library")
+        self.wait_for_jobs()
+
+        stored = self.manager.get_job(job["id"])
+        self.assertEqual(stored["status"], "completed")
+        self.assertEqual(stored["playlist_id"], ["pl1", "pl2"])
+        self.playlist_migration.migrate_spotify_library_to_youtube.assert_called_once()
+        self.assertEqual(self.playlist_migration.migrate_spotify_library_to_youtube.call_args.args[1], ["pl1", "pl2"])
+
+    def test_submit_preview_job(self):
+        """A preview job runs the preview method of the direction."""
+        self.playlist_migration.preview_youtube_to_spotify.return_value = {"plan_id": "plan_id"}
+
+        job = self.manager.submit(self.user_id, "youtube-to-spotify", "playlist_id", "preview")
+        self.wait_for_jobs()
+
+        stored = self.manager.get_job(job["id"])
+        self.assertEqual(stored["result"], {"plan_id": "plan_id"})
+        self.playlist_migration.migrate_youtube_to_spotify.assert_not_called()
+
+    def test_result_records_are_stored_as_json(self):
+        """Compact track records are serialized when the job is stored."""
+        self.playlist_migration.migrate_spotify_to_youtube.return_value = {"tracks_migrated": [TrackResult("sp0", "v0", "Song", "Artist", 0.9)]}
+
+        job = self.manager.submit(self.user_id, "spotify-to-youtube", "playlist_id")
+        self.wait_for_jobs()
+
+        stored = self.manager.get_job(job["id"])
+        self.assertEqual(stored["result"]["tracks_migrated"], [
+            {"source_id": "sp0", "target_id": "v0", "title": "Song", "artist": "Artist", "confidence": 0.9, "status": "migrated"}
+        ])
+
+    def test_job_events_are_published(self):
+        """Track events, progress with throughput and the final status are published on the job channel."""
+        def migrate(user_id, playlist_id, on_progress=None, on_event=None):
+            on_event({"type": "matched", "index": 0})
+            on_progress({"total": 1, "processed": 1, "migrated": 1})
+            return {"tracks_migrated": ["track"]}
+        self.playlist_migration.migrate_spotify_to_youtube.side_effect = migrate
+
+        with patch('services.migration_jobs.uuid.uuid4') as uuid4:
+            uuid4.return_value.hex = "job_id"
+            subscription = self.event_bus.subscribe("job_id")
+            self.manager.submit(self.user_id, "spotify-to-youtube", "playlist_id")
+            self.wait_for_jobs()
+
+        events = []
+        while (event := subscription.get(timeout=0)) is not None:
+            events.append(event)
+        self.assertEqual([event["type"] for event in events], ["running", "matched", "progress", "completed"])
+        self.assertIn("throughput", events[2])
+        self.assertEqual(events[3]["result"], {"tracks_migrated": ["track"]})
+
+    def test_repeated_request_returns_the_same_job(self):
+        """A request retried with the same idempotency key does not start a second migration."""
+        self.playlist_migration.migrate_spotify_to_youtube.return_value = {"tracks_migrated": []}
+        key = derive_idempotency_key("migrate", "spotify-to-youtube", "playlist_id")
+
+        job = self.manager.submit(self.user_id, "spotify-to-youtube", "playlist_id", idempotency_key=key)
+        replayed = self.manager.submit(self.user_id, "spotify-to-youtube", "playlist_id", idempotency_key=key)
+        # other users are not affected by the key.
+        other = self.manager.submit(2, "spotify-to-youtube", "playlist_id", idempotency_key=key)
+        self.wait_for_jobs()
+
+        self.assertEqual(replayed["id"], job["id"])
+        self.assertTrue(replayed["replayed"])
+        self.assertNotEqual(other["id"], job["id"])
+        self.assertEqual(self.playlist_migration.migrate_spotify_to_youtube.call_count, 2)
+        self.assertNotEqual(key, derive_idempotency_key("migrate", "spotify-to-youtube", "other_playlist_id"))
+
+    def test_idempotency_key_reused_for_another_request(self):
+        """Reusing a key for a different request is rejected."""
+        self.manager.submit(self.user_id, "spotify-to-youtube", "playlist_id", idempotency_key="key")
+        with self.assertRaises(IdempotencyKeyConflictError):
+            self.manager.submit(self.user_id, "spotify-to-youtube", "other_playlist_id", idempotency_key="key")
+        self.wait_for_jobs()
+
+    def test_invalid_direction(self):
+        """Unknown migration directions are rejected before enqueuing."""
+        with self.assertRaises(InvalidPlatformError):
+            self.manager.submit(self.user_id, "spotify-to-tidal", "playlist_id")
+
+    def test_get_unknown_job(self):
+        """Unknown job IDs return None."""
+        self.assertIsNone(self.manager.get_job("missing"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,24 @@
 from unittest import TestCase
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, call
+import json
+import threading
+import time
 from services.playlist_migration_service import PlaylistMigration
-from services.spotify_service import SpotifyService
+from services.spotify_service import SpotifyService, MIGRATION_PLAYLIST_FIELDS
 from services.youtube_service import YouTubeService
-from errors.playlist_exceptions import APIRequestError, PlaylistNotFoundError, AuthenticationError, TrackNotFoundError
+from errors.playlist_exceptions import APIRequestError, PlaylistNotFoundError, AuthenticationError, TrackNotFoundError, RateLimitExceededError
+from errors.youtube_exceptions import YouTubeRateLimitError, YouTubeQuotaExceededError, YouTubeQuotaDeferredError, YouTubeBackendError
+from extensions.rate_limiter import AdaptiveRateLimiter
+from extensions.retry import RetryPolicy
+from services.migration_checkpoints import MigrationCheckpoint, MigrationCheckpointStore
+from services.track_mappings import TrackMappingStore
+from services.match_cache import TrackMatchCache
+from services.title_normalizer import ParsedTitle
+from services.isrc_mappings import IsrcMappingStore
+from services.migration_plans import MigrationPlanStore
+from services.youtube_quota import YouTubeQuotaLedger, estimate_migration_cost
+from config import Config
+from tests.fake_redis import FakeRedis
 
 class TestPlaylistMigration(TestCase):
     def setUp(self):
@@ -17,11 +32,39 @@ class TestPlaylistMigration(TestCase):
         self.spotify_service.search_and_buffer_tracks = MagicMock()
         self.spotify_service.add_track_to_playlist = MagicMock()
         
+        # checkpoints are stored in an in-memory Redis.
+        self.redis = FakeRedis()
+        for target in ('services.migration_checkpoints.redis', 'services.track_mappings.redis', 'services.match_cache.redis', 'services.isrc_mappings.redis', 'services.migration_plans.redis', 'services.youtube_quota.redis'):
+            patcher = patch(target, self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.checkpoint_store = MigrationCheckpointStore()
+        self.track_mappings = TrackMappingStore()
+        self.match_cache = TrackMatchCache(maxsize=100)
+        self.isrc_mappings = IsrcMappingStore()
+        self.plan_store = MigrationPlanStore()
+        self.quota_ledger = YouTubeQuotaLedger(daily_quota=10000, user_daily_quota=10000)
+
+        # limiters that never sleep, so tests run instantly.
+        self.spotify_limiter = AdaptiveRateLimiter("spotify", rate=100, burst=100, sleep=lambda seconds: None)
+        self.youtube_limiter = AdaptiveRateLimiter("youtube", rate=100, burst=100, sleep=lambda seconds: None)
+        self.retry_policy = RetryPolicy(max_attempts=3, sleep=lambda seconds: None)
+
         self.playlist_migration = PlaylistMigration(
             spotify_service=self.spotify_service,
-            youtube_service=self.youtube_service
+            youtube_service=self.youtube_service,
+            spotify_limiter=self.spotify_limiter,
+            youtube_limiter=self.youtube_limiter,
+            match_concurrency=4,
+            checkpoint_store=self.checkpoint_store,
+            track_mappings=self.track_mappings,
+            match_cache=self.match_cache,
+            isrc_mappings=self.isrc_mappings,
+            plan_store=self.plan_store,
+            quota_ledger=self.quota_ledger,
+            retry_policy=self.retry_policy
         )
-        self.current_user = MagicMock()
+        self.current_user = 1 # migrations receive the ID of the current user.
         
     @patch('token_handler.spotify_tokens.SpotifyTokenHandler.get_access_token', return_value="fake_spotify_token")
     @patch('token_handler.youtube_tokens.YouTubeTokenHandler.get_valid_access_token', return_value="fake_youtube_token")
@@ -41,6 +84,569 @@ class TestPlaylistMigration(TestCase):
         with self.assertRaises(PlaylistNotFoundError):
             self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "nonexistent_playlist_id")
 
+    def test_throttled_search_is_retried_with_lower_rate(self):
+        # the first search is throttled by YouTube, the retry succeeds.
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = [
+            {"track": {"name": "Song1", "artists": [{"name": "Artist1"}]}}
+        ]
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        self.youtube_service.search_track.side_effect = [
+            YouTubeRateLimitError(),
+            {"id": {"videoId": "video1"}}
+        ]
+
+        result = self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.assertEqual(self.youtube_service.search_track.call_count, 2)
+        self.assertLess(self.youtube_limiter.rate, 100)
+        self.youtube_service.add_track_to_playlist.assert_called_once_with(self.current_user, "youtube_playlist_id", "video1")
+        self.assertEqual(len(result["tracks_migrated"]), 1)
+
+    def test_unavailable_search_is_retried_but_insert_is_not(self):
+        # searches are safe to repeat after a server error, inserts may have been applied.
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = [
+            {"track": {"id": "sp1", "name": "Song1", "artists": [{"name": "Artist1"}]}}
+        ]
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        self.youtube_service.search_track.side_effect = [
+            YouTubeBackendError(),
+            {"id": {"videoId": "video1"}}
+        ]
+        self.youtube_service.add_track_to_playlist.side_effect = YouTubeBackendError()
+
+        with self.assertRaises(YouTubeBackendError):
+            self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.assertEqual(self.youtube_service.search_track.call_count, 2)
+        self.youtube_service.add_track_to_playlist.assert_called_once()
+        self.assertGreaterEqual(self.youtube_limiter.rate, 100) # server errors do not slow the limiter down.
+
+    def test_transient_errors_of_playlist_reads_and_creation_are_retried(self):
+        # the source reads are retried after any transient error, the creation only after throttling.
+        self.youtube_service.get_playlist.side_effect = [YouTubeBackendError(), {"items": [{"snippet": {"title": "Test Playlist", "description": ""}}]}]
+        pages = MagicMock(side_effect=[
+            {"items": [{"snippet": {"title": "Song1", "resourceId": {"videoId": "v1"}}}], "nextPageToken": "p2"},
+            YouTubeRateLimitError(retry_after=0.01),
+            {"items": [{"snippet": {"title": "Song2", "resourceId": {"videoId": "v2"}}}]},
+        ])
+        def get_playlist_tracks(user_id, playlist_id, fields=None, call_provider=None):
+            # every page goes through the caller of the migration, a failed page is retried on its own.
+            first = call_provider(pages, None)
+            return first["items"] + call_provider(pages, first["nextPageToken"])["items"]
+        self.youtube_service.get_playlist_tracks.side_effect = get_playlist_tracks
+        self.spotify_service.create_playlist.side_effect = [RateLimitExceededError("throttled", retry_after=0.01), {"id": "spotify_playlist_id"}]
+        self.spotify_service.search_track.return_value = {"id": "sp1"}
+        self.spotify_service.add_tracks_to_playlist.side_effect = lambda user_id, playlist_id, track_ids: [
+            {"offset": 0, "track_ids": track_ids, "snapshot_id": "s1", "error": None}
+        ]
+
+        result = self.playlist_migration.migrate_youtube_to_spotify(self.current_user, "youtube_playlist_id")
+
+        self.assertEqual(result["playlist_created"], {"id": "spotify_playlist_id"})
+        self.assertEqual(self.youtube_service.get_playlist.call_count, 2)
+        self.youtube_service.get_playlist_tracks.assert_called_once()
+        self.assertEqual([c.args for c in pages.call_args_list], [(None,), ("p2",), ("p2",)])
+        self.assertEqual(self.spotify_service.create_playlist.call_count, 2)
+
+    def test_unavailable_playlist_creation_is_not_retried(self):
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = [{"track": {"id": "sp1", "name": "Song1", "artists": [{"name": "Artist1"}]}}]
+        self.youtube_service.create_playlist.side_effect = YouTubeBackendError()
+
+        with self.assertRaises(YouTubeBackendError):
+            self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.youtube_service.create_playlist.assert_called_once()
+
+    def test_tracks_are_searched_concurrently_and_added_in_order(self):
+        # searches finish in reverse order, adds must still follow the playlist order.
+        self.youtube_service.get_playlist.return_value = {"items": [{"snippet": {"title": "Mix", "description": ""}}]}
+        self.youtube_service.get_playlist_tracks.return_value = [
+            {"snippet": {"title": f"Song{i}"}} for i in range(8)
+        ]
+        self.spotify_service.create_playlist.return_value = {"id": "spotify_playlist_id"}
+        self.spotify_service.add_tracks_to_playlist.side_effect = lambda user_id, playlist_id, track_ids: [
+            {"offset": 0, "track_ids": track_ids, "snapshot_id": "snapshot", "error": None}
+        ]
+
+        lock = threading.Lock()
+        in_flight = {"current": 0, "peak": 0}
+
+        def search_track(user_id, query):
+            with lock:
+                in_flight["current"] += 1
+                in_flight["peak"] = max(in_flight["peak"], in_flight["current"])
+            time.sleep(0.05 - int(query.title[4:]) * 0.005)
+            with lock:
+                in_flight["current"] -= 1
+            if query.title == "Song3":
+                raise TrackNotFoundError()
+            return {"id": f"id_{query.title}"}
+        self.spotify_service.search_track.side_effect = search_track
+
+        result = self.playlist_migration.migrate_youtube_to_spotify(self.current_user, "youtube_playlist_id")
+
+        self.assertGreater(in_flight["peak"], 1)
+        self.assertLessEqual(in_flight["peak"], 4)
+        self.spotify_service.add_tracks_to_playlist.assert_called_once_with(
+            self.current_user, "spotify_playlist_id", [f"id_Song{i}" for i in range(8) if i != 3]
+        )
+        self.assertEqual(len(result["tracks_migrated"]), 7)
+
+    def test_interrupted_migration_resumes_from_checkpoint(self):
+        # the YouTube quota runs out while inserting the third track.
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = [
+            {"track": {"name": f"Song{i}", "artists": [{"name": "Artist"}]}} for i in range(5)
+        ]
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        self.youtube_service.search_track.side_effect = lambda user_id, track: {"id": {"videoId": track["track"]["name"]}}
+        self.youtube_service.add_track_to_playlist.side_effect = [None, None, YouTubeQuotaExceededError("quota")]
+
+        with self.assertRaises(YouTubeQuotaExceededError):
+            self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.assertTrue(self.playlist_migration.has_checkpoint(self.current_user, "spotify-to-youtube", "spotify_playlist_id"))
+        searched = [c.args[1]["track"]["name"] for c in self.youtube_service.search_track.call_args_list]
+
+        # next day: the migration continues where it stopped.
+        self.youtube_service.search_track.reset_mock()
+        self.youtube_service.add_track_to_playlist.reset_mock()
+        self.youtube_service.add_track_to_playlist.side_effect = None
+
+        result = self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.youtube_service.create_playlist.assert_called_once()
+        resumed_searches = [c.args[1]["track"]["name"] for c in self.youtube_service.search_track.call_args_list]
+        self.assertFalse(set(searched) & set(resumed_searches))
+        self.assertEqual(sorted(searched + resumed_searches), [f"Song{i}" for i in range(5)])
+        self.assertEqual(self.youtube_service.add_track_to_playlist.call_args_list, [
+            call(self.current_user, "youtube_playlist_id", f"Song{i}") for i in range(2, 5)
+        ])
+        self.assertEqual(result["previously_migrated"], 2)
+        self.assertFalse(self.playlist_migration.has_checkpoint(self.current_user, "spotify-to-youtube", "spotify_playlist_id"))
+
+    def test_spotify_writes_are_batched_and_failed_chunks_reported(self):
+        # 150 matched tracks are written in two chunks, the second one fails.
+        self.youtube_service.get_playlist.return_value = {"items": [{"snippet": {"title": "Mix", "description": ""}}]}
+        self.youtube_service.get_playlist_tracks.return_value = [
+            {"snippet": {"title": f"Song{i}"}} for i in range(150)
+        ]
+        self.spotify_service.create_playlist.return_value = {"id": "spotify_playlist_id"}
+        self.spotify_service.search_track.side_effect = lambda user_id, query: {"id": f"id_{query.title}"}
+        self.spotify_service.add_tracks_to_playlist.side_effect = [
+            [{"offset": 0, "track_ids": [f"id_Song{i}" for i in range(100)], "snapshot_id": "s1", "error": None}],
+            [{"offset": 0, "track_ids": [f"id_Song{i}" for i in range(100, 150)], "snapshot_id": None, "error": "boom"}],
+        ]
+
+        result = self.playlist_migration.migrate_youtube_to_spotify(self.current_user, "youtube_playlist_id")
+
+        chunks = [c.args[2] for c in self.spotify_service.add_tracks_to_playlist.call_args_list]
+        self.assertEqual(chunks, [[f"id_Song{i}" for i in range(100)], [f"id_Song{i}" for i in range(100, 150)]])
+        self.assertEqual(len(result["tracks_migrated"]), 100)
+        self.assertEqual(len(result["failed_chunks"]), 1)
+        self.assertEqual(result["failed_chunks"][0]["error"], "boom")
+
+    def test_migrated_tracks_are_compact_records(self):
+        # provider payloads are only kept when requested.
+        self.youtube_service.get_playlist.return_value = {"items": [{"snippet": {"title": "Mix", "description": ""}}]}
+        self.youtube_service.get_playlist_tracks.return_value = [
+            {"snippet": {"title": "Artist - Song (Official Video)", "resourceId": {"videoId": "v0"}}}
+        ]
+        self.spotify_service.create_playlist.return_value = {"id": "spotify_playlist_id"}
+        self.spotify_service.search_track.return_value = {"id": "sp0", "name": "Song", "available_markets": ["ES"], "match_confidence": 0.9}
+        self.spotify_service.add_tracks_to_playlist.side_effect = lambda user_id, playlist_id, track_ids: [
+            {"offset": 0, "track_ids": track_ids, "snapshot_id": "s1", "error": None}
+        ]
+
+        result = self.playlist_migration.migrate_youtube_to_spotify(self.current_user, "youtube_playlist_id")
+        self.assertEqual(result["tracks_migrated"][0].to_dict(), {
+            "source_id": "v0", "target_id": "sp0", "title": "Song", "artist": "Artist", "confidence": 0.9, "status": "migrated"
+        })
+
+        self.checkpoint_store.delete(MigrationCheckpoint(self.current_user, "youtube-to-spotify", "youtube_playlist_id"))
+        result = self.playlist_migration.migrate_youtube_to_spotify(self.current_user, "youtube_playlist_id", include_payloads=True)
+        self.assertEqual(result["tracks_migrated"][0].payload["available_markets"], ["ES"])
+
+
+    def test_migration_is_deferred_when_the_youtube_quota_is_short(self):
+        # 9,800 units were already spent today and two tracks need about 450.
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = [
+            {"track": {"id": f"sp{i}", "name": f"Song{i}", "artists": [{"name": "Artist"}]}} for i in range(2)
+        ]
+        for _ in range(98):
+            self.quota_ledger.record(2, "search.list")
+
+        with self.assertRaises(YouTubeQuotaDeferredError) as error:
+            self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.assertGreater(error.exception.retry_after, 0)
+        self.youtube_service.create_playlist.assert_not_called()
+        self.youtube_service.search_track.assert_not_called()
+
+    def test_migration_reads_the_tracks_with_the_snapshot_of_the_details(self):
+        # a single metadata request: the snapshot read with the details is passed to the tracks read.
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": "", "snapshot_id": "snapshot1"}
+        self.spotify_service.get_playlist_tracks.return_value = []
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+
+        self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.assertEqual(self.spotify_service.get_playlist.call_args.kwargs["fields"], MIGRATION_PLAYLIST_FIELDS)
+        self.assertEqual(self.spotify_service.get_playlist_tracks.call_args.kwargs["snapshot_id"], "snapshot1")
+
+    def test_youtube_quota_is_reserved_while_the_migration_runs(self):
+        # concurrent operations see the estimate of a running migration, which releases it when it ends.
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = [
+            {"track": {"id": f"sp{i}", "name": f"Song{i}", "artists": [{"name": "Artist"}]}} for i in range(2)
+        ]
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        reserved = []
+        def search_track(user_id, track):
+            reserved.append(self.quota_ledger.get_usage(self.current_user)["user"]["reserved"])
+            return {"id": {"videoId": track["track"]["id"]}, "match_confidence": 0.9}
+        self.youtube_service.search_track.side_effect = search_track
+
+        self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.assertEqual(reserved, [estimate_migration_cost(2)] * 2)
+        self.assertEqual(self.quota_ledger.get_usage(self.current_user)["user"]["reserved"], 0)
+
+    def test_migration_publishes_track_events(self):
+        # the second track is not found on YouTube.
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = [
+            {"track": {"name": f"Song{i}", "artists": [{"name": "Artist"}]}} for i in range(2)
+        ]
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        def search_track(user_id, track):
+            if track["track"]["name"] == "Song1":
+                raise TrackNotFoundError("not found")
+            return {"id": {"videoId": "v0"}, "match_confidence": 0.9}
+        self.youtube_service.search_track.side_effect = search_track
+        events = []
+
+        self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id", on_event=events.append)
+
+        self.assertEqual(events, [
+            {"type": "matched", "index": 0, "target_id": "v0", "confidence": 0.9},
+            {"type": "inserted", "index": 0, "target_id": "v0"},
+            {"type": "not_found", "index": 1},
+        ])
+
+    def test_cached_matches_skip_the_provider_search(self):
+        # another user already migrated "Song0 - Artist", with different spelling.
+        self.match_cache.set("spotify-to-youtube", "song0|artist", {"id": {"videoId": "cached"}})
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = [
+            {"track": {"name": "SONG0!", "artists": [{"name": "Artist"}]}},
+            {"track": {"name": "Song1", "artists": [{"name": "Artist"}]}},
+        ]
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        self.youtube_service.search_track.return_value = {"id": {"videoId": "searched"}}
+
+        self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.youtube_service.search_track.assert_called_once()
+        self.assertEqual(self.youtube_service.add_track_to_playlist.call_args_list, [
+            call(self.current_user, "youtube_playlist_id", "cached"),
+            call(self.current_user, "youtube_playlist_id", "searched"),
+        ])
+        self.assertEqual(self.match_cache.get("spotify-to-youtube", "song1|artist"), {"id": {"videoId": "searched"}})
+
+    def test_youtube_titles_are_parsed_and_unavailable_videos_skipped(self):
+        # the deleted video is not searched, the titles are sent without their decorations.
+        self.youtube_service.get_playlist.return_value = {"items": [{"snippet": {"title": "Mix", "description": ""}}]}
+        self.youtube_service.get_playlist_tracks.return_value = [
+            {"snippet": {"title": "Coldplay - Yellow (Official Video) [4K]", "videoOwnerChannelTitle": "Coldplay"}},
+            {"snippet": {"title": "Deleted video"}},
+            {"snippet": {"title": "Clocks", "videoOwnerChannelTitle": "Coldplay - Topic"}},
+        ]
+        self.spotify_service.create_playlist.return_value = {"id": "spotify_playlist_id"}
+        self.spotify_service.search_track.side_effect = lambda user_id, query: {"id": f"id_{query.title}"}
+        self.spotify_service.add_tracks_to_playlist.side_effect = lambda user_id, playlist_id, track_ids: [
+            {"offset": 0, "track_ids": track_ids, "snapshot_id": "s1", "error": None}
+        ]
+
+        self.playlist_migration.migrate_youtube_to_spotify(self.current_user, "youtube_playlist_id")
+
+        queries = sorted(c.args[1] for c in self.spotify_service.search_track.call_args_list)
+        self.assertEqual(queries, [ParsedTitle("Clocks", "Coldplay"), ParsedTitle("Yellow", "Coldplay")])
+
+    def test_tracks_are_resolved_by_isrc_in_both_directions(self):
+        # a Spotify -> YouTube migration teaches the ISRC of the matched video.
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = [
+            {"track": {"name": "Song0", "artists": [{"name": "Artist"}], "external_ids": {"isrc": "us-abc-12-00001"}}}
+        ]
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        self.youtube_service.search_track.return_value = {"id": {"videoId": "v0"}, "snippet": {"title": "Song0"}, "match_confidence": 0.9}
+        self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+        # only the target ID and the confidence are kept, until the mappings expire.
+        self.assertEqual(json.loads(self.redis.get("isrc_match:spotify-to-youtube:USABC1200001")), {"id": "v0", "confidence": 0.9})
+        self.assertEqual(self.redis.ttls["isrc_match:spotify-to-youtube:USABC1200001"], Config.ISRC_MAPPING_TTL)
+        self.assertEqual(self.redis.ttls["video_isrc:v0"], Config.ISRC_MAPPING_TTL)
+
+        # another user migrates the same recording, with a different title: no search.
+        self.youtube_service.search_track.reset_mock()
+        self.spotify_service.get_playlist_tracks.return_value = [
+            {"track": {"name": "Song0 - Remastered", "artists": [{"name": "Artist"}], "external_ids": {"isrc": "USABC1200001"}}}
+        ]
+        result = self.playlist_migration.migrate_spotify_to_youtube(2, "other_playlist_id")
+        self.youtube_service.search_track.assert_not_called()
+        self.assertEqual([track.target_id for track in result["tracks_migrated"]], ["v0"])
+
+        # the video is migrated back to Spotify with an exact ISRC search.
+        self.youtube_service.get_playlist.return_value = {"items": [{"snippet": {"title": "Mix", "description": ""}}]}
+        self.youtube_service.get_playlist_tracks.return_value = [
+            {"snippet": {"title": "Artist - Song0 (Official Video)", "resourceId": {"videoId": "v0"}}}
+        ]
+        self.spotify_service.create_playlist.return_value = {"id": "spotify_playlist_id"}
+        self.spotify_service.search_track_by_isrc.return_value = {"id": "sp0"}
+        self.spotify_service.add_tracks_to_playlist.side_effect = lambda user_id, playlist_id, track_ids: [
+            {"offset": 0, "track_ids": track_ids, "snapshot_id": "s1", "error": None}
+        ]
+        self.playlist_migration.migrate_youtube_to_spotify(self.current_user, "youtube_playlist_id")
+
+        self.spotify_service.search_track_by_isrc.assert_called_once_with(self.current_user, "USABC1200001")
+        self.spotify_service.search_track.assert_not_called()
+
+    def test_unavailable_isrc_mappings_do_not_fail_the_migration(self):
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = [
+            {"track": {"id": "sp0", "name": "Song0", "artists": [{"name": "Artist"}], "external_ids": {"isrc": "USABC1200001"}}}
+        ]
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        self.youtube_service.search_track.return_value = {"id": {"videoId": "v0"}}
+
+        with patch('services.isrc_mappings.redis') as redis:
+            redis.mget.side_effect = redis.setex.side_effect = redis.pipeline.side_effect = ConnectionError("Redis unavailable")
+            result = self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        # the track is searched instead of being resolved by its ISRC.
+        self.assertEqual([track.target_id for track in result["tracks_migrated"]], ["v0"])
+        self.youtube_service.search_track.assert_called_once()
+
+    def test_duplicate_tracks_are_searched_once(self):
+        # the same song appears three times, twice with another spelling.
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = [
+            {"track": {"name": name, "artists": [{"name": "Artist"}]}} for name in ["Song0", "Song1", "SONG0", "Song0!"]
+        ]
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        self.youtube_service.search_track.side_effect = lambda user_id, track: {"id": {"videoId": track["track"]["name"].lower()[:5]}}
+
+        result = self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.assertEqual(self.youtube_service.search_track.call_count, 2)
+        self.assertEqual(result["searches_saved"], 2)
+        # every position still gets its track.
+        self.assertEqual(
+            [c.args[2] for c in self.youtube_service.add_track_to_playlist.call_args_list],
+            ["song0", "song1", "song0", "song0"]
+        )
+
+    def test_committed_preview_does_not_search_again(self):
+        # the playlist is previewed, then a track is added to it before the preview is committed.
+        tracks = [{"track": {"id": f"sp{i}", "name": f"Song{i}", "artists": [{"name": "Artist"}]}} for i in range(3)]
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = tracks[:2]
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        self.youtube_service.search_track.side_effect = lambda user_id, track: {"id": {"videoId": track["track"]["id"]}, "snippet": {"title": track["track"]["name"]}}
+
+        preview = self.playlist_migration.preview_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.assertEqual([(track.source_id, track.target_id, track.status) for track in preview["tracks"]], [("sp0", "sp0", "matched"), ("sp1", "sp1", "matched")])
+        self.assertEqual(preview["tracks_found"], 2)
+        self.youtube_service.create_playlist.assert_not_called()
+        self.youtube_service.add_track_to_playlist.assert_not_called()
+
+        # only the new track is searched when the plan is committed, even without the match cache.
+        self.spotify_service.get_playlist_tracks.return_value = tracks
+        self.playlist_migration.match_cache = TrackMatchCache(maxsize=100)
+        for key in [key for key in self.redis.data if key.startswith("track_match:")]:
+            self.redis.delete(key)
+        self.youtube_service.search_track.reset_mock()
+
+        result = self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id", plan_id=preview["plan_id"])
+
+        self.youtube_service.search_track.assert_called_once()
+        self.assertEqual(self.youtube_service.search_track.call_args.args[1]["track"]["id"], "sp2")
+        self.assertEqual([track.target_id for track in result["tracks_migrated"]], ["sp0", "sp1", "sp2"])
+        self.assertIsNone(self.plan_store.get(preview["plan_id"]))
+
+    def test_committed_preview_is_admitted_for_its_inserts(self):
+        # 9,800 units were already spent today: enough to insert two planned tracks, not to search them.
+        tracks = [{"track": {"id": f"sp{i}", "name": f"Song{i}", "artists": [{"name": "Artist"}]}} for i in range(2)]
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = tracks
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        self.youtube_service.search_track.side_effect = lambda user_id, track: {"id": {"videoId": track["track"]["id"]}, "snippet": {"title": track["track"]["name"]}}
+        preview = self.playlist_migration.preview_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+        for _ in range(98):
+            self.quota_ledger.record(2, "search.list")
+
+        result = self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id", plan_id=preview["plan_id"])
+
+        self.assertEqual([track.target_id for track in result["tracks_migrated"]], ["sp0", "sp1"])
+
+    def test_plans_and_checkpoints_keep_compact_matches(self):
+        # search payloads (thumbnails...) are neither stored in the plan nor copied to the checkpoint.
+        tracks = [{"track": {"id": f"sp{i}", "name": f"Song{i}", "artists": [{"name": "Artist"}]}} for i in range(3)]
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = tracks
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        self.youtube_service.search_track.side_effect = lambda user_id, track: {
+            "id": {"videoId": track["track"]["id"]}, "snippet": {"title": track["track"]["name"], "thumbnails": {"default": "url"}}, "match_confidence": 0.9
+        }
+        preview = self.playlist_migration.preview_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.assertEqual(self.plan_store.get(preview["plan_id"])["matches"]["sp0"],
+                         {"id": {"videoId": "sp0"}, "snippet": {"title": "Song0"}, "match_confidence": 0.9})
+
+        checkpoints = []
+        self.youtube_service.add_track_to_playlist.side_effect = lambda *args: checkpoints.append(
+            self.checkpoint_store.load(self.current_user, "spotify-to-youtube", "spotify_playlist_id").matches
+        )
+        result = self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id", plan_id=preview["plan_id"])
+
+        self.assertEqual([track.target_id for track in result["tracks_migrated"]], ["sp0", "sp1", "sp2"])
+        self.assertEqual(checkpoints, [{}, {}, {}])
+
+    def test_library_migration_searches_shared_tracks_once(self):
+        # two playlists share a song; the second one cannot be created on YouTube.
+        tracks = {
+            "pl1": [{"track": {"id": "sp0", "name": "Song0", "artists": [{"name": "Artist"}]}},
+                    {"track": {"id": "sp1", "name": "Song1", "artists": [{"name": "Artist"}]}}],
+            "pl2": [{"track": {"id": "sp0", "name": "Song0", "artists": [{"name": "Artist"}]}},
+                    {"track": {"id": "sp2", "name": "Missing", "artists": [{"name": "Artist"}]}}],
+        }
+        self.spotify_service.get_user_playlists.return_value = [{"id": "pl1"}, {"id": "pl2"}]
+        self.spotify_service.get_playlist.side_effect = lambda user_id, playlist_id: {"name": playlist_id, "description": ""}
+        self.spotify_service.get_playlist_tracks.side_effect = lambda user_id, playlist_id, fields=None, call_provider=None, snapshot_id=None: tracks[playlist_id]
+        self.youtube_service.create_playlist.side_effect = [{"id": "yt1"}, APIRequestError("quota")]
+
+        def search_track(user_id, track):
+            if track["track"]["name"] == "Missing":
+                return None
+            return {"id": {"videoId": track["track"]["id"]}}
+        self.youtube_service.search_track.side_effect = search_track
+
+        result = self.playlist_migration.migrate_spotify_library_to_youtube(self.current_user)
+
+        self.assertEqual(self.youtube_service.search_track.call_count, 3)
+        self.assertEqual(result["totals"], {
+            "playlists": 2, "failed_playlists": 1, "tracks": 4, "tracks_migrated": 2, "tracks_not_found": 1, "searches_saved": 1
+        })
+        first, second = result["playlists"]
+        self.assertEqual(first["tracks_migrated"], 2)
+        self.assertIsNone(first["error"])
+        self.assertEqual(second["error"]["type"], "APIRequestError")
+        self.assertEqual(self.track_mappings.get_target_playlist(self.current_user, "spotify-to-youtube", "pl1"), "yt1")
+        self.assertEqual(self.track_mappings.get_mappings(self.current_user, "spotify-to-youtube", "pl1"), {"sp0": "sp0", "sp1": "sp1"})
+
+    def test_overlapping_migrations_share_in_flight_searches(self):
+        # a second migration waits for the search started by the first one.
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def resolve():
+            calls.append(1)
+            started.set()
+            release.wait(1)
+            return {"id": "match"}
+
+        saved = []
+        first = threading.Thread(target=lambda: self.playlist_migration._resolve_once("key", resolve, lambda: None))
+        first.start()
+        started.wait(1)
+        second_result = []
+        second = threading.Thread(target=lambda: second_result.append(
+            self.playlist_migration._resolve_once("key", resolve, lambda: saved.append(1))
+        ))
+        second.start()
+        time.sleep(0.05)
+        release.set()
+        first.join()
+        second.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second_result, [{"id": "match"}])
+        self.assertEqual(saved, [1])
+
+    def test_sync_only_searches_and_adds_new_tracks(self):
+        # the playlist is migrated, then two tracks are added to it on Spotify.
+        tracks = [{"track": {"id": f"sp{i}", "name": f"Song{i}", "artists": [{"name": "Artist"}]}} for i in range(5)]
+        self.spotify_service.get_playlist.return_value = {"name": "Test Playlist", "description": ""}
+        self.spotify_service.get_playlist_tracks.return_value = tracks[:3]
+        self.youtube_service.create_playlist.return_value = {"id": "youtube_playlist_id"}
+        self.youtube_service.search_track.side_effect = lambda user_id, track: {"id": {"videoId": f'yt_{track["track"]["name"]}'}}
+
+        self.playlist_migration.migrate_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        self.spotify_service.get_playlist_tracks.return_value = tracks
+        self.youtube_service.get_playlist_tracks.return_value = [
+            {"snippet": {"resourceId": {"videoId": f"yt_Song{i}"}}} for i in range(3)
+        ]
+        self.youtube_service.search_track.reset_mock()
+        self.youtube_service.add_track_to_playlist.reset_mock()
+
+        result = self.playlist_migration.sync_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
+        searched = [c.args[1]["track"]["name"] for c in self.youtube_service.search_track.call_args_list]
+        self.assertEqual(searched, ["Song3", "Song4"])
+        self.assertEqual(self.youtube_service.add_track_to_playlist.call_args_list, [
+            call(self.current_user, "youtube_playlist_id", "yt_Song3"),
+            call(self.current_user, "youtube_playlist_id", "yt_Song4"),
+        ])
+        self.assertEqual(result["tracks_added"], 2)
+        self.assertEqual(result["tracks_searched"], 2)
+
+    def test_sync_readds_mapped_tracks_without_searching(self):
+        # a track removed from the Spotify target is added again from its stored mapping.
+        self.track_mappings.set_target_playlist(self.current_user, "youtube-to-spotify", "youtube_playlist_id", "spotify_playlist_id")
+        self.track_mappings.add_mappings(self.current_user, "youtube-to-spotify", "youtube_playlist_id", {"v0": "sp0", "v1": "sp1", "v2": ""})
+        self.youtube_service.get_playlist_tracks.return_value = [
+            {"snippet": {"title": f"Song{i}", "resourceId": {"videoId": f"v{i}"}}} for i in range(4)
+        ]
+        self.spotify_service.get_playlist_tracks.return_value = [{"track": {"id": "sp0"}}]
+        self.spotify_service.search_track.side_effect = lambda user_id, query: {"id": f"id_{query.title}"}
+        self.spotify_service.add_tracks_to_playlist.side_effect = lambda user_id, playlist_id, track_ids: [
+            {"offset": 0, "track_ids": track_ids, "snapshot_id": "s1", "error": None}
+        ]
+
+        result = self.playlist_migration.sync_youtube_to_spotify(self.current_user, "youtube_playlist_id")
+
+        # v2 had no match in the previous migration, only v3 is new.
+        self.spotify_service.search_track.assert_called_once_with(self.current_user, ParsedTitle("Song3", None))
+        self.spotify_service.add_tracks_to_playlist.assert_called_once_with(self.current_user, "spotify_playlist_id", ["sp1", "id_Song3"])
+        self.assertEqual(result["tracks_added"], 2)
+        self.assertEqual(self.track_mappings.get_mappings(self.current_user, "youtube-to-spotify", "youtube_playlist_id")["v3"], "id_Song3")
+
+    def test_sync_maps_tracks_already_in_the_target(self):
+        """Tracks found in the Spotify target are mapped, so the next sync does not search them again."""
+        self.youtube_service.get_playlist_tracks.return_value = [
+            {"snippet": {"title": f"Song{i}", "resourceId": {"videoId": f"v{i}"}}} for i in range(3)
+        ]
+        self.spotify_service.get_playlist_tracks.return_value = [{"track": {"id": f"id_Song{i}"}} for i in range(3)]
+        self.spotify_service.search_track.side_effect = lambda user_id, query: {"id": f"id_{query.title}"}
+
+        for _ in range(2):
+            result = self.playlist_migration.sync_youtube_to_spotify(self.current_user, "youtube_playlist_id", target_playlist_id="spotify_playlist_id")
+
+        self.assertEqual(self.spotify_service.search_track.call_count, 3)
+        self.assertEqual(result["tracks_searched"], 0)
+        self.spotify_service.add_tracks_to_playlist.assert_not_called()
+        self.assertEqual(self.track_mappings.get_mappings(self.current_user, "youtube-to-spotify", "youtube_playlist_id"), {f"v{i}": f"id_Song{i}" for i in range(3)})
+
+    def test_sync_without_migration_raises(self):
+        with self.assertRaises(PlaylistNotFoundError):
+            self.playlist_migration.sync_spotify_to_youtube(self.current_user, "spotify_playlist_id")
+
 
         @patch('token_handler.spotify_tokens.SpotifyTokenHandler.get_access_token', return_value="fake_spotify_token")
         @patch('token_handler.youtube_tokens.YouTubeTokenHandler.get_valid_access_token', return_value="fake_youtube_token")
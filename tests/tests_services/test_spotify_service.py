@@ -2,11 +2,19 @@ import unittest
 from unittest.mock import patch, Mock
 from services.spotify_service import SpotifyService
 from errors.custom_exceptions import NoRefreshTokenError
-from errors.playlist_exceptions import  PlaylistNotFoundError, TrackNotFoundError
+from errors.playlist_exceptions import  PlaylistNotFoundError, TrackNotFoundError, ProviderUnavailableError
+from spotipy.exceptions import SpotifyException
+from tests.fake_redis import FakeRedis
 
 class TestSpotifyService(unittest.TestCase):
     def setUp(self):
         """Set up SpotifyService instance and common test data."""
+        # circuit breakers, profiles and playlists are kept in an in-memory Redis.
+        self.redis = FakeRedis()
+        for target in ('extensions.circuit_breaker.redis', 'services.spotify_profiles.redis', 'services.spotify_playlists.redis'):
+            patcher = patch(target, self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
         self.spotify_service = SpotifyService()
         self.user_id = "test_user"
         self.playlist_id = "test_playlist_id"
@@ -32,6 +40,30 @@ class TestSpotifyService(unittest.TestCase):
         self.assertEqual(playlists[0]["name"], "Playlist 1")
         mock_get_access_token.assert_called_once_with(self.user_id)
 
+    @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
+    @patch('spotipy.Spotify')
+    def test_get_user_playlists_reads_every_page(self, mock_spotify, mock_get_access_token):
+        """Every page of playlists is read, with a single profile request for all the calls."""
+        mock_get_access_token.return_value = "valid_token"
+        mock_spotify.return_value = self.mock_spotify_client
+        self.mock_spotify_client.me.return_value = {"id": "owner"}
+        pages = [
+            {"items": [{"name": f"Playlist {i}", "owner": {"id": "owner"}} for i in range(50)], "next": "page2"},
+            {"items": [{"name": "Followed", "owner": {"id": "other"}}, None], "next": None},
+        ]
+        self.mock_spotify_client.current_user_playlists.return_value = pages[0]
+        self.mock_spotify_client.next.return_value = pages[1]
+
+        playlists = self.spotify_service.get_user_playlists(self.user_id)
+        self.spotify_service.get_user_playlists(self.user_id)
+
+        self.assertEqual(len(playlists), 50)
+        self.assertEqual(self.mock_spotify_client.current_user_playlists.call_count, 2)
+        self.assertEqual(self.mock_spotify_client.next.call_count, 2)
+        self.mock_spotify_client.me.assert_called_once()
+        # the profile is shared with the other workers through Redis.
+        self.assertEqual(SpotifyService().profile_cache.get(self.user_id), {"id": "owner"})
+
     @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
     @patch('spotipy.Spotify')
     def test_get_playlist(self, mock_spotify, mock_get_access_token):
@@ -58,6 +90,7 @@ class TestSpotifyService(unittest.TestCase):
         """Test retrieving tracks from a playlist."""
         mock_get_access_token.return_value = "valid_token"
         mock_spotify.return_value = self.mock_spotify_client
+        self.mock_spotify_client.playlist.return_value = {"snapshot_id": "snapshot1"}
         self.mock_spotify_client.playlist_tracks.return_value = {
             "items": [{"track": {"name": "Track 1"}}, {"track": {"name": "Track 2"}}]
         }
@@ -69,6 +102,98 @@ class TestSpotifyService(unittest.TestCase):
         self.assertEqual(tracks[0]["track"]["name"], "Track 1")
         mock_get_access_token.assert_called_once_with(self.user_id)
 
+    @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
+    @patch('spotipy.Spotify')
+    def test_get_playlist_tracks_cached_by_snapshot(self, mock_spotify, mock_get_access_token):
+        """Unchanged playlists are served from the cache, a new snapshot reads the tracks again."""
+        mock_get_access_token.return_value = "valid_token"
+        mock_spotify.return_value = self.mock_spotify_client
+        self.mock_spotify_client.playlist.return_value = {"snapshot_id": "snapshot1"}
+        self.mock_spotify_client.playlist_tracks.return_value = {"items": [{"track": {"id": "sp1"}}], "total": 1}
+
+        tracks = self.spotify_service.get_playlist_tracks(self.user_id, self.playlist_id, fields="items(track(id))")
+        self.assertEqual(self.spotify_service.get_playlist_tracks(self.user_id, self.playlist_id, fields="items(track(id))"), tracks)
+        self.mock_spotify_client.playlist.assert_called_with(self.playlist_id, fields="snapshot_id")
+        self.assertEqual(self.mock_spotify_client.playlist_tracks.call_count, 1)
+
+        # other workers read the compressed tracks from Redis.
+        self.assertEqual(SpotifyService().playlist_cache.get(self.playlist_id, "snapshot1", "items(track(id))"), tracks)
+        # another projection of the same snapshot is not served from the cache.
+        self.spotify_service.get_playlist_tracks(self.user_id, self.playlist_id)
+        self.assertEqual(self.mock_spotify_client.playlist_tracks.call_count, 2)
+
+        self.mock_spotify_client.playlist.return_value = {"snapshot_id": "snapshot2"}
+        self.mock_spotify_client.playlist_tracks.return_value = {"items": [{"track": {"id": "sp2"}}], "total": 1}
+        tracks = self.spotify_service.get_playlist_tracks(self.user_id, self.playlist_id, fields="items(track(id))")
+        self.assertEqual(tracks, [{"track": {"id": "sp2"}}])
+        self.assertEqual(self.mock_spotify_client.playlist_tracks.call_count, 3)
+
+    @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
+    @patch('spotipy.Spotify')
+    def test_known_snapshot_reads_cached_tracks_without_requests(self, mock_spotify, mock_get_access_token):
+        """A snapshot already read with the playlist details is not requested again."""
+        mock_get_access_token.return_value = "valid_token"
+        mock_spotify.return_value = self.mock_spotify_client
+        self.spotify_service.playlist_cache.set(self.playlist_id, "snapshot1", "items(track(id))", [{"track": {"id": "sp1"}}])
+
+        tracks = self.spotify_service.get_playlist_tracks(self.user_id, self.playlist_id, fields="items(track(id))", snapshot_id="snapshot1")
+
+        self.assertEqual(tracks, [{"track": {"id": "sp1"}}])
+        self.mock_spotify_client.playlist.assert_not_called()
+        self.mock_spotify_client.playlist_tracks.assert_not_called()
+
+    @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
+    @patch('spotipy.Spotify')
+    def test_iter_playlist_tracks_reads_every_page(self, mock_spotify, mock_get_access_token):
+        """Every page of a large playlist is read, with the projection of the caller."""
+        mock_get_access_token.return_value = "valid_token"
+        mock_spotify.return_value = self.mock_spotify_client
+        self.mock_spotify_client.playlist_tracks.side_effect = lambda playlist_id, fields, limit, offset, additional_types: {
+            "items": [{"track": {"id": f"sp{i}"}} for i in range(offset, min(offset + limit, 250))],
+            "total": 250,
+        }
+
+        tracks = self.spotify_service.iter_playlist_tracks(self.user_id, self.playlist_id, fields="items(track(id))")
+        self.assertEqual(next(tracks), {"track": {"id": "sp0"}})
+        # the following pages are only requested when the first one has been consumed.
+        self.assertEqual(self.mock_spotify_client.playlist_tracks.call_count, 1)
+
+        self.assertEqual(len(list(tracks)), 249)
+        self.assertEqual([c.kwargs["offset"] for c in self.mock_spotify_client.playlist_tracks.call_args_list], [0, 100, 200])
+        self.assertEqual(self.mock_spotify_client.playlist_tracks.call_args.kwargs["fields"], "items(track(id)),total")
+
+    @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
+    @patch('spotipy.Spotify')
+    def test_get_playlist_tracks_retries_only_the_failed_page(self, mock_spotify, mock_get_access_token):
+        """Every request of the read goes through the caller, which retries a failed page on its own."""
+        mock_get_access_token.return_value = "valid_token"
+        mock_spotify.return_value = self.mock_spotify_client
+        self.mock_spotify_client.playlist.return_value = {"snapshot_id": "snapshot1"}
+        pages = [
+            {"items": [{"track": {"id": f"sp{i}"}} for i in range(100)], "total": 150},
+            SpotifyException(502, -1, "Bad gateway"),
+            {"items": [{"track": {"id": f"sp{i}"}} for i in range(100, 150)], "total": 150},
+        ]
+        def playlist_tracks(playlist_id, fields, limit, offset, additional_types):
+            page = pages.pop(0)
+            if isinstance(page, Exception):
+                raise page
+            return page
+        self.mock_spotify_client.playlist_tracks.side_effect = playlist_tracks
+        requests = []
+        def call_provider(func, *args):
+            requests.append(func.__name__)
+            try:
+                return func(*args)
+            except ProviderUnavailableError:
+                return func(*args)
+
+        tracks = self.spotify_service.get_playlist_tracks(self.user_id, self.playlist_id, call_provider=call_provider)
+
+        self.assertEqual(len(tracks), 150)
+        self.assertEqual(requests, ["_get_snapshot_id", "_get_playlist_tracks_page", "_get_playlist_tracks_page"])
+        self.assertEqual([c.kwargs["offset"] for c in self.mock_spotify_client.playlist_tracks.call_args_list], [0, 100, 100])
+
     @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
     @patch('spotipy.Spotify')
     def test_create_playlist(self, mock_spotify, mock_get_access_token):
@@ -116,6 +241,89 @@ class TestSpotifyService(unittest.TestCase):
         # Verify that search was called with the correct query
         self.mock_spotify_client.search.assert_called_once_with(q=f"track:{self.track_name} artist:{self.artist_name}", type='track', limit=1)
 
+    @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
+    @patch('spotipy.Spotify')
+    def test_add_tracks_to_playlist_in_chunks(self, mock_spotify, mock_get_access_token):
+        """Test adding many tracks in chunks of 100, reporting the chunk that failed."""
+        mock_get_access_token.return_value = "valid_token"
+        mock_spotify.return_value = self.mock_spotify_client
+        track_ids = [f"track_{i}" for i in range(250)]
+        self.mock_spotify_client.playlist_add_items.side_effect = [
+            {"snapshot_id": "snapshot_1"},
+            SpotifyException(500, -1, "Server error"),
+            {"snapshot_id": "snapshot_3"},
+        ]
+
+        reports = self.spotify_service.add_tracks_to_playlist(self.user_id, self.playlist_id, track_ids)
+
+        # Assert one request per chunk, in order, and one report per chunk
+        self.assertEqual(self.mock_spotify_client.playlist_add_items.call_count, 3)
+        self.mock_spotify_client.playlist_add_items.assert_any_call(self.playlist_id, track_ids[200:])
+        self.assertEqual([report["offset"] for report in reports], [0, 100, 200])
+        self.assertIsNone(reports[0]["error"])
+        self.assertIsNotNone(reports[1]["error"])
+        self.assertEqual(reports[2]["snapshot_id"], "snapshot_3")
+        # the server error of the failed chunk is counted by the circuit breaker of Spotify writes.
+        self.assertEqual(self.redis.get("circuit_breaker:spotify.write:failures"), 1)
+
+    @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
+    @patch('spotipy.Spotify')
+    def test_create_playlist_server_error(self, mock_spotify, mock_get_access_token):
+        """Server errors of writes are raised as outages, so the circuit breaker counts them."""
+        mock_get_access_token.return_value = "valid_token"
+        mock_spotify.return_value = self.mock_spotify_client
+        self.mock_spotify_client.me.return_value = {"id": "owner"}
+        self.mock_spotify_client.user_playlist_create.side_effect = SpotifyException(503, -1, "Service unavailable")
+
+        with self.assertRaises(ProviderUnavailableError):
+            self.spotify_service.create_playlist(self.user_id, "New Playlist", "")
+        self.assertEqual(self.redis.get("circuit_breaker:spotify.write:failures"), 1)
+
+    @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
+    @patch('spotipy.Spotify')
+    def test_search_track_picks_best_candidate(self, mock_spotify, mock_get_access_token):
+        """Test that the search scores several candidates instead of taking the first result."""
+        mock_get_access_token.return_value = "valid_token"
+        mock_spotify.return_value = self.mock_spotify_client
+        self.mock_spotify_client.search.return_value = {"tracks": {"items": [
+            {"id": "karaoke", "name": "Yellow (Karaoke Version)", "artists": [{"name": "Sing Along Band"}]},
+            {"id": "original", "name": "Yellow", "artists": [{"name": "Coldplay"}]},
+        ]}}
+
+        result = self.spotify_service.search_track(self.user_id, "Coldplay - Yellow")
+
+        # Assert a single search call returns the original song with its confidence
+        self.mock_spotify_client.search.assert_called_once()
+        self.assertEqual(result["id"], "original")
+        self.assertGreater(result["match_confidence"], 0.9)
+
+    @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
+    @patch('spotipy.Spotify')
+    def test_search_track_without_confident_match(self, mock_spotify, mock_get_access_token):
+        """Test that unrelated candidates are rejected."""
+        mock_get_access_token.return_value = "valid_token"
+        mock_spotify.return_value = self.mock_spotify_client
+        self.mock_spotify_client.search.return_value = {"tracks": {"items": [
+            {"id": "other", "name": "Something Else", "artists": [{"name": "Nobody"}]},
+        ]}}
+
+        with self.assertRaises(TrackNotFoundError):
+            self.spotify_service.search_track(self.user_id, "Coldplay - Yellow")
+
+    @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
+    @patch('spotipy.Spotify')
+    def test_search_track_by_isrc(self, mock_spotify, mock_get_access_token):
+        """Test the exact ISRC search."""
+        mock_get_access_token.return_value = "valid_token"
+        mock_spotify.return_value = self.mock_spotify_client
+        self.mock_spotify_client.search.return_value = {"tracks": {"items": [{"id": "track_id_1"}]}}
+
+        result = self.spotify_service.search_track_by_isrc(self.user_id, "USABC1200001")
+
+        self.mock_spotify_client.search.assert_called_once_with("isrc:USABC1200001", limit=1, type="track")
+        self.assertEqual(result["id"], "track_id_1")
+        self.assertEqual(result["match_confidence"], 1.0)
+
     @patch('services.spotify_service.SpotifyTokenHandler.get_access_token')
     def test_no_refresh_token_error(self, mock_get_access_token):
         """Test handling of NoRefreshTokenError if no valid token is retrieved."""
@@ -0,0 +1,31 @@
+import unittest
+from services.title_normalizer import ParsedTitle, parse_youtube_title, parse_playlist_item, build_spotify_query
+
+class TestTitleNormalizer(unittest.TestCase):
+    def test_decorations_are_stripped_and_artist_split(self):
+        """Video decorations are removed and "Artist - Song" is split."""
+        self.assertEqual(
+            parse_youtube_title("Artist - Song (Official Music Video) [4K]"),
+            ParsedTitle("Song", "Artist")
+        )
+        self.assertEqual(parse_youtube_title("Artist – Song | Lyrics"), ParsedTitle("Song", "Artist"))
+        self.assertEqual(parse_youtube_title('Artist ft. Guest - "Song" (Audio)'), ParsedTitle("Song", "Artist"))
+
+    def test_topic_channel_gives_the_artist(self):
+        """Auto-generated "- Topic" channels are used as artist hint."""
+        self.assertEqual(parse_youtube_title("Song - Remix", "Artist - Topic"), ParsedTitle("Song - Remix", "Artist"))
+        self.assertEqual(parse_youtube_title("Song (Official Video)", "ArtistVEVO"), ParsedTitle("Song", "Artist"))
+        self.assertEqual(parse_youtube_title("Song", "Random Uploads"), ParsedTitle("Song", None))
+
+    def test_unavailable_items_are_skipped(self):
+        """Deleted and private videos are not parsed."""
+        self.assertIsNone(parse_playlist_item({"snippet": {"title": "Deleted video"}}))
+        self.assertIsNone(parse_playlist_item({"snippet": {"title": "Private video"}}))
+
+    def test_fielded_spotify_query(self):
+        """The parsed title builds a fielded Spotify query."""
+        self.assertEqual(build_spotify_query(ParsedTitle("Song", "Artist")), "track:Song artist:Artist")
+        self.assertEqual(build_spotify_query(ParsedTitle("Re: Song", None)), "track:Re  Song")
+
+if __name__ == '__main__':
+    unittest.main()
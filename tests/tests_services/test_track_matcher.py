@@ -0,0 +1,43 @@
+import unittest
+from services.track_matcher import TrackMatcher
+
+class TestTrackMatcher(unittest.TestCase):
+    def setUp(self):
+        self.matcher = TrackMatcher(min_confidence=0.65)
+        self.source = {"title": "Yellow", "artist": "Coldplay", "duration": 269}
+
+    def test_best_candidate_is_not_always_the_first(self):
+        """The candidate matching title and artist wins over the first result."""
+        candidates = [
+            {"title": "Yellow", "artist": "Karaoke Hits", "duration": 270},
+            {"title": "Yellow (Official Video)", "artist": "Coldplay", "duration": 272},
+        ]
+        index, confidence = self.matcher.best_match(self.source, candidates)
+        self.assertEqual(index, 1)
+        self.assertGreater(confidence, 0.8)
+
+    def test_duration_breaks_ties(self):
+        """Between two equal titles, the one with the closest duration wins."""
+        candidates = [
+            {"title": "Coldplay - Yellow (Live)", "artist": "Coldplay", "duration": 390},
+            {"title": "Coldplay - Yellow", "artist": "Coldplay", "duration": 268},
+        ]
+        scores = self.matcher.score(self.source, candidates)
+        self.assertGreater(scores[1], scores[0])
+
+    def test_missing_metadata_is_not_penalized(self):
+        """Without artist or duration, the title alone decides the confidence."""
+        source = {"title": "Coldplay - Yellow", "artist": None, "duration": None}
+        index, confidence = self.matcher.best_match(source, [{"title": "Yellow", "artist": "Coldplay", "duration": 269}])
+        self.assertEqual(index, 0)
+        self.assertEqual(confidence, 1.0)
+
+    def test_unrelated_candidates_are_rejected(self):
+        """No candidate is accepted below the minimum confidence."""
+        index, confidence = self.matcher.best_match(self.source, [{"title": "Hello", "artist": "Adele", "duration": 295}])
+        self.assertIsNone(index)
+        self.assertLess(confidence, 0.65)
+        self.assertEqual(self.matcher.best_match(self.source, []), (None, 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import patch
+from datetime import datetime
+from services.youtube_quota import YouTubeQuotaLedger, QUOTA_TIMEZONE, estimate_migration_cost
+from tests.fake_redis import FakeRedis
+
+class TestYouTubeQuotaLedger(unittest.TestCase):
+    def setUp(self):
+        """Set up a ledger backed by an in-memory Redis, at 18:00 Pacific Time, without reservations."""
+        self.redis = FakeRedis()
+        for patcher in (patch('services.youtube_quota.redis', self.redis), patch.dict('services.youtube_quota._reservations', clear=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.now = datetime(2024, 11, 20, 18, 0, tzinfo=QUOTA_TIMEZONE)
+        self.ledger = YouTubeQuotaLedger(daily_quota=1000, user_daily_quota=400, clock=lambda: self.now)
+
+    def test_calls_are_recorded_per_app_and_user(self):
+        """Each call is charged to the application and to the user."""
+        self.ledger.record(1, "search.list")
+        self.ledger.record(1, "playlistItems.insert")
+        self.ledger.record(2, "videos.list")
+
+        usage = self.ledger.get_usage(1)
+        self.assertEqual(usage["app"], {"used": 151, "reserved": 0, "limit": 1000, "remaining": 849})
+        self.assertEqual(usage["user"], {"used": 150, "reserved": 0, "limit": 400, "remaining": 250})
+        self.assertEqual(usage["resets_in"], 6 * 60 * 60)
+
+    def test_operations_are_admitted_against_the_remaining_budget(self):
+        """An operation is admitted only if it fits the budget of the application and of the user."""
+        self.ledger.record(1, "search.list")
+        self.ledger.record(1, "search.list")
+
+        self.assertIsNone(self.ledger.reserve(1, 201))
+        reservation = self.ledger.reserve(1, 200)
+        self.assertIsNotNone(reservation)
+        self.assertIsNotNone(self.ledger.reserve(2, 400))
+        self.ledger.release(reservation)
+
+    def test_concurrent_operations_cannot_share_the_remaining_budget(self):
+        """Reserved units are deducted from the budget until the operation releases what it did not use."""
+        first = self.ledger.reserve(1, 300)
+        self.assertIsNone(self.ledger.reserve(1, 101))
+        self.assertEqual(self.ledger.get_usage(1)["user"], {"used": 0, "reserved": 300, "limit": 400, "remaining": 100})
+
+        # the calls of the operation are charged to its reservation, not counted twice.
+        self.ledger.record(1, "search.list")
+        self.ledger.record(1, "playlistItems.insert")
+        self.assertEqual(self.ledger.get_usage(1)["user"], {"used": 150, "reserved": 150, "limit": 400, "remaining": 100})
+
+        self.ledger.release(first)
+        self.assertEqual(self.ledger.get_usage(1)["user"], {"used": 150, "reserved": 0, "limit": 400, "remaining": 250})
+        self.assertEqual(self.ledger.get_usage(1)["app"]["reserved"], 0)
+        self.assertIsNotNone(self.ledger.reserve(1, 250))
+
+    def test_operations_larger_than_a_day_need_a_full_budget(self):
+        """A migration that cannot fit in one day starts with the whole daily budget."""
+        cost = estimate_migration_cost(200)
+        self.assertEqual(cost, 200 * 151 + 50)
+        # tracks matched by a preview are only inserted.
+        self.assertEqual(estimate_migration_cost(1, create_playlist=False, matched_tracks=2), 151 + 2 * 50)
+        reservation = self.ledger.reserve(1, cost)
+        self.assertEqual(reservation.remaining, 400)
+        self.ledger.release(reservation)
+
+        self.ledger.record(1, "videos.list")
+        self.assertIsNone(self.ledger.reserve(1, cost))
+
+    def test_usage_is_reset_every_day(self):
+        """Usage is kept per quota day."""
+        self.ledger.record(1, "search.list")
+        self.now = datetime(2024, 11, 21, 0, 1, tzinfo=QUOTA_TIMEZONE)
+        self.assertEqual(self.ledger.get_usage(1)["app"]["used"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,17 @@
 import unittest
 from unittest.mock import patch, Mock, MagicMock
-from services.youtube_service import YouTubeService
+from services.youtube_service import YouTubeService, parse_duration
+from tests.fake_redis import FakeRedis
 
 class TestYouTubeService(unittest.TestCase):
     def setUp(self):
         """Set up the YouTubeService instance and common test data."""
+        # quota usage and circuit breakers are kept in an in-memory Redis.
+        self.redis = FakeRedis()
+        for target in ('services.youtube_quota.redis', 'extensions.circuit_breaker.redis'):
+            patcher = patch(target, self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
         self.youtube_service = YouTubeService()
         self.user_id = "test_user"
         self.playlist_id = "test_playlist_id"
@@ -79,6 +86,46 @@ class TestYouTubeService(unittest.TestCase):
         # Assert the returned tracks match the expected titles.
         self.assertEqual(tracks, [{"snippet": {"title": "Track 1"}}, {"snippet": {"title": "Track 2"}}])
 
+    @patch('services.youtube_service.build')
+    @patch('token_handler.youtube_tokens.YouTubeTokenHandler.get_valid_access_token')
+    def test_get_user_playlists_list_reads_every_page(self, mock_get_token, mock_build):
+        """Every page of the user's playlists is read, not only the first 5 playlists."""
+        mock_youtube = Mock()
+        mock_build.return_value = mock_youtube
+        mock_youtube.playlists().list().execute.side_effect = [
+            {"items": [{"id": f"pl{i}"} for i in range(50)], "nextPageToken": "page2"},
+            {"items": [{"id": "pl50"}]},
+        ]
+        mock_youtube.playlists().list.reset_mock()
+
+        playlists = self.youtube_service.get_user_playlists_list(self.user_id)
+
+        self.assertEqual(len(playlists), 51)
+        requests = mock_youtube.playlists().list.call_args_list
+        self.assertEqual([c.kwargs["pageToken"] for c in requests], [None, "page2"])
+        self.assertEqual(requests[0].kwargs["maxResults"], 50)
+
+    @patch('services.youtube_service.build')
+    @patch('token_handler.youtube_tokens.YouTubeTokenHandler.get_valid_access_token')
+    def test_get_playlist_tracks_reads_every_page(self, mock_get_token, mock_build):
+        """Pages are followed with their token, and each page is charged 1 quota unit."""
+        mock_youtube = Mock()
+        mock_build.return_value = mock_youtube
+        mock_youtube.playlistItems().list().execute.side_effect = [
+            {"items": [{"snippet": {"title": "Track 1"}}], "nextPageToken": "page2"},
+            {"items": [{"snippet": {"title": "Track 2"}}]},
+        ]
+        mock_youtube.playlistItems().list.reset_mock()
+
+        tracks = self.youtube_service.get_playlist_tracks(self.user_id, self.playlist_id, fields="items(snippet(title))")
+
+        self.assertEqual(tracks, [{"snippet": {"title": "Track 1"}}, {"snippet": {"title": "Track 2"}}])
+        requests = mock_youtube.playlistItems().list.call_args_list
+        self.assertEqual([c.kwargs["pageToken"] for c in requests], [None, "page2"])
+        self.assertEqual(requests[0].kwargs["fields"], "nextPageToken,items(snippet(title))")
+        self.assertEqual(requests[0].kwargs["maxResults"], 50)
+        self.assertEqual(self.youtube_service.quota_ledger.get_usage(self.user_id)["user"]["used"], 2)
+
     @patch('services.youtube_service.build')
     @patch('token_handler.youtube_tokens.YouTubeTokenHandler.get_valid_access_token')
     def test_create_playlist(self, mock_get_token, mock_build):
@@ -146,6 +193,43 @@ class TestYouTubeService(unittest.TestCase):
         self.assertEqual(results[1]['snippet']['title'], "Song2")
 
 
+    @patch('token_handler.youtube_tokens.YouTubeTokenHandler.get_valid_access_token', return_value="fake_youtube_token")
+    @patch('services.youtube_service.build')
+    def test_search_track_scores_candidates(self, mock_build, mock_token):
+        """Test that one search returns the candidate matching the title, artist and duration."""
+        mock_youtube = MagicMock()
+        mock_build.return_value = mock_youtube
+        mock_youtube.search.return_value.list.return_value.execute.return_value = {
+            "items": [
+                {"id": {"videoId": "cover"}, "snippet": {"title": "Yellow (cover)", "channelTitle": "Some Covers"}},
+                {"id": {"videoId": "live"}, "snippet": {"title": "Coldplay - Yellow (Live)", "channelTitle": "ColdplayVEVO"}},
+                {"id": {"videoId": "audio"}, "snippet": {"title": "Yellow", "channelTitle": "Coldplay - Topic"}},
+            ]
+        }
+        mock_youtube.videos.return_value.list.return_value.execute.return_value = {
+            "items": [
+                {"id": "cover", "contentDetails": {"duration": "PT4M"}},
+                {"id": "live", "contentDetails": {"duration": "PT6M30S"}},
+                {"id": "audio", "contentDetails": {"duration": "PT4M29S"}},
+            ]
+        }
+        track = {"track": {"name": "Yellow", "artists": [{"name": "Coldplay"}], "duration_ms": 269000}}
+
+        result = self.youtube_service.search_track(self.user_id, track)
+
+        mock_youtube.search.return_value.list.assert_called_once()
+        self.assertEqual(result["id"]["videoId"], "audio")
+        self.assertGreater(result["match_confidence"], 0.9)
+        # the search and the durations are charged to the user.
+        self.assertEqual(self.youtube_service.quota_ledger.get_usage(self.user_id)["user"]["used"], 101)
+
+    def test_parse_duration(self):
+        """Test the conversion of ISO 8601 video durations to seconds."""
+        self.assertEqual(parse_duration("PT3M25S"), 205)
+        self.assertEqual(parse_duration("PT1H2S"), 3602)
+        self.assertIsNone(parse_duration("invalid"))
+
+
 if __name__ == '__main__':
     unittest.main() 
 